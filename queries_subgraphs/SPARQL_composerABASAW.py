@@ -1,31 +1,23 @@
-from rdflib import Graph, Namespace
+import sys
+from pathlib import Path
+from rdflib import Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+from graph_cache import load_graph
+from prepared_queries import run_query
 
 # Laden
-g = Graph()
-g.parse("MusicHistoryGraph_TwelveToneMusic_Complete.ttl", format="ttl")
+g = load_graph("MusicHistoryGraph_TwelveToneMusic_Complete.ttl")
 
 mhg = Namespace("http://music-history-graph.ch/twelve-tone-onto#")
 frbr = Namespace("http://purl.org/vocab/frbr/core/")
 schema = Namespace("https://schema.org/")
 
-query = """
-CONSTRUCT {
-  ?composer frbr:creatorOf ?work .
-  ?work a ?workType .
-}
-WHERE {
-  VALUES ?composer { 
-    mhg:AlbanBerg 
-    mhg:ArnoldSchoenberg 
-    mhg:AntonWebern 
-  }
-  ?composer a mhg:composer .
-  OPTIONAL { ?composer frbr:creatorOf ?work . }
-  OPTIONAL { ?work a ?workType . }
-}
-"""
-
-subgraph = g.query(query).graph
+# Vorbereitete Abfrage (siehe utils/prepared_queries.py); die Komponisten
+# werden als VALUES-Menge übergeben statt in den Abfragetext geschrieben
+COMPOSERS = [mhg.AlbanBerg, mhg.ArnoldSchoenberg, mhg.AntonWebern]
+
+subgraph = run_query(g, "composer_works", composer=COMPOSERS).graph
 
 # Prefixe hinzufügen
 subgraph.bind("mhg", mhg)
@@ -1,38 +1,23 @@
-from rdflib import Graph, Namespace
+import sys
+from pathlib import Path
+from rdflib import Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+from graph_cache import load_graph
+from prepared_queries import run_query
 
 # Laden
-g = Graph()
-g.parse("MusicHistoryGraph_TwelveToneMusic_Complete.ttl", format="ttl")
+g = load_graph("MusicHistoryGraph_TwelveToneMusic_Complete.ttl")
 
 mhg = Namespace("http://music-history-graph.ch/twelve-tone-onto#")
 frbr = Namespace("http://purl.org/vocab/frbr/core/")
 schema = Namespace("https://schema.org/")
 
-query = """
-PREFIX mhg: <http://music-history-graph.ch/twelve-tone-onto#>
-PREFIX frbr: <http://purl.org/vocab/frbr/core/>
-PREFIX schema: <https://schema.org/>
-PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-
-CONSTRUCT {
-  ?composer a mhg:composer ;
-            frbr:creatorOf ?work .
-  ?work a ?workType ;
-        frbr:hasCreationDate ?date .
-}
-WHERE {
-  ?composer a mhg:composer .
-  ?composer frbr:creatorOf ?work .
-  OPTIONAL { ?work a ?workType . }
-  OPTIONAL { ?work frbr:hasCreationDate ?date . }
-  FILTER (
-    bound(?date) &&
-    xsd:integer(SUBSTR(STR(?date), 1, 4)) < 1960
-  )
-}
-"""
-
-subgraph = g.query(query).graph
+# Vorbereitete Abfrage (siehe utils/prepared_queries.py); die Jahresgrenze
+# wird als Bindung übergeben
+CUTOFF_YEAR = 1960
+
+subgraph = run_query(g, "works_before", cutoff=CUTOFF_YEAR).graph
 
 # Prefixe hinzufügen
 subgraph.bind("mhg", mhg)
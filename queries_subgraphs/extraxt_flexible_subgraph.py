@@ -1,24 +1,34 @@
-from rdflib import Graph, Namespace
+import sys
+from pathlib import Path
 
-# === Datei & Namespaces ===
-TTL_FILE = "MusicHistoryGraph_TwelveToneMusic_Complete.ttl"
-
-mhg = Namespace("http://music-history-graph.ch/twelve-tone-onto#")
-frbr = Namespace("http://purl.org/vocab/frbr/core/")
-schema = Namespace("https://schema.org/")
-rdf = Namespace("http://www.w3.org/1999/02/22-rdf-syntax-ns#")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+from extraction_cache import ExtractionCache
+from subgraph_extract import MODE_NUMBERS, default_output_name, extract_batch, parse_seed_file
 
-# === RDF laden ===
-print(f"Lade RDF-Datei: {TTL_FILE}")
-g = Graph()
-g.parse(TTL_FILE, format="ttl")
-print(f"Triples insgesamt: {len(g)}\n")
+# === Datei ===
+TTL_FILE = "MusicHistoryGraph_TwelveToneMusic_Complete.ttl"
+OUTPUT_SUFFIX = ".ttl"  # oder ".nt", ".nt.gz", ".nq", ".nq.gz"
+
+# === Batch-Modus: python extraxt_flexible_subgraph.py seeds.txt [ausgabeverzeichnis] ===
+# Alle Seeds aus einem geladenen Graphen, eine Datei pro Seed (siehe utils/subgraph_extract.py)
+if len(sys.argv) > 1:
+    results = extract_batch(TTL_FILE, parse_seed_file(sys.argv[1]),
+                            output_dir=sys.argv[2] if len(sys.argv) > 2 else ".")
+    for local_id, out_file, n in results:
+        print(f"✅ {local_id}: {n} Triples -> {out_file}")
+    sys.exit()
+
+# === RDF-Datei ===
+print(f"RDF-Datei: {TTL_FILE}\n")
+# Wiederholte Anfragen kommen aus dem Extraktions-Cache (siehe utils/extraction_cache.py);
+# der Graph wird erst bei einem Cache-Fehlschlag geladen
+cache = ExtractionCache.for_file(TTL_FILE)
 
 # === Benutzereingabe ===
 print("Was möchtest du extrahieren? (Mehrfachauswahl möglich)")
 print("1 = Komponisten  |  2 = Werke  |  3 = RowClasses")
 wahl = input("Bitte wähle z. B. 1,2 oder 1,3: ").strip()
-wahl_set = {x.strip() for x in wahl.split(",") if x.strip() in {"1", "2", "3"}}
+wahl_set = {MODE_NUMBERS[x.strip()] for x in wahl.split(",") if x.strip() in MODE_NUMBERS}
 
 if not wahl_set:
     print("Keine gültige Auswahl. Abbruch.")
@@ -30,54 +40,10 @@ namen = input(
 ).strip()
 ids = [n.strip() for n in namen.split(",") if n.strip()]
 
-# === Subgraph erzeugen ===
-subgraph = Graph()
-subgraph.bind("mhg", mhg)
-subgraph.bind("frbr", frbr)
-subgraph.bind("schema", schema)
-
-def add_all_triples_about(entity):
-    """Fügt alle Tripel hinzu, in denen entity Subjekt oder Objekt ist."""
-    for s, p, o in g.triples((entity, None, None)):
-        subgraph.add((s, p, o))
-    for s, p, o in g.triples((None, None, entity)):
-        subgraph.add((s, p, o))
-
-
-for local_id in ids:
-    entity = mhg[local_id]
-
-    # --- Komponist ---
-    if "1" in wahl_set:
-        for s, p, o in g.triples((entity, None, None)):
-            subgraph.add((s, p, o))
-        for s, p, o in g.triples((None, None, entity)):
-            subgraph.add((s, p, o))
-
-        # verbundene Werke ergänzen
-        for _, _, work in g.triples((entity, frbr.creatorOf, None)):
-            add_all_triples_about(work)
-
-    # --- Werk ---
-    if "2" in wahl_set:
-        add_all_triples_about(entity)
-
-        # evtl. Komponisten ergänzen
-        for composer in g.objects(entity, frbr.created):
-            add_all_triples_about(composer)
-
-    # --- RowClass ---
-    if "3" in wahl_set:
-        # Eigenschaften der RowClass selbst
-        add_all_triples_about(entity)
-
-        # alle RowForms, die zu dieser Klasse gehören
-        for rowform in g.subjects(mhg.hasRowClass, entity):
-            add_all_triples_about(rowform)
-
-# === Ausgabe ===
-out_file = f"subgraph_{'_'.join(ids)}.ttl"
-subgraph.serialize(out_file, format="turtle")
+# === Subgraph erzeugen und speichern (siehe utils/subgraph_extract.py) ===
+# Mit OUTPUT_SUFFIX = ".nt.gz" werden die Tripel beim Extrahieren gestreamt
+out_file = default_output_name(ids, OUTPUT_SUFFIX)
+n = cache.extract_to_file(ids, wahl_set, out_file)
 
 print(f"\n✅ Subgraph gespeichert als: {out_file}")
-print(f"Enthält {len(subgraph)} Triples.")
+print(f"Enthält {n} Triples.")
@@ -1,5 +1,11 @@
+import sys
+from pathlib import Path
 from rdflib import Graph, Namespace, URIRef
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+from graph_cache import load_graph
+from subgraph_extract import MODE_NUMBERS, default_output_name, parse_seed_file
+
 # ==== Einstellungen ====
 TTL_FILE = "MusicHistoryGraph_TwelveToneMusic_Complete.ttl"
 
@@ -9,35 +15,18 @@ frbr = Namespace("http://purl.org/vocab/frbr/core/")
 schema = Namespace("https://schema.org/")
 rdf = Namespace("http://www.w3.org/1999/02/22-rdf-syntax-ns#")
 
-# ==== RDF laden ====
-print(f"Lade RDF-Datei: {TTL_FILE}")
-g = Graph()
-g.parse(TTL_FILE, format="ttl")
-print(f"Triples insgesamt: {len(g)}")
-
-# ==== Benutzerwahl ====
-print("\nWas möchtest du extrahieren?")
-print("1 = Komponist(en)")
-print("2 = Werk(e)")
-print("3 = RowClass(es)")
-wahl = input("Bitte wählen (1/2/3): ").strip()
-
-if wahl not in {"1", "2", "3"}:
-    print("Ungültige Eingabe.")
-    exit()
+# ==== Extraktion ====
+def new_subgraph():
+    subgraph = Graph()
+    subgraph.bind("mhg", mhg)
+    subgraph.bind("frbr", frbr)
+    subgraph.bind("schema", schema)
+    return subgraph
 
-namen = input("Gib eine oder mehrere lokale IDs durch Komma getrennt ein (z.B. AlbanBerg, ArnoldSchoenberg):\n> ").strip()
-ids = [n.strip() for n in namen.split(",") if n.strip()]
-
-# ==== Subgraph erstellen ====
-subgraph = Graph()
-subgraph.bind("mhg", mhg)
-subgraph.bind("frbr", frbr)
-subgraph.bind("schema", schema)
-
-for local_id in ids:
+def add_entity(g, subgraph, local_id, mode):
+    """Fügt die Triples einer Entität im Modus composer, work oder rowClass hinzu."""
     entity = mhg[local_id]
-    if wahl == "1":
+    if mode == "composer":
         # Komponist: alle Triples, die diesen Komponisten betreffen
         for s, p, o in g.triples((entity, None, None)):
             subgraph.add((s, p, o))
@@ -48,14 +37,14 @@ for local_id in ids:
             for s, p, o in g.triples((work, None, None)):
                 subgraph.add((s, p, o))
 
-    elif wahl == "2":
+    elif mode == "work":
         # Werk: alle Triples, die dieses Werk betreffen
         for s, p, o in g.triples((entity, None, None)):
             subgraph.add((s, p, o))
         for s, p, o in g.triples((None, None, entity)):
             subgraph.add((s, p, o))
 
-    elif wahl == "3":
+    elif mode == "rowClass":
         # RowClass: alle zugehörigen rowForms finden
         for s, p, o in g.triples((None, mhg.hasRowClass, entity)):
             subgraph.add((s, p, o))
@@ -65,6 +54,47 @@ for local_id in ids:
         for s, p, o in g.triples((entity, None, None)):
             subgraph.add((s, p, o))
 
+# ==== Batch-Modus: python extraxt_subgraph.py seeds.txt [ausgabeverzeichnis] ====
+# Alle Seeds aus einem geladenen Graphen, eine Datei pro Seed, mit denselben
+# Regeln wie die interaktive Auswahl (Seed-Format siehe utils/subgraph_extract.py)
+if len(sys.argv) > 1:
+    seeds = parse_seed_file(sys.argv[1])
+    output_dir = Path(sys.argv[2] if len(sys.argv) > 2 else ".")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    g = load_graph(TTL_FILE, store="mmap")
+    for local_id, modes in seeds.items():
+        subgraph = new_subgraph()
+        for mode in sorted(modes):
+            add_entity(g, subgraph, local_id, mode)
+        out_file = output_dir / default_output_name([local_id])
+        subgraph.serialize(out_file, format="turtle")
+        print(f"✅ {local_id}: {len(subgraph)} Triples -> {out_file}")
+    sys.exit()
+
+# ==== RDF laden ====
+print(f"Lade RDF-Datei: {TTL_FILE}")
+g = load_graph(TTL_FILE, store="mmap")  # memory-mapped Index: öffnet sofort, Seiten geteilt
+print(f"Triples insgesamt: {len(g)}")
+
+# ==== Benutzerwahl ====
+print("\nWas möchtest du extrahieren?")
+print("1 = Komponist(en)")
+print("2 = Werk(e)")
+print("3 = RowClass(es)")
+wahl = input("Bitte wählen (1/2/3): ").strip()
+
+if wahl not in {"1", "2", "3"}:
+    print("Ungültige Eingabe.")
+    exit()
+
+namen = input("Gib eine oder mehrere lokale IDs durch Komma getrennt ein (z.B. AlbanBerg, ArnoldSchoenberg):\n> ").strip()
+ids = [n.strip() for n in namen.split(",") if n.strip()]
+
+# ==== Subgraph erstellen ====
+subgraph = new_subgraph()
+for local_id in ids:
+    add_entity(g, subgraph, local_id, MODE_NUMBERS[wahl])
+
 # ==== Ausgabe ====
 out_file = f"subgraph_{'_'.join(ids)}.ttl"
 subgraph.serialize(out_file, format="turtle")
@@ -1,50 +1,34 @@
-from rdflib import Graph, URIRef
-from collections import deque
+import sys
+from pathlib import Path
+from rdflib import URIRef
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+from extraction_cache import ExtractionCache
+from triple_writer import TripleWriter, is_stream_path
 
 # Datei und Format anpassen
 INPUT_FILE = "MusicHistoryGraph_TwelveToneMusic_Complete.ttl"
 OUTPUT_FILE = "subgraph_expanded.ttl"
-START_URI = "http://music-history-graph.ch/twelve-tone-onto#AlbanBerg"  # Start-URI
+START_URIS = ["http://music-history-graph.ch/twelve-tone-onto#AlbanBerg"]  # eine oder mehrere Start-URIs
 DEPTH = 1  # Anzahl der Schritte (z. B. 1 = direkte Nachbarn, 2 = Nachbarn der Nachbarn, ...)
 
-# Graph laden
-g = Graph()
-g.parse(INPUT_FILE, format="turtle")
-
-# Subgraph vorbereiten
-subgraph = Graph()
-
-# Warteschlange für BFS
-queue = deque()
-visited = set()
-
-start_node = URIRef(START_URI)
-queue.append((start_node, 0))
-visited.add(start_node)
-
-print(f"Starte BFS von {START_URI} bis Tiefe {DEPTH} ...")
-
-while queue:
-    current_node, depth = queue.popleft()
-    if depth > DEPTH:
-        continue
+# Extraktions-Cache zur Datei
+# Ergebnisse werden nach Seeds, Tiefe und Filtern zwischengespeichert (siehe utils/extraction_cache.py);
+# der memory-mapped Index wird nur bei einem Cache-Fehlschlag geöffnet
+cache = ExtractionCache.for_file(INPUT_FILE)
 
-    # Alle Tripel, bei denen current_node Subjekt ist
-    for s, p, o in g.triples((current_node, None, None)):
-        subgraph.add((s, p, o))
-        if o not in visited and isinstance(o, URIRef):
-            queue.append((o, depth + 1))
-            visited.add(o)
+print(f"Starte BFS von {', '.join(START_URIS)} bis Tiefe {DEPTH} ...")
 
-    # Alle Tripel, bei denen current_node Objekt ist
-    for s, p, o in g.triples((None, None, current_node)):
-        subgraph.add((s, p, o))
-        if s not in visited and isinstance(s, URIRef):
-            queue.append((s, depth + 1))
-            visited.add(s)
+# BFS über die CSR-Adjazenz (siehe utils/graph_csr.py): ganze Front pro Schritt
+# .nt/.nq(.gz) wird direkt zeilenweise geschrieben (siehe utils/triple_writer.py)
+out = TripleWriter(OUTPUT_FILE) if is_stream_path(OUTPUT_FILE) else None
+subgraph = cache.k_hop_subgraph([URIRef(u) for u in START_URIS], depth=DEPTH, out=out)
 
 print(f"Gesammelte Tripel: {len(subgraph)}")
 
 # Serialisieren (z. B. als Turtle)
-subgraph.serialize(destination=OUTPUT_FILE, format="turtle")
+if out is None:
+    subgraph.serialize(destination=OUTPUT_FILE, format="turtle")
+else:
+    out.close()
 print(f"Subgraph gespeichert als {OUTPUT_FILE}")
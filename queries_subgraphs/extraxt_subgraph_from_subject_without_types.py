@@ -1,55 +1,35 @@
-from rdflib import Graph, URIRef, RDF
-from collections import deque
+import sys
+from pathlib import Path
+from rdflib import URIRef, RDF
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+from extraction_cache import ExtractionCache
+from triple_writer import TripleWriter, is_stream_path
 
 # === Einstellungen ===
 INPUT_FILE = "MusicHistoryGraph_TwelveToneMusic_Complete.ttl"
 OUTPUT_FILE = "subgraph_expanded.ttl"
-START_URI = "http://music-history-graph.ch/twelve-tone-onto#Webern_String_Trio_Op_20"
+START_URIS = ["http://music-history-graph.ch/twelve-tone-onto#Webern_String_Trio_Op_20"]
 DEPTH = 2  # Tiefe der Nachbarschaft
 
-# === Graph laden ===
-g = Graph()
-g.parse(INPUT_FILE, format="turtle")
-
-# === Subgraph initialisieren und Namespaces übernehmen ===
-subgraph = Graph()
-for prefix, namespace in g.namespaces():
-    subgraph.bind(prefix, namespace)
-
-# === BFS vorbereiten ===
-queue = deque()
-visited = set()
-start_node = URIRef(START_URI)
-queue.append((start_node, 0))
-visited.add(start_node)
-
-print(f"Starte BFS von {START_URI} bis Tiefe {DEPTH} ...")
-
-while queue:
-    current_node, depth = queue.popleft()
-    if depth > DEPTH:
-        continue
+# === Extraktions-Cache zur Datei ===
+# Ergebnisse werden nach Seeds, Tiefe und Filtern zwischengespeichert (siehe utils/extraction_cache.py);
+# der memory-mapped Index wird nur bei einem Cache-Fehlschlag geöffnet
+cache = ExtractionCache.for_file(INPUT_FILE)
 
-    # Tripel, bei denen current_node Subjekt ist
-    for s, p, o in g.triples((current_node, None, None)):
-        if p == RDF.type:  # rdf:type überspringen
-            continue
-        subgraph.add((s, p, o))
-        if o not in visited and isinstance(o, URIRef):
-            queue.append((o, depth + 1))
-            visited.add(o)
+print(f"Starte BFS von {', '.join(START_URIS)} bis Tiefe {DEPTH} ...")
 
-    # Tripel, bei denen current_node Objekt ist
-    for s, p, o in g.triples((None, None, current_node)):
-        if p == RDF.type:  # rdf:type überspringen
-            continue
-        subgraph.add((s, p, o))
-        if s not in visited and isinstance(s, URIRef):
-            queue.append((s, depth + 1))
-            visited.add(s)
+# === BFS über die CSR-Adjazenz (siehe utils/graph_csr.py), rdf:type überspringen ===
+# .nt/.nq(.gz) wird direkt zeilenweise geschrieben (siehe utils/triple_writer.py)
+out = TripleWriter(OUTPUT_FILE) if is_stream_path(OUTPUT_FILE) else None
+subgraph = cache.k_hop_subgraph([URIRef(u) for u in START_URIS], depth=DEPTH,
+                                skip_predicates=[RDF.type], out=out)
 
 print(f"Gesammelte Tripel (ohne rdf:type): {len(subgraph)}")
 
 # === Ausgabe speichern ===
-subgraph.serialize(destination=OUTPUT_FILE, format="turtle")
+if out is None:
+    subgraph.serialize(destination=OUTPUT_FILE, format="turtle")
+else:
+    out.close()
 print(f"Subgraph gespeichert als {OUTPUT_FILE}")
@@ -1,74 +1,37 @@
-from rdflib import Graph, URIRef, BNode, RDF
-from collections import deque
+import sys
+from pathlib import Path
+from rdflib import URIRef, RDF
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+from extraction_cache import ExtractionCache
+from triple_writer import TripleWriter, is_stream_path
 
 # === Einstellungen ===
 INPUT_FILE = "MusicHistoryGraph_TwelveToneMusic_Complete.ttl"
 OUTPUT_FILE = "subgraph_expanded_with_bags.ttl"
-START_URI = "http://music-history-graph.ch/twelve-tone-onto#1_1_1_1_1_1_1_1_1_1_1"
+START_URIS = ["http://music-history-graph.ch/twelve-tone-onto#1_1_1_1_1_1_1_1_1_1_1"]
 DEPTH = 1  # BFS-Tiefe
 
-# === Graph laden ===
-g = Graph()
-g.parse(INPUT_FILE, format="turtle")
-
-# === Subgraph vorbereiten (mit originalen Namespaces) ===
-subgraph = Graph()
-for prefix, namespace in g.namespaces():
-    subgraph.bind(prefix, namespace)
-
-# === Hilfsfunktion: alle Tripel eines Blank Nodes rekursiv sammeln ===
-def add_blank_node_triples(node, visited_bnodes):
-    """Fügt alle Tripel, die zu einem Blank Node gehören, rekursiv hinzu."""
-    if node in visited_bnodes:
-        return
-    visited_bnodes.add(node)
-    for s, p, o in g.triples((node, None, None)):
-        if p == RDF.type:
-            continue  # rdf:type überspringen
-        subgraph.add((s, p, o))
-        if isinstance(o, BNode):  # verschachtelte Blank Nodes
-            add_blank_node_triples(o, visited_bnodes)
-
-# === BFS vorbereiten ===
-queue = deque()
-visited = set()
-visited_bnodes = set()
-
-start_node = URIRef(START_URI)
-queue.append((start_node, 0))
-visited.add(start_node)
-
-print(f"Starte BFS von {START_URI} bis Tiefe {DEPTH} ...")
-
-while queue:
-    current_node, depth = queue.popleft()
-    if depth > DEPTH:
-        continue
+# === Extraktions-Cache zur Datei ===
+# Ergebnisse werden nach Seeds, Tiefe und Filtern zwischengespeichert (siehe utils/extraction_cache.py);
+# der memory-mapped Index wird nur bei einem Cache-Fehlschlag geöffnet
+cache = ExtractionCache.for_file(INPUT_FILE)
 
-    # --- Ausgehende Tripel ---
-    for s, p, o in g.triples((current_node, None, None)):
-        if p == RDF.type:
-            continue
-        subgraph.add((s, p, o))
-        if isinstance(o, BNode):
-            add_blank_node_triples(o, visited_bnodes)
-        elif isinstance(o, URIRef) and o not in visited:
-            queue.append((o, depth + 1))
-            visited.add(o)
+print(f"Starte BFS von {', '.join(START_URIS)} bis Tiefe {DEPTH} ...")
 
-    # --- Eingehende Tripel ---
-    for s, p, o in g.triples((None, None, current_node)):
-        if p == RDF.type:
-            continue
-        subgraph.add((s, p, o))
-        if isinstance(s, BNode):
-            add_blank_node_triples(s, visited_bnodes)
-        elif isinstance(s, URIRef) and s not in visited:
-            queue.append((s, depth + 1))
-            visited.add(s)
+# === BFS über die CSR-Adjazenz (siehe utils/graph_csr.py) ===
+# Pro Schritt wird die ganze Front erweitert; Blank Nodes an den Kanten werden
+# samt verschachtelter Blank Nodes übernommen, rdf:type wird übersprungen.
+# .nt/.nq(.gz) wird direkt zeilenweise geschrieben (siehe utils/triple_writer.py)
+out = TripleWriter(OUTPUT_FILE) if is_stream_path(OUTPUT_FILE) else None
+subgraph = cache.k_hop_subgraph([URIRef(u) for u in START_URIS], depth=DEPTH,
+                                skip_predicates=[RDF.type], blank_nodes=True, out=out)
 
 print(f"Gesammelte Tripel (inkl. Blank Nodes, ohne rdf:type): {len(subgraph)}")
 
 # === Speichern ===
-subgraph.serialize(destination=OUTPUT_FILE, format="turtle")
+if out is None:
+    subgraph.serialize(destination=OUTPUT_FILE, format="turtle")
+else:
+    out.close()
 print(f"Subgraph gespeichert als {OUTPUT_FILE}")
@@ -1,6 +1,9 @@
-from rdflib import Graph, Namespace, RDF
+from rdflib import Namespace, RDF
 from difflib import SequenceMatcher
 
+from graph_cache import load_graph
+from materialized_views import MaterializedViews
+
 # === Datei laden ===
 ttl_file = "Music-History-Knowledge-Graph/MusicHistoryGraph_TwelveToneMusic_Complete.ttl"
 
@@ -9,9 +12,8 @@ mhg = Namespace("http://music-history-graph.ch/twelve-tone-onto#")
 frbr = Namespace("http://purl.org/vocab/frbr/core/")
 dcterms = Namespace("http://purl.org/dc/terms/")
 
-# === RDF-Graph laden ===
-g = Graph()
-g.parse(ttl_file, format="turtle")
+# === RDF-Graph laden (memory-mapped Index, siehe triple_index_file.py) ===
+g = load_graph(ttl_file, store="mmap")
 
 # === Hilfsfunktionen ===
 def similar(a, b, threshold=0.85):
@@ -21,30 +23,28 @@ def similar(a, b, threshold=0.85):
 def local_name(uri):
     return str(uri).split("#")[-1]
 
-# === 1. COMPOSER–WORK Beziehungen ===
-composer_to_works = {}
-for composer, _, work in g.triples((None, frbr.creatorOf, None)):
-    composer_to_works.setdefault(composer, set()).add(work)
+# === Beziehungen aus den materialisierten Sichten (siehe materialized_views.py) ===
+views = MaterializedViews.for_graph(g)
 
-work_to_composer = {}
-for work, _, composer in g.triples((None, frbr.creator, None)):
-    work_to_composer[work] = composer
+# 1. COMPOSER–WORK
+composer_to_works = {c: set(works) for c, works in views.table("composer_works").items()}
+work_to_composer = {w: next(iter(composers)) for w, composers in views.table("work_composers").items()}
 
-# === 2. ROWCLASS–WORK Beziehungen ===
+# 2. ROWCLASS–WORK (direkt oder über eingebettete Blank Nodes aufgelöst)
 rowclass_to_work = {}
-for rowclass, _, work in g.triples((None, mhg.actualizedIn, None)):
-    rowclass_to_work[rowclass] = work
+for work, rowclasses in views.table("work_rowclasses").items():
+    for rowclass in rowclasses:
+        rowclass_to_work[rowclass] = work
 
-# === 3. ROWFORM–ROWCLASS & ROWFORM–WORK Beziehungen ===
+# 3. ROWFORM–ROWCLASS & ROWFORM–WORK
 rowform_to_rowclass = {}
-rowform_to_work = {}
-
-for rowform, _, rowclass in g.triples((None, mhg.hasRowClass, None)):
-    rowform_to_rowclass[rowform] = rowclass
+for rowclass, rowforms in views.table("rowclass_rowforms").items():
+    for rowform in rowforms:
+        rowform_to_rowclass[rowform] = rowclass
 
-for rowform, _, anon in g.triples((None, mhg.manifestedIn, None)):
-    # Suche nach eingebettetem Blank Node, der auf ein Werk verweist
-    for _, _, work in g.triples((anon, mhg.manifestedIn, None)):
+rowform_to_work = {}
+for rowform, works in views.table("rowform_works").items():
+    for work in works:
         rowform_to_work[rowform] = work
 
 # === PRÜFUNGEN ===
@@ -1,21 +1,21 @@
-import re
 import sys
 
+from ttl_blocks import iter_file_blocks
+
 def count_rowclass_triples(ttl_file):
     """
     Zählt alle Tripel der Form:
     <subject> a mhg:rowClass .
     """
 
-    pattern = re.compile(r"\b[a-zA-Z0-9_]+:\S*\s+a\s+mhg:rowClass\b")
     count = 0
     matches = []
 
-    with open(ttl_file, "r", encoding="utf-8") as f:
-        for i, line in enumerate(f, 1):
-            if pattern.search(line):
-                count += 1
-                matches.append((i, line.strip()))
+    for block in iter_file_blocks(ttl_file):
+        if block.kind == "statement" and "mhg:rowClass" in block.types():
+            count += 1
+            if len(matches) < 5:
+                matches.append((block.line, block.text.split("\n", 1)[0].strip()))
 
     print(f"✅ Datei: {ttl_file}")
     print(f"📊 Gefundene Tripel vom Typ 'a mhg:rowClass': {count}")
@@ -1,7 +1,8 @@
-import re
 import sys
 from collections import defaultdict
 
+from ttl_blocks import iter_file_blocks
+
 def count_entity_types(ttl_file):
     """
     Zählt alle Tripel der Form:
@@ -18,22 +19,20 @@ def count_entity_types(ttl_file):
         "mhg:rowForm",
     ]
 
-    # Regex vorbereiten (alle Typen in einer Zeile prüfen)
-    pattern = re.compile(
-        r"\b[a-zA-Z0-9_]+:\S*\s+a\s+(mhg:(?:composer|composition|compositionPart|rowClass|rowForm))\b"
-    )
-
+    wanted = set(types_to_count)
     counts = defaultdict(int)
     examples = defaultdict(list)
 
-    with open(ttl_file, "r", encoding="utf-8") as f:
-        for i, line in enumerate(f, 1):
-            match = pattern.search(line)
-            if match:
-                t = match.group(1)
+    # Blockweise streamen (ttl_blocks.py): erfasst auch Typen in
+    # Objektlisten ("a mhg:composition, frbr:work") und mehrzeilige Blöcke
+    for block in iter_file_blocks(ttl_file):
+        if block.kind != "statement":
+            continue
+        for t in block.types():
+            if t in wanted:
                 counts[t] += 1
                 if len(examples[t]) < 5:
-                    examples[t].append((i, line.strip()))
+                    examples[t].append((block.line, block.text.split("\n", 1)[0].strip()))
 
     print(f"✅ Datei: {ttl_file}")
     print("=" * 60)
@@ -3,7 +3,8 @@
 """
 Erzeugt RDF/Turtle mit Deduplikation:
 - Jede RowClass nur einmal (lexikographisch kleinste Reihe)
-- 48 RowForms folgen direkt unter der jeweiligen RowClass
+- 48 RowForms folgen direkt unter der jeweiligen RowClass; bei symmetrischen
+  Reihen zusammenfallende Formen nur einmal, mit allen Labels (mhg:formLabel)
 - Nur RowForm == "OriginalP" erhält mhg:manifestedIn
 """
 
@@ -11,6 +12,10 @@ import json, re
 from pathlib import Path
 from collections import defaultdict
 
+from packed_rows import pack_name
+from RowFormGenerator import (FORM_GROUPS, distinct_forms, format_form_labels, format_row_names,
+                              generate_row_forms_batch, parse_interval_patterns)
+
 INPUT = Path("output.json")
 OUTPUT = Path("rows_rowclasses7.ttl")
 
@@ -45,7 +50,7 @@ with open(INPUT, "r", encoding="utf-8") as f:
 
 # Strukturen
 rowclasses = {}
-rowforms = defaultdict(lambda: {"rowclass": None, "works": set(), "sources": set(), "is_original": False})
+rowforms = defaultdict(lambda: {"rowclass": None, "labels": [], "works": set(), "sources": set(), "is_original": False})
 
 # --- Verarbeitung ---
 for key, entry in data.items():
@@ -62,23 +67,26 @@ for key, entry in data.items():
         continue
 
     # lexikographisch kleinste Intervallreihe numerisch bestimmen
-    def pattern_key(p): return tuple(map(int, p.replace("mhg:", "").split("_")))
-    smallest = sorted(sorted_patterns, key=pattern_key)[0]
-
-    all_forms = entry.get("All48Forms", [])
-    grouped = {"P": all_forms[0:12], "I": all_forms[12:24],
-               "R": all_forms[24:36], "RI": all_forms[36:48]}
-
-    rc_entry = rowclasses.setdefault(
-        smallest, {"works": set(), "grouped": grouped, "patterns": sorted_patterns}
-    )
+    # (gepackter Schlüssel, siehe packed_rows.py: Zahlenordnung = lexikographische Ordnung)
+    smallest = min(sorted_patterns, key=pack_name)
+
+    rc_entry = rowclasses.get(smallest)
+    if rc_entry is None:
+        # Formen relativ zur RowClass (P0 = ihr Intervallmuster ab Ton 0), dieselbe
+        # Menge wie All48Forms; zusammenfallende Formen werden zusammengefasst
+        names = format_row_names(generate_row_forms_batch(parse_interval_patterns([smallest]))[0])
+        grouped = {label: [] for label in FORM_GROUPS}
+        for form, labels in distinct_forms([f"mhg:{n}" for n in names]):
+            grouped[labels[0].rstrip("0123456789")].append((form, labels))
+        rc_entry = rowclasses[smallest] = {"works": set(), "grouped": grouped, "patterns": sorted_patterns}
     rc_entry["works"].add(work_local)
 
     original_p = entry.get("OriginalP")
 
-    for label, forms in grouped.items():
-        for form in forms:
+    for forms in rc_entry["grouped"].values():
+        for form, labels in forms:
             rowforms[form]["rowclass"] = smallest
+            rowforms[form]["labels"] = labels
             if form == original_p:
                 rowforms[form]["is_original"] = True
                 rowforms[form]["works"].add(work_local)
@@ -106,7 +114,7 @@ for rc, info in sorted(rowclasses.items(), key=lambda x: x[0]):
         if not forms:
             continue
         lines.append(f"        # {label}-Formen")
-        for i, form in enumerate(forms):
+        for i, (form, labels) in enumerate(forms):
             sep = " ," if i < len(forms) - 1 else " ,"
             lines.append(f"        {form}{sep}")
     lines[-1] = lines[-1][:-2] + " .\n"
@@ -118,9 +126,9 @@ for rc, info in sorted(rowclasses.items(), key=lambda x: x[0]):
         if not forms:
             continue
         lines.append(f"# {label}-FORMS")
-        for form in forms:
+        for form, labels in forms:
             forminfo = rowforms[form]
-            lines.append(f"{form} a mhg:rowForm; mhg:hasRowClass {rc} .")
+            lines.append(f"{form} a mhg:rowForm; mhg:hasRowClass {rc}; mhg:formLabel {format_form_labels(labels)} .")
             if forminfo["is_original"] and forminfo["works"]:
                 works_str = " ,\n            ".join(f"mhg:{w}" for w in sorted(forminfo["works"]))
                 lines.append(f"{form} mhg:manifestedIn [")
@@ -137,5 +145,7 @@ OUTPUT.write_text("\n".join(lines), encoding="utf-8")
 num_rc = len(rowclasses)
 num_rf = len(rowforms)
 num_manifested = sum(1 for v in rowforms.values() if v["is_original"])
+num_merged = 48 * num_rc - num_rf
 print(f"✅ TTL-Datei erzeugt: {OUTPUT}")
 print(f"→ {num_rc} RowClasses, {num_rf} RowForms (davon {num_manifested} mit manifestedIn)")
+print(f"→ {num_merged} zusammenfallende Formen symmetrischer Reihen zusammengefasst")
@@ -2,79 +2,34 @@ import json
 import re
 from datetime import datetime
 
+from date_checker import is_valid_xsd_date
+from ttl_block_index import BlockIndex, sync_derived
+from ttl_blocks import iri_value, iter_blocks, literal_lexical
+
+INPUT_TTL = 'composers_interim.ttl'
+OUTPUT_TTL = 'composers_updated.ttl'
+
+def _literal_or_none(token):
+    return literal_lexical(token) if token and token[0] in "\"'" else None
+
+def _iri_or_none(token):
+    return iri_value(token) if token and token.startswith('<') else None
+
 def parse_ttl_block(block):
-    """Parst einen TTL-Block und extrahiert die relevanten Informationen."""
+    """Extrahiert die relevanten Informationen aus einem TurtleBlock (siehe ttl_blocks.py)."""
     data = {
-        'subject': None,
-        'name': None,
-        'sameAs': [],
-        'birthDate': None,
-        'birthPlace': None,
-        'deathDate': None,
-        'deathPlace': None,
-        'raw_lines': block.split('\n'),
-        'has_birthDate': False,
-        'has_birthPlace': False,
-        'has_deathDate': False,
-        'has_deathPlace': False,
-        'has_sameAs': False
+        'subject': block.subject,
+        'name': _literal_or_none(block.first('schema:name')),
+        'sameAs': [iri_value(o) for o in block.objects('schema:sameAs') if o.startswith('<')],
+        'birthDate': _literal_or_none(block.first('schema:birthDate')),
+        'birthPlace': _iri_or_none(block.first('schema:birthPlace')),
+        'deathDate': _literal_or_none(block.first('schema:deathDate')),
+        'deathPlace': _iri_or_none(block.first('schema:deathPlace')),
+        'raw_lines': block.text.rstrip('\n').split('\n'),
     }
-    
-    # Subjekt extrahieren (z.B. mhg:TheodorWiesengrundAdorno)
-    subject_match = re.search(r'^(mhg:\w+)\s+a', block)
-    if subject_match:
-        data['subject'] = subject_match.group(1)
-    
-    # Name extrahieren
-    name_match = re.search(r'schema:name\s+"([^"]+)"', block)
-    if name_match:
-        data['name'] = name_match.group(1)
-    
-    # sameAs Links extrahieren - verbesserte Erkennung für mehrzeilige sameAs
-    sameas_lines = []
-    in_sameas = False
-    for line in block.split('\n'):
-        stripped = line.strip()
-        if 'schema:sameAs' in stripped and not stripped.startswith('#'):
-            in_sameas = True
-            sameas_lines.append(line)
-        elif in_sameas:
-            if stripped and (stripped.startswith('<') or stripped.startswith(',')):
-                sameas_lines.append(line)
-            else:
-                in_sameas = False
-    
-    # URLs aus sameAs-Zeilen extrahieren
-    if sameas_lines:
-        sameas_content = ' '.join(sameas_lines)
-        url_pattern = r'<([^>]+)>'
-        data['sameAs'] = re.findall(url_pattern, sameas_content)
-        data['has_sameAs'] = len(data['sameAs']) > 0
-    
-    # Geburtsdatum extrahieren und prüfen ob vorhanden
-    birthdate_match = re.search(r'schema:birthDate\s+"([^"]+)"', block)
-    if birthdate_match:
-        data['birthDate'] = birthdate_match.group(1)
-        data['has_birthDate'] = True
-    
-    # Geburtsort extrahieren und prüfen ob vorhanden
-    birthplace_match = re.search(r'schema:birthPlace\s+<([^>]+)>', block)
-    if birthplace_match:
-        data['birthPlace'] = birthplace_match.group(1)
-        data['has_birthPlace'] = True
-    
-    # Sterbedatum extrahieren und prüfen ob vorhanden
-    deathdate_match = re.search(r'schema:deathDate\s+"([^"]+)"', block)
-    if deathdate_match:
-        data['deathDate'] = deathdate_match.group(1)
-        data['has_deathDate'] = True
-    
-    # Sterbeort extrahieren und prüfen ob vorhanden
-    deathplace_match = re.search(r'schema:deathPlace\s+<([^>]+)>', block)
-    if deathplace_match:
-        data['deathPlace'] = deathplace_match.group(1)
-        data['has_deathPlace'] = True
-    
+    data['has_sameAs'] = len(data['sameAs']) > 0
+    for key in ('birthDate', 'birthPlace', 'deathDate', 'deathPlace'):
+        data[f'has_{key}'] = data[key] is not None
     return data
 
 def convert_ttl_name_to_json_format(ttl_name):
@@ -85,10 +40,21 @@ def convert_ttl_name_to_json_format(ttl_name):
     return ttl_name
 
 def format_date_for_ttl(json_date):
-    """Formatiert JSON-Datum für TTL (entfernt Zeitanteil und fügt Datentyp hinzu)"""
-    if json_date and 'T' in json_date:
-        return json_date.split('T')[0] + '"^^xsd:date'
-    return json_date
+    """
+    Formatiert JSON-Datum für TTL ab dem Inhalt des Literals, d. h. inklusive
+    schließendem Anführungszeichen: gültige Daten (Zeitanteil entfernt) als
+    xsd:date, alles andere ("1874", "ca. 1900") als ungetyptes Literal
+    """
+    if not json_date:
+        return json_date
+    date = json_date.split('T')[0]
+    if is_valid_xsd_date(date):
+        return date + '"^^xsd:date'
+    return json_date + '"'
+
+def date_lexical(formatted_date):
+    """Inhalt eines von format_date_for_ttl formatierten Datums"""
+    return formatted_date.split('"', 1)[0]
 
 def remove_placeholder_comments(lines):
     """Entfernt Platzhalter-Kommentare wie # schema:birthDate "YYYY-MM-DD" ;"""
@@ -214,12 +180,12 @@ def update_ttl_block(block_data, json_entry):
     # birthDate
     if json_entry.get('birthDate'):
         formatted_date = format_date_for_ttl(json_entry['birthDate'])
-        if block_data.get('birthDate') and block_data['birthDate'] != formatted_date.replace('"^^xsd:date', ''):
-            new_properties.append((f'    # ORIGINAL: schema:birthDate "{block_data["birthDate"]}"^^xsd:date ;\n    schema:birthDate "{formatted_date}" ;', 'birthDate'))
+        if block_data.get('birthDate') and block_data['birthDate'] != date_lexical(formatted_date):
+            new_properties.append((f'    # ORIGINAL: schema:birthDate "{block_data["birthDate"]}"^^xsd:date ;\n    schema:birthDate "{formatted_date} ;', 'birthDate'))
             changes.append(f"Updated birthDate from {block_data['birthDate']} to {formatted_date}")
             lines = remove_existing_property(lines, 'schema:birthDate')
         elif not block_data.get('birthDate'):
-            new_properties.append((f'    schema:birthDate "{formatted_date}" ;', 'birthDate'))
+            new_properties.append((f'    schema:birthDate "{formatted_date} ;', 'birthDate'))
             changes.append(f"Added birthDate: {formatted_date}")
     
     # birthPlace
@@ -235,12 +201,12 @@ def update_ttl_block(block_data, json_entry):
     # deathDate
     if json_entry.get('deathDate'):
         formatted_date = format_date_for_ttl(json_entry['deathDate'])
-        if block_data.get('deathDate') and block_data['deathDate'] != formatted_date.replace('"^^xsd:date', ''):
-            new_properties.append((f'    # ORIGINAL: schema:deathDate "{block_data["deathDate"]}"^^xsd:date ;\n    schema:deathDate "{formatted_date}" ;', 'deathDate'))
+        if block_data.get('deathDate') and block_data['deathDate'] != date_lexical(formatted_date):
+            new_properties.append((f'    # ORIGINAL: schema:deathDate "{block_data["deathDate"]}"^^xsd:date ;\n    schema:deathDate "{formatted_date} ;', 'deathDate'))
             changes.append(f"Updated deathDate from {block_data['deathDate']} to {formatted_date}")
             lines = remove_existing_property(lines, 'schema:deathDate')
         elif not block_data.get('deathDate'):
-            new_properties.append((f'    schema:deathDate "{formatted_date}" ;', 'deathDate'))
+            new_properties.append((f'    schema:deathDate "{formatted_date} ;', 'deathDate'))
             changes.append(f"Added deathDate: {formatted_date}")
     
     # deathPlace
@@ -289,103 +255,106 @@ def main():
     with open('query_Wikidata.json', 'r', encoding='utf-8') as f:
         json_data = json.load(f)
     
-    # Lade TTL-Datei
-    with open('composers_interim.ttl', 'r', encoding='utf-8') as f:
-        ttl_content = f.read()
-    
     # Erstelle Mapping von JSON-Namen zu Einträgen
     json_mapping = {}
     for entry in json_data:
         json_mapping[entry['personLabel']] = entry
     
-    # Zerlege TTL in Blöcke
-    ttl_blocks = re.split(r'\n\n+', ttl_content)
-    updated_blocks = []
+    block_count = 0
     total_changes = []
+    updated_blocks = {}  # Subjekt -> {Start-Offset: neuer Blocktext}
     
     print("Überprüfe und aktualisiere TTL-Einträge...")
     print("=" * 60)
     
-    for block in ttl_blocks:
-        if not block.strip() or not block.startswith('mhg:'):
-            updated_blocks.append(block)
-            continue
-        
-        block_data = parse_ttl_block(block)
-        
-        if not block_data['name']:
-            updated_blocks.append(block)
-            continue
-        
-        # Konvertiere TTL-Name zu JSON-Format
-        json_format_name = convert_ttl_name_to_json_format(block_data['name'])
-        
-        # Prüfe ob ein Match in JSON existiert
-        if json_format_name in json_mapping:
-            json_entry = json_mapping[json_format_name]
+    # TTL blockweise streamen (ttl_blocks.py); geänderte Blöcke werden gesammelt
+    # und am Ende per Block-Index (ttl_block_index.py) in die Ausgabe gepatcht
+    with open(INPUT_TTL, 'rb') as src:
+        for block in iter_blocks(src):
+            block_count += 1
+            if block.kind != 'statement' or not block.subject.startswith('mhg:'):
+                continue
+            
+            block_data = parse_ttl_block(block)
             
-            print(f"\nGefunden: {block_data['subject']}")
-            print(f"  Match: '{block_data['name']}' -> '{json_format_name}'")
+            if not block_data['name']:
+                continue
             
-            # Zeige vorhandene und fehlende Properties an
-            existing = []
-            missing = []
+            # Konvertiere TTL-Name zu JSON-Format
+            json_format_name = convert_ttl_name_to_json_format(block_data['name'])
             
-            if block_data['has_sameAs']:
-                existing.append("sameAs")
-            elif json_entry.get('person'):
-                missing.append("sameAs")
+            # Prüfe ob ein Match in JSON existiert
+            if json_format_name in json_mapping:
+                json_entry = json_mapping[json_format_name]
                 
-            if block_data['has_birthDate']:
-                existing.append("birthDate")
-            elif json_entry.get('birthDate'):
-                missing.append("birthDate")
+                print(f"\nGefunden: {block_data['subject']}")
+                print(f"  Match: '{block_data['name']}' -> '{json_format_name}'")
                 
-            if block_data['has_birthPlace']:
-                existing.append("birthPlace")
-            elif json_entry.get('birthPlace'):
-                missing.append("birthPlace")
+                # Zeige vorhandene und fehlende Properties an
+                existing = []
+                missing = []
                 
-            if block_data['has_deathDate']:
-                existing.append("deathDate")
-            elif json_entry.get('deathDate'):
-                missing.append("deathDate")
+                if block_data['has_sameAs']:
+                    existing.append("sameAs")
+                elif json_entry.get('person'):
+                    missing.append("sameAs")
+                    
+                if block_data['has_birthDate']:
+                    existing.append("birthDate")
+                elif json_entry.get('birthDate'):
+                    missing.append("birthDate")
+                    
+                if block_data['has_birthPlace']:
+                    existing.append("birthPlace")
+                elif json_entry.get('birthPlace'):
+                    missing.append("birthPlace")
+                    
+                if block_data['has_deathDate']:
+                    existing.append("deathDate")
+                elif json_entry.get('deathDate'):
+                    missing.append("deathDate")
+                    
+                if block_data['has_deathPlace']:
+                    existing.append("deathPlace")
+                elif json_entry.get('deathPlace'):
+                    missing.append("deathPlace")
                 
-            if block_data['has_deathPlace']:
-                existing.append("deathPlace")
-            elif json_entry.get('deathPlace'):
-                missing.append("deathPlace")
-            
-            if existing:
-                print(f"  Vorhanden: {', '.join(existing)}")
-            if missing:
-                print(f"  Fehlend: {', '.join(missing)}")
-            
-            # Aktualisiere den Block
-            updated_block, changes = update_ttl_block(block_data, json_entry)
-            
-            if changes:
-                print(f"  Änderungen:")
-                for change in changes:
-                    print(f"    - {change}")
-                total_changes.extend([(block_data['subject'], change) for change in changes])
+                if existing:
+                    print(f"  Vorhanden: {', '.join(existing)}")
+                if missing:
+                    print(f"  Fehlend: {', '.join(missing)}")
+                
+                # Aktualisiere den Block
+                updated_block, changes = update_ttl_block(block_data, json_entry)
+                
+                if changes:
+                    print(f"  Änderungen:")
+                    for change in changes:
+                        print(f"    - {change}")
+                    total_changes.extend([(block_data['subject'], change) for change in changes])
+                else:
+                    print(f"  ✓ Keine Änderungen notwendig")
+                
+                new_text = updated_block + block.text[len(block.text.rstrip('\n')):]
+                if new_text != block.text:
+                    updated_blocks.setdefault(block.subject, {})[block.start] = new_text
             else:
-                print(f"  ✓ Keine Änderungen notwendig")
-            
-            updated_blocks.append(updated_block)
-        else:
-            updated_blocks.append(block)
-            print(f"\nKein Match: {block_data['subject']} ('{block_data['name']}')")
+                print(f"\nKein Match: {block_data['subject']} ('{block_data['name']}')")
     
-    # Schreibe aktualisierte TTL-Datei
-    with open('composers_updated.ttl', 'w', encoding='utf-8') as f:
-        f.write('\n\n'.join(updated_blocks))
+    # Nur abweichende Blöcke schreiben (Ausgabe = Eingabe + aktualisierte Blöcke)
+    index = BlockIndex.open(INPUT_TTL)
+    patches = {
+        subject: index.read(subject, replace=by_start)
+        for subject, by_start in updated_blocks.items()
+    }
+    n_written, n_bytes = sync_derived(INPUT_TTL, OUTPUT_TTL, patches)
     
     # Zusammenfassung
     print("\n" + "=" * 60)
     print("ZUSAMMENFASSUNG:")
-    print(f"Anzahl durchgehörter Blöcke: {len(ttl_blocks)}")
+    print(f"Anzahl durchgehörter Blöcke: {block_count}")
     print(f"Anzahl durchgeführter Änderungen: {len(total_changes)}")
+    print(f"In {OUTPUT_TTL} geschriebene Blöcke: {n_written} ({n_bytes} Bytes)")
     
     if total_changes:
         print("\nDetails der Änderungen:")
@@ -1,5 +1,16 @@
 #Python 3.10.5 (tags/v3.10.5:f377153, Jun  6 2022, 16:14:13) [MSC v.1929 64 bit (AMD64)] on win32
 #Type "help", "copyright", "credits" or "license()" for more information.
+import sys
+
+import numpy as np
+
+from packed_rows import ROW_LENGTH, forms48, pack, rows_from_intervals, unpack
+
+FORM_GROUPS = ("P", "I", "R", "RI")
+FORM_LABELS = tuple(f"{group}{n}" for group in FORM_GROUPS for n in range(12))
+TTL_PREFIXES = "@prefix mhg: <http://music-history-graph.ch/twelve-tone-onto#> .\n\n"
+_TOKENS = np.array([str(n) for n in range(12)])
+
 def generate_row_forms(interval_pattern):
     """
     Generiert alle 48 RowForms basierend auf einem Intervallmuster
@@ -61,52 +72,138 @@ def generate_ttl_output(interval_pattern, prime_forms, inversion_forms, retrogra
     # RI-Intervallmuster (umgekehrt und negiert)
     ri_pattern = '_'.join(str((-int(x)) % 12) for x in reversed(intervals))
     
+    row_names = [format_row_name(row) for row in
+                 prime_forms + inversion_forms + retrograde_forms + retrograde_inversion_forms]
+    return format_ttl_block((p_pattern, i_pattern, r_pattern, ri_pattern), row_names)
+
+def distinct_forms(row_names):
+    """
+    Fasst zusammenfallende Formen symmetrischer Reihen zusammen (z. B. R6 = P0
+    bei krebssymmetrischen Reihen): Liste von (RowForm-Name, [Labels]) in der
+    Reihenfolge des ersten Auftretens unter P0-P11, I0-I11, R0-R11, RI0-RI11
+    """
+    labels = {}
+    for row_name, label in zip(row_names, FORM_LABELS):
+        labels.setdefault(row_name, []).append(label)
+    return list(labels.items())
+
+def form_group(label):
+    """Gruppe eines Labels ("RI11" -> "RI")"""
+    return label.rstrip("0123456789")
+
+def format_form_labels(labels):
+    return ", ".join(f'"{label}"' for label in labels)
+
+def format_ttl_block(patterns, row_names):
+    """
+    TTL-Block einer RowClass aus ihren vier Intervallmustern (P, I, R, RI)
+    und den 48 RowForm-Namen (P0-P11, I0-I11, R0-R11, RI0-RI11). Jede
+    verschiedene RowForm erscheint einmal, mit allen ihren Labels
+    (mhg:formLabel); bei symmetrischen Reihen sind das weniger als 48.
+    """
+    p_pattern = patterns[0]
+    forms = distinct_forms(row_names)
     output = []
-    output.append(f"# P: {p_pattern}")
-    output.append(f"# I: {i_pattern}")
-    output.append(f"# R: {r_pattern}")
-    output.append(f"# RI: {ri_pattern}")
+    for label, pattern in zip(FORM_GROUPS, patterns):
+        output.append(f"# {label}: {pattern}")
     output.append(f"mhg:{p_pattern} a mhg:rowClass ;")
     output.append("    mhg:hasRowForm")
     
-    # P-Forms
-    output.append("        # P-Forms (0-11)")
-    for i, row in enumerate(prime_forms):
-        prefix = "        " if i == 0 else "        "
-        suffix = "," if i < 11 else " ,"
-        output.append(f"{prefix}mhg:{format_row_name(row)}{suffix}")
-    
-    # I-Forms
-    output.append("        \n        # I-Forms (0-11)")
-    for i, row in enumerate(inversion_forms):
-        prefix = "        " if i == 0 else "        "
-        suffix = "," if i < 11 else " ,"
-        output.append(f"{prefix}mhg:{format_row_name(row)}{suffix}")
-    
-    # R-Forms
-    output.append("        \n        # R-Forms (0-11)")
-    for i, row in enumerate(retrograde_forms):
-        prefix = "        " if i == 0 else "        "
-        suffix = "," if i < 11 else " ,"
-        output.append(f"{prefix}mhg:{format_row_name(row)}{suffix}")
-    
-    # RI-Forms
-    output.append("        \n        # RI-Forms (0-11)")
-    for i, row in enumerate(retrograde_inversion_forms):
-        prefix = "        " if i == 0 else "        "
-        suffix = "," if i < 11 else " ."
-        output.append(f"{prefix}mhg:{format_row_name(row)}{suffix}")
+    # Jede Form unter der Gruppe ihres ersten Labels; leere Gruppen entfallen.
+    # Der Kopf nennt die Stufen, die in der Gruppe tatsächlich vorkommen, und
+    # die Gruppen, mit denen sie bei symmetrischen Reihen zusammenfällt.
+    groups = [[(row_name, labels) for row_name, labels in forms if form_group(labels[0]) == group]
+              for group in FORM_GROUPS]
+    for g, (label, members) in enumerate(zip(FORM_GROUPS, groups)):
+        if not members:
+            continue
+        levels = [int(labels[0][len(label):]) for _, labels in members]
+        span = "0-11" if levels == list(range(12)) else ", ".join(str(n) for n in levels)
+        merged = [other for other in FORM_GROUPS[g + 1:]
+                  if any(form_group(l) == other for _, labels in members for l in labels[1:])]
+        header = f"        # {label}-Forms ({span})" + "".join(f" = {other}-Forms" for other in merged)
+        output.append(header if g == 0 else "        \n" + header)
+        for i, (row_name, _) in enumerate(members):
+            if i < len(members) - 1:
+                suffix = ","
+            else:
+                suffix = " ." if not any(groups[g + 1:]) else " ,"
+            output.append(f"        mhg:{row_name}{suffix}")
     
     # RowForm-Deklarationen
     output.append("\n# RowForm-Deklarationen")
     
-    for row in prime_forms + inversion_forms + retrograde_forms + retrograde_inversion_forms:
-        row_name = format_row_name(row)
-        output.append(f"mhg:{row_name} a mhg:rowForm ; mhg:hasRowClass mhg:{p_pattern} .")
+    for row_name, labels in forms:
+        output.append(f"mhg:{row_name} a mhg:rowForm ; mhg:hasRowClass mhg:{p_pattern} ; "
+                      f"mhg:formLabel {format_form_labels(labels)} .")
     
     return '\n'.join(output)
 
+# --- Batch-Verarbeitung (NumPy) ---
+
+def parse_interval_patterns(patterns):
+    """Intervallmuster wie "1_3_1_6_11_5_4_2_9_2_6" als (N, 11)-uint8-Array"""
+    values = [[int(x) for x in p.replace("mhg:", "").split('_')] for p in patterns]
+    return np.array(values, dtype=np.uint8).reshape(-1, 11)
+
+def generate_row_forms_batch(intervals):
+    """
+    Generiert alle 48 RowForms für N Intervallmuster auf einmal:
+    (N, 11) -> (N, 48, 12) uint8, Reihenfolge wie generate_row_forms
+    (P0-P11, I0-I11, R0-R11, RI0-RI11, Index = Anfangston bzw. Schlusston)
+    """
+    intervals = np.asarray(intervals, dtype=np.uint8).reshape(-1, 11)
+    return unpack(forms48(rows_from_intervals(pack(intervals))), ROW_LENGTH)
+
+def format_row_names(rows):
+    """Zeilen eines (..., 12)-Arrays als Namen mit Unterstrichen (flache Liste)"""
+    tokens = _TOKENS[np.asarray(rows).reshape(-1, np.shape(rows)[-1])]
+    return ['_'.join(row) for row in tokens.tolist()]
+
+def interval_pattern_variants(intervals):
+    """(N, 11) -> (N, 4, 11): P-, I-, R- und RI-Intervallmuster"""
+    intervals = np.asarray(intervals, dtype=np.int64).reshape(-1, 11)
+    inverted = (-intervals) % 12
+    return np.stack((intervals, inverted, intervals[:, ::-1], inverted[:, ::-1]), axis=1).astype(np.uint8)
+
+def generate_ttl_batch(intervals, forms=None):
+    """
+    TTL-Blöcke für viele RowClasses auf einmal (ein Block je Intervallmuster,
+    gleiche Form wie generate_ttl_output). `intervals` ist ein (N, 11)-Array
+    oder eine Liste von Intervallmustern als Strings.
+    """
+    if len(intervals) and isinstance(intervals[0], str):
+        intervals = parse_interval_patterns(intervals)
+    intervals = np.asarray(intervals).reshape(-1, 11)
+    if forms is None:
+        forms = generate_row_forms_batch(intervals)
+    pattern_names = format_row_names(interval_pattern_variants(intervals))
+    row_names = format_row_names(forms)
+    for k in range(len(intervals)):
+        yield format_ttl_block(pattern_names[4 * k:4 * k + 4], row_names[48 * k:48 * k + 48])
+
+def write_ttl_batch(intervals, path, chunk_size=4096):
+    """Schreibt die RowClass-Schicht für alle Intervallmuster in eine TTL-Datei; gibt die Anzahl zurück"""
+    if len(intervals) and isinstance(intervals[0], str):
+        intervals = parse_interval_patterns(intervals)
+    intervals = np.asarray(intervals).reshape(-1, 11)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(TTL_PREFIXES)
+        for start in range(0, len(intervals), chunk_size):
+            for block in generate_ttl_batch(intervals[start:start + chunk_size]):
+                f.write(block)
+                f.write("\n\n")
+    return len(intervals)
+
 def main():
+    # Batch: python RowFormGenerator.py muster.txt ausgabe.ttl (ein Intervallmuster pro Zeile)
+    if len(sys.argv) > 2:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            patterns = [line.split('#', 1)[0].strip() for line in f]
+        n = write_ttl_batch([p for p in patterns if p], sys.argv[2])
+        print(f"✅ {n} RowClasses mit ihren RowForms geschrieben: {sys.argv[2]}")
+        return
+    
     # Beispiel-Intervallmuster
     interval_pattern = "1_3_1_6_11_5_4_2_9_2_6"
     
@@ -140,6 +237,8 @@ def main():
         print(f"Anzahl R-Forms: {len(retrograde_forms)}")
         print(f"Anzahl RI-Forms: {len(retrograde_inversion_forms)}")
         print(f"Gesamtanzahl RowForms: {len(prime_forms) + len(inversion_forms) + len(retrograde_forms) + len(retrograde_inversion_forms)}")
+        all_names = [format_row_name(row) for row in prime_forms + inversion_forms + retrograde_forms + retrograde_inversion_forms]
+        print(f"Verschiedene RowForms: {len(distinct_forms(all_names))}")
         
         # Beispiel der ersten RowForms jeder Kategorie
         print(f"\nBeispiel P0: {format_row_name(prime_forms[0])}")
@@ -42,9 +42,10 @@ def get_birth_death_from_wikidata(name):
                 
     except Exception as e:
         print(f"Wikidata-Abfrage für {name} fehlgeschlagen: {e}")
+    finally:
+        # nach return birth, death oder am Ende der try/except: Wikidata nicht überlasten
+        time.sleep(1.5)
     return None, None
-# ... nach return birth, death oder am Ende der try/except: 
-time.sleep(1.5)
 
 
 def normalize_name(name):
@@ -68,59 +69,62 @@ def build_creator_line(initials, works):
         [f"mhg:{initials}_{short_work_title(w)}" for w in works]
     )
 
-# === Datei laden ===
-with open("output.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
-
-# Alle Komponisten und ihre Werke sammeln
-composer_works = {}
-
-composer_works = {}
-
-for key, entry in data.items():
-    # Nur echte Werk-Einträge: Sie müssen Dicts mit "Composer" UND "Work" enthalten
-    if isinstance(entry, dict) and "Composer" in entry and "Work" in entry:
-        composer = entry["Composer"].strip()
-        work = entry["Work"].strip()
-        composer_works.setdefault(composer, []).append(work)
-    else:
-        # Debug-Ausgabe: zeigt dir, was übersprungen wird
-        print(f"⚠️  Übersprungen: {key}")
-
-    #comp = entry["Composer"].strip()
-    #work = entry["Work"].strip()
-    #composer_works.setdefault(comp, []).append(work)
-
-
-# Bestehende TTL-Datei laden (für Prefixe etc.)
-with open("Composers.ttl", "r", encoding="utf-8") as f:
-    ttl_prefix = []
-    for line in f:
-        ttl_prefix.append(line)
-        if not line.strip().startswith("@prefix"):
-            break
-    ttl_header = "".join(ttl_prefix)
-
-# === Ausgabe vorbereiten ===
-out_lines = [ttl_header, "\n# --- Ergänzte Komponisten ---\n\n"]
-
-for composer, works in sorted(composer_works.items()):
-    first, last, initials, safe = normalize_name(composer)
-    creators = build_creator_line(initials, works)
-
-    birth, death = get_birth_death_from_wikidata(composer)
-
-    if birth:
-        birth_line = f'schema:birthDate "{birth}" ;'
-    else:
-        birth_line = '# schema:birthDate "YYYY-MM-DD" ;'
-
-    if death:
-        death_line = f'schema:deathDate "{death}" ;'
-    else:
-        death_line = '# schema:deathDate "YYYY-MM-DD" ;'
-
-    block = f"""mhg:{safe} a mhg:composer ;
+def enrich_composers(json_file="output.json", composers_ttl="Composers.ttl",
+                     out_file="Composers_updated_with_multiple_works.ttl"):
+    """Erzeugt Komponistenblöcke mit Werken und Lebensdaten aus Wikidata."""
+    # === Datei laden ===
+    with open(json_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    # Alle Komponisten und ihre Werke sammeln
+    composer_works = {}
+
+    composer_works = {}
+
+    for key, entry in data.items():
+        # Nur echte Werk-Einträge: Sie müssen Dicts mit "Composer" UND "Work" enthalten
+        if isinstance(entry, dict) and "Composer" in entry and "Work" in entry:
+            composer = entry["Composer"].strip()
+            work = entry["Work"].strip()
+            composer_works.setdefault(composer, []).append(work)
+        else:
+            # Debug-Ausgabe: zeigt dir, was übersprungen wird
+            print(f"⚠️  Übersprungen: {key}")
+
+        #comp = entry["Composer"].strip()
+        #work = entry["Work"].strip()
+        #composer_works.setdefault(comp, []).append(work)
+
+
+    # Bestehende TTL-Datei laden (für Prefixe etc.)
+    with open(composers_ttl, "r", encoding="utf-8") as f:
+        ttl_prefix = []
+        for line in f:
+            ttl_prefix.append(line)
+            if not line.strip().startswith("@prefix"):
+                break
+        ttl_header = "".join(ttl_prefix)
+
+    # === Ausgabe vorbereiten ===
+    out_lines = [ttl_header, "\n# --- Ergänzte Komponisten ---\n\n"]
+
+    for composer, works in sorted(composer_works.items()):
+        first, last, initials, safe = normalize_name(composer)
+        creators = build_creator_line(initials, works)
+
+        birth, death = get_birth_death_from_wikidata(composer)
+
+        if birth:
+            birth_line = f'schema:birthDate "{birth}" ;'
+        else:
+            birth_line = '# schema:birthDate "YYYY-MM-DD" ;'
+
+        if death:
+            death_line = f'schema:deathDate "{death}" ;'
+        else:
+            death_line = '# schema:deathDate "YYYY-MM-DD" ;'
+
+        block = f"""mhg:{safe} a mhg:composer ;
         frbr:creatorOf {creators} ;
         schema:name "{composer}" ;
         {birth_line}
@@ -129,23 +133,22 @@ for composer, works in sorted(composer_works.items()):
         # schema:sameAs <...> .
 
     """
-    out_lines.append(block)
-
-for i, (composer, works) in enumerate(sorted(composer_works.items()), 1):
-    print(f"[{i}/{len(composer_works)}] {composer} ...")
-    ...
-
-print("Anzahl erzeugter Komponistenblöcke:", len(out_lines))
+        out_lines.append(block)
 
-# === Datei schreiben ===
-# === Datei schreiben ===
-out_file = "Composers_updated_with_multiple_works.ttl"
-with open(out_file, "w", encoding="utf-8") as f:
-    f.writelines(out_lines)
+    for i, (composer, works) in enumerate(sorted(composer_works.items()), 1):
+        print(f"[{i}/{len(composer_works)}] {composer} ...")
+        ...
 
-print(f"✅ Datei erzeugt: {out_file} ({len(composer_works)} Komponisten)")
-print("Beispielauszug:\n", "".join(out_lines[:5]))
+    print("Anzahl erzeugter Komponistenblöcke:", len(out_lines))
 
+    # === Datei schreiben ===
+    # === Datei schreiben ===
+    with open(out_file, "w", encoding="utf-8") as f:
+        f.writelines(out_lines)
 
+    print(f"✅ Datei erzeugt: {out_file} ({len(composer_works)} Komponisten)")
+    print("Beispielauszug:\n", "".join(out_lines[:5]))
 
 
+if __name__ == "__main__":
+    enrich_composers()
@@ -0,0 +1,262 @@
+"""
+Asynchrone Abfrageschicht (asyncio) über einem unveränderlichen Graph-Snapshot.
+
+Für das Web-Frontend (vis-network / tom-select in lib/), das viele
+Nachbarschafts-, Verbindungs- und Suchanfragen gleichzeitig stellt:
+
+  - Snapshot: Beim Start wird der memory-mapped Index zur aktuellen
+    TTL-Datei festgehalten (siehe triple_index_file.py und
+    graph_cache.pin_index). Alle Worker öffnen genau diese Datei nur lesend
+    und teilen sich ihre Seiten; spätere Änderungen an der TTL-Datei
+    betreffen eine laufende Instanz nicht, und der Index wird erst nach
+    close() wieder zum Aufräumen freigegeben.
+  - Worker-Pool: Traversierungen laufen in einem Prozesspool, die
+    Ereignisschleife bleibt frei. Jeder Worker baut CSR-Adjazenz und
+    Namensliste (rdfs:label und schema:name) einmal beim ersten Bedarf auf.
+  - Zusammenlegen: Gleiche Anfragen, die gleichzeitig laufen, werden nur
+    einmal berechnet; alle Aufrufer erhalten dasselbe Ergebnis.
+  - Latenz-Histogramme je Operation (Ende-zu-Ende aus Sicht des Aufrufers).
+
+Verwendung:
+    import asyncio
+    from async_queries import AsyncGraphQueries
+
+    async def main():
+        async with AsyncGraphQueries("MusicHistoryGraph_TwelveToneMusic_Complete.ttl") as q:
+            sub, treffer = await asyncio.gather(
+                q.neighbourhood([mhg.AlbanBerg], depth=1, skip_predicates=[RDF.type]),
+                q.search("Lulu"))
+            print(q.latency_report())
+
+    asyncio.run(main())
+"""
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from rdflib import RDF, RDFS, Graph, Namespace
+
+from graph_cache import file_digest, index_path_for, load_graph, pack_triples, pin_index, unpack_term, \
+    unpack_triples
+
+schema = Namespace("https://schema.org/")
+
+# Obere Grenzen der Histogramm-Klassen in Millisekunden (darüber: Überlauf)
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+SEARCH_LIMIT = 20
+# Prädikate, deren Werte die Suche durchsucht
+NAME_PREDICATES = (RDFS.label, schema.name)
+
+
+class LatencyHistogram:
+    """Latenzen in festen Klassen (BUCKETS_MS) mit Anzahl, Summe und Quantil-Schätzung."""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, seconds):
+        ms = seconds * 1000
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+
+    def quantile(self, q):
+        """Obere Klassengrenze, unter der der Anteil `q` der Anfragen liegt (inf bei Überlauf)."""
+        if not self.count:
+            return None
+        needed, seen = q * self.count, 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= needed:
+                return bound
+        return float("inf")
+
+    def as_dict(self):
+        labels = [f"<={b}ms" for b in self.buckets] + [f">{self.buckets[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+# --- Worker-Seite -------------------------------------------------------------
+
+_worker = None
+
+
+class _SnapshotWorker:
+    """Der geöffnete Snapshot eines Workers mit bei Bedarf aufgebauten Hilfsstrukturen."""
+
+    def __init__(self, index_path):
+        from triple_index_file import open_index
+        self.graph = open_index(index_path)
+        self._adjacency = None
+        self._labels = None
+
+    @property
+    def adjacency(self):
+        if self._adjacency is None:
+            from graph_csr import CSRAdjacency
+            self._adjacency = CSRAdjacency.from_graph(self.graph)
+        return self._adjacency
+
+    @property
+    def labels(self):
+        """(Kleinbuchstaben-Name, Name, Entität) aller Werte von NAME_PREDICATES, nach Name sortiert."""
+        if self._labels is None:
+            self._labels = sorted({(str(label).lower(), str(label), entity)
+                                   for predicate in NAME_PREDICATES
+                                   for entity, label in self.graph.subject_objects(predicate)})
+        return self._labels
+
+    def pack(self, s, p, o):
+        term = self.adjacency.store.terms.term
+        return pack_triples((term(a), term(b), term(c)) for a, b, c in zip(s.tolist(), p.tolist(), o.tolist()))
+
+
+def _open_snapshot(index_path):
+    global _worker
+    _worker = _SnapshotWorker(index_path)
+
+
+def _neighbourhood(starts, depth, skip_predicates, blank_nodes):
+    s, p, o = _worker.adjacency.k_hop(list(starts), depth, list(skip_predicates), blank_nodes)
+    return _worker.pack(s, p, o)
+
+
+def _connect(source, target, k, predicates, max_length):
+    from connection_paths import find_connections
+    paths, sub = find_connections(_worker.graph, source, target, k=k,
+                                  predicates=None if predicates is None else list(predicates),
+                                  max_length=max_length, adjacency=_worker.adjacency)
+    return paths, pack_triples(sub)
+
+
+def _search(text, limit):
+    needle = text.lower()
+    prefix, contains = [], []
+    for lower, label, entity in _worker.labels:
+        if needle in lower:
+            (prefix if lower.startswith(needle) else contains).append((entity, label))
+            if len(prefix) >= limit:
+                break
+    return (prefix + contains)[:limit]
+
+
+OPERATIONS = {
+    "neighbourhood": _neighbourhood,
+    "connect": _connect,
+    "search": _search,
+}
+
+
+def _call(op, args):
+    return OPERATIONS[op](*args)
+
+
+# --- Ereignisschleife ---------------------------------------------------------
+
+def _unpack_graph(packed, namespaces):
+    terms, id_bytes = packed
+    terms = [unpack_term(enc) for enc in terms]
+    sub = Graph()
+    for prefix, ns in namespaces:
+        sub.bind(prefix, ns)
+    sub.addN((s, p, o, sub) for s, p, o in unpack_triples(terms, id_bytes))
+    return sub
+
+
+class AsyncGraphQueries:
+    """
+    Nebenläufige Lesezugriffe auf einen festen Snapshot einer TTL-Datei.
+    `workers=0` rechnet in einem einzelnen Thread des Hauptprozesses.
+    """
+
+    def __init__(self, ttl_file, workers=None):
+        # Index festhalten und einmal im Hauptprozess anlegen, bevor die Worker ihn öffnen
+        while True:
+            self.version = file_digest(ttl_file)
+            self.index_path = index_path_for(ttl_file, self.version)
+            self._pin = pin_index(self.index_path)
+            g = load_graph(ttl_file, store="mmap")
+            if self.index_path.exists():
+                break
+            # Datei während des Ladens geändert: mit dem neuen Stand noch einmal
+            self._pin.unlink(missing_ok=True)
+        self.namespaces = list(g.namespaces())
+        if workers == 0:
+            self._executor = ThreadPoolExecutor(max_workers=1, initializer=_open_snapshot,
+                                                initargs=(self.index_path,))
+        else:
+            self._executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                                 initializer=_open_snapshot, initargs=(self.index_path,))
+        self._inflight = {}
+        self.latency = {op: LatencyHistogram() for op in OPERATIONS}
+        self.coalesced = 0
+
+    async def _run(self, op, *args):
+        """Führt `op` im Pool aus; eine gleiche, noch laufende Anfrage wird mitbenutzt."""
+        key = (op, args)
+        started = time.perf_counter()
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self._executor, _call, op, args)
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        try:
+            # shield: bricht ein Aufrufer ab, bleibt die Anfrage für die anderen bestehen
+            return await asyncio.shield(future)
+        finally:
+            self.latency[op].observe(time.perf_counter() - started)
+
+    async def neighbourhood(self, starts, depth=1, skip_predicates=(RDF.type,), blank_nodes=False):
+        """k-Hop-Nachbarschaft (wie graph_csr.k_hop_subgraph) als rdflib-Graph."""
+        packed = await self._run("neighbourhood", tuple(sorted(set(starts))), depth,
+                                 tuple(sorted(set(skip_predicates))), bool(blank_nodes))
+        return _unpack_graph(packed, self.namespaces)
+
+    async def connect(self, source, target, k=3, predicates=None, max_length=10):
+        """Die k kürzesten Verbindungen (wie connection_paths.find_connections): (Pfade, Subgraph)."""
+        predicates = None if predicates is None else tuple(sorted(set(predicates)))
+        paths, packed = await self._run("connect", source, target, k, predicates, max_length)
+        return paths, _unpack_graph(packed, self.namespaces)
+
+    async def search(self, text, limit=SEARCH_LIMIT):
+        """Entitäten, deren rdfs:label oder schema:name `text` enthält (Präfix-Treffer zuerst): [(Entität, Name)]."""
+        return await self._run("search", text.strip(), limit)
+
+    def histograms(self):
+        """{Operation: Histogramm als dict} für alle Operationen mit Anfragen."""
+        return {op: h.as_dict() for op, h in self.latency.items() if h.count}
+
+    def latency_report(self):
+        lines = []
+        for op, h in self.histograms().items():
+            lines.append(f"{op:14} n={h['count']:<6} mittel={h['mean_ms']:.1f}ms "
+                         f"p50<={h['p50_ms']}ms p95<={h['p95_ms']}ms p99<={h['p99_ms']}ms")
+        lines.append(f"zusammengelegt: {self.coalesced}")
+        return "\n".join(lines)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        try:
+            self._pin.unlink()
+        except OSError:
+            pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
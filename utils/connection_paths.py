@@ -0,0 +1,193 @@
+"""
+Kürzeste Verbindungen zwischen zwei Entitäten ("Wie hängt Berg mit Webern
+zusammen?").
+
+Eine Verbindung ist eine Knotenfolge, deren Nachbarn über mindestens ein
+Tripel verbunden sind (Richtung egal), z. B. über ein gemeinsames Werk, eine
+gemeinsame RowClass oder owl:sameAs:
+
+    mhg:AlbanBerg  frbr:creatorOf  mhg:Berg_Lulu
+    _:b1           mhg:manifestedIn mhg:Berg_Lulu        (RowForm -> Blank Node)
+    ...
+
+Gesucht wird mit bidirektionaler Breitensuche über die CSR-Adjazenz (siehe
+graph_csr.py): Beide Seiten erweitern abwechselnd ihre ganze Front (jeweils
+die kleinere), bis sie sich treffen. Damit wird nur die Umgebung beider
+Entitäten bis etwa zur halben Pfadlänge besucht, nicht der ganze Graph.
+Literale sind keine Zwischenknoten, rdf:type ist standardmäßig ausgenommen
+(sonst wären alle Komponisten über mhg:composer verbunden). Mit
+`predicates` werden nur die angegebenen Prädikate begangen.
+
+Die k kürzesten Verbindungen liefert der Algorithmus von Yen; jede
+Teilsuche ist wieder eine bidirektionale Breitensuche.
+
+Verwendung:
+    from connection_paths import find_connections
+    paths, sub = find_connections(g, mhg.AlbanBerg, mhg.AntonWebern, k=3)
+
+    python utils/mhg.py connect MusicHistoryGraph_TwelveToneMusic_Complete.ttl \\
+        AlbanBerg AntonWebern -k 3 -o Berg_Webern.ttl
+"""
+import heapq
+
+import numpy as np
+from rdflib import BNode, RDF
+
+from graph_csr import CSRAdjacency
+from triple_store import ID_DTYPE, KIND_BNODE, KIND_LITERAL
+
+DEFAULT_K = 3
+MAX_LENGTH = 10
+
+
+def _pair_key(u, v, n):
+    """Schlüssel einer ungerichteten Knotenpaarung (vektorisiert)."""
+    return np.minimum(u, v) * n + np.maximum(u, v)
+
+
+class PathFinder:
+    """Bidirektionale Breitensuche über einer CSRAdjacency mit Prädikat-Filter."""
+
+    def __init__(self, adjacency, predicates=None, skip_predicates=(RDF.type,)):
+        self.adjacency = adjacency
+        self.n = len(adjacency.kinds)
+        if predicates is None:
+            self.allowed = np.ones(self.n, dtype=bool)
+        else:
+            self.allowed = np.zeros(self.n, dtype=bool)
+            self.allowed[adjacency.ids(predicates)] = True
+        if len(skip_predicates):
+            self.allowed[adjacency.ids(skip_predicates)] = False
+        self.walkable = adjacency.kinds != KIND_LITERAL
+
+    def neighbours(self, front, banned_nodes=None, banned_pairs=None):
+        """(von, nach)-Spalten aller erlaubten Schritte aus der Front (beide Kantenrichtungen)."""
+        s, p, o = self.adjacency.out_edges(front)
+        keep = self.allowed[p]
+        s2, p2, o2 = self.adjacency.in_edges(front)
+        keep2 = self.allowed[p2]
+        src = np.concatenate((s[keep], o2[keep2])).astype(np.int64)
+        dst = np.concatenate((o[keep], s2[keep2])).astype(np.int64)
+        keep = self.walkable[dst]
+        if banned_nodes is not None:
+            keep &= ~banned_nodes[dst]
+        if banned_pairs is not None and len(banned_pairs):
+            keep &= ~np.isin(_pair_key(src, dst, self.n), banned_pairs)
+        return src[keep], dst[keep]
+
+    def shortest_path(self, source, target, max_length=MAX_LENGTH, banned_nodes=None, banned_pairs=None):
+        """Eine kürzeste Knotenfolge (Term-IDs) von `source` nach `target` oder None."""
+        if source == target:
+            return [source]
+        dist = [np.full(self.n, -1, dtype=np.int32), np.full(self.n, -1, dtype=np.int32)]
+        pred = [np.full(self.n, -1, dtype=np.int64), np.full(self.n, -1, dtype=np.int64)]
+        dist[0][source] = dist[1][target] = 0
+        fronts = [np.array([source], dtype=np.int64), np.array([target], dtype=np.int64)]
+
+        for _ in range(max_length):
+            side = 0 if len(fronts[0]) <= len(fronts[1]) else 1
+            src, dst = self.neighbours(fronts[side], banned_nodes, banned_pairs)
+            new = dist[side][dst] < 0
+            dst, first = np.unique(dst[new], return_index=True)
+            if not len(dst):
+                return None
+            src = src[new][first]
+            pred[side][dst] = src
+            dist[side][dst] = dist[side][src] + 1
+            met = dst[dist[1 - side][dst] >= 0]
+            if len(met):
+                meet = met[np.argmin(dist[1 - side][met])]
+                return self._walk(pred[0], meet)[::-1] + self._walk(pred[1], meet)[1:]
+            fronts[side] = dst
+        return None
+
+    @staticmethod
+    def _walk(pred, node):
+        path = [int(node)]
+        while pred[path[-1]] >= 0:
+            path.append(int(pred[path[-1]]))
+        return path
+
+    def k_shortest_paths(self, source, target, k=DEFAULT_K, max_length=MAX_LENGTH):
+        """Bis zu k kürzeste schleifenfreie Knotenfolgen, nach Länge sortiert (Yen)."""
+        first = self.shortest_path(source, target, max_length)
+        if first is None:
+            return []
+        paths, candidates, seen = [first], [], {tuple(first)}
+        while len(paths) < k:
+            last = paths[-1]
+            for i in range(len(last) - 1):
+                root = last[:i + 1]
+                # Schritte, die bekannte Pfade mit derselben Wurzel als nächstes nehmen
+                used = [(p[i], p[i + 1]) for p in paths if len(p) > i + 1 and p[:i + 1] == root]
+                banned_pairs = np.unique(_pair_key(*np.array(used, dtype=np.int64).T, self.n))
+                banned_nodes = np.zeros(self.n, dtype=bool)
+                banned_nodes[root[:-1]] = True
+                spur = self.shortest_path(root[-1], target, max_length - i, banned_nodes, banned_pairs)
+                if spur is not None:
+                    path = root[:-1] + spur
+                    if tuple(path) not in seen:
+                        seen.add(tuple(path))
+                        heapq.heappush(candidates, (len(path), path))
+            if not candidates:
+                break
+            paths.append(heapq.heappop(candidates)[1])
+        return paths
+
+    def path_edges(self, paths):
+        """(s, p, o)-ID-Spalten aller erlaubten Tripel zwischen aufeinanderfolgenden Pfadknoten."""
+        pairs = np.array([(u, v) for path in paths for u, v in zip(path, path[1:])], dtype=np.int64)
+        if not len(pairs):
+            return tuple(np.empty(0, dtype=np.int64) for _ in range(3))
+        wanted = np.unique(_pair_key(pairs[:, 0], pairs[:, 1], self.n))
+        s, p, o = self.adjacency.out_edges(np.unique(pairs))
+        s, p, o = (np.asarray(col, dtype=np.int64) for col in (s, p, o))
+        keep = self.allowed[p] & np.isin(_pair_key(s, o, self.n), wanted)
+        return s[keep], p[keep], o[keep]
+
+
+def find_connections(g, source, target, k=DEFAULT_K, predicates=None, skip_predicates=(RDF.type,),
+                     max_length=MAX_LENGTH, blank_nodes=True, adjacency=None, out=None):
+    """
+    Die k kürzesten Verbindungen zwischen `source` und `target`.
+
+    Gibt (Pfade, Subgraph) zurück: Pfade als Listen von RDF-Termen, der
+    Subgraph enthält alle erlaubten Tripel entlang der Pfade (mit
+    `blank_nodes=True` zusätzlich die Beschreibung der Blank Nodes auf den
+    Pfaden, z. B. mhg:accordingTo und dcterms:source). Mit `out` (z. B. ein
+    TripleWriter) werden die Tripel dorthin geschrieben.
+    """
+    adjacency = adjacency or CSRAdjacency.from_graph(g)
+    finder = PathFinder(adjacency, predicates, skip_predicates)
+    ids = adjacency.ids([source, target])
+    if len(ids) < 2:
+        missing = [t for t in (source, target) if not len(adjacency.ids([t]))]
+        raise KeyError(f"Nicht im Graphen: {', '.join(str(t) for t in missing)}")
+    paths = finder.k_shortest_paths(int(ids[0]), int(ids[1]), k, max_length)
+
+    parts = [finder.path_edges(paths)]
+    if blank_nodes:
+        on_path = np.unique([n for path in paths for n in path]).astype(np.int64)
+        parts.append(adjacency.bnode_closure(on_path[adjacency.kinds[on_path] == KIND_BNODE]))
+    s, p, o = (np.concatenate(cols).astype(ID_DTYPE) for cols in zip(*parts))
+    if len(s):
+        s, p, o = np.unique(np.column_stack((s, p, o)), axis=0).T
+    subgraph = adjacency.to_graph(s, p, o, g.namespaces(), out)
+    term = adjacency.store.terms.term
+    return [[term(n) for n in path] for path in paths], subgraph
+
+
+def describe_path(subgraph, path):
+    """Lesbare Form eines Pfads, z. B. "mhg:AlbanBerg -frbr:creatorOf-> mhg:Berg_Lulu <-mhg:manifestedIn- _:b1"."""
+    nm = subgraph.namespace_manager
+
+    def label(term):
+        return f"_:{term}" if isinstance(term, BNode) else nm.normalizeUri(term)
+
+    parts = [label(path[0])]
+    for u, v in zip(path, path[1:]):
+        forward = "|".join(label(p) for p in subgraph.predicates(u, v))
+        backward = "|".join(label(p) for p in subgraph.predicates(v, u))
+        parts.append(f"-{forward}->" if forward else f"<-{backward}-")
+        parts.append(label(v))
+    return " ".join(parts)
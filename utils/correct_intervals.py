@@ -1,29 +1,20 @@
 import re
 
-def parse_interval_string(s):
-    """Parse an interval string into a list of integers."""
-    return [int(x) for x in s.split('_')]
+from packed_rows import INTERVAL_LENGTH, invert, pack_name, retrograde
 
-def format_interval_string(intervals):
-    """Format a list of integers back into the string representation."""
-    return '_'.join(str(x) for x in intervals)
+def is_interval_pattern(s):
+    """True if `s` is a valid interval pattern: exactly 11 intervals, each 0-11."""
+    parts = s.split('_')
+    return len(parts) == INTERVAL_LENGTH and all(p.isdigit() and int(p) < 12 for p in parts)
 
-def calculate_forms(p_intervals):
-    """Calculate all derivative forms from the prime form."""
-    # Inversion: each interval complements to 12
-    i_intervals = [12 - x for x in p_intervals]
-    
-    # Retrograde: reverse of prime
-    r_intervals = p_intervals[::-1]
-    
-    # Retrograde Inversion: reverse of inversion
-    ri_intervals = i_intervals[::-1]
-    
+def calculate_packed_forms(p_key):
+    """P, I, R and RI of a packed interval pattern (see packed_rows.py)."""
+    i_key = int(invert(p_key, INTERVAL_LENGTH))
     return {
-        'P': p_intervals,
-        'I': i_intervals,
-        'R': r_intervals,
-        'RI': ri_intervals
+        'P': p_key,
+        'I': i_key,
+        'R': int(retrograde(p_key, INTERVAL_LENGTH)),
+        'RI': int(retrograde(i_key, INTERVAL_LENGTH))
     }
 
 def correct_interval_block(block_lines):
@@ -38,7 +29,7 @@ def correct_interval_block(block_lines):
             labels.append(match.group(1))
             patterns.append(match.group(2))
     
-    if len(patterns) != 4:
+    if len(patterns) != 4 or not all(is_interval_pattern(p) for p in patterns):
         return block_lines  # Return unchanged if pattern is invalid
     
     # Find the P line
@@ -53,17 +44,14 @@ def correct_interval_block(block_lines):
     if p_index is None:
         return block_lines  # Return unchanged if no P found
     
-    # Parse intervals from P
-    p_intervals = parse_interval_string(p_str)
-    
-    # Calculate correct forms
-    correct_forms = calculate_forms(p_intervals)
+    # Calculate correct forms on packed patterns (one integer per pattern)
+    correct_forms = calculate_packed_forms(pack_name(p_str))
     
-    # Parse the provided forms (excluding P)
+    # Pack the provided forms (excluding P)
     provided_forms = {}
     for i, (label, pattern) in enumerate(zip(labels, patterns)):
         if i != p_index:  # Skip P
-            provided_forms[label] = parse_interval_string(pattern)
+            provided_forms[label] = pack_name(pattern)
     
     # Find correct labels for each provided form
     label_mapping = {}
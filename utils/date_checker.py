@@ -18,19 +18,21 @@ def is_valid_xsd_date(date_str: str) -> bool:
     except ValueError:
         return False
 
-def main():
-    print("🔍 Checking dates in:", TTL_FILE)
+def check_dates(ttl_file):
+    """
+    Prüft alle xsd:date-Literale einer TTL-Datei zeilenweise.
+    Gibt die Liste der Fehler als (Zeile, Datum, Kontext) zurück.
+    """
+    print("🔍 Checking dates in:", ttl_file)
     print("=" * 50)
 
-    with open(TTL_FILE, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
     errors = []
-    for i, line in enumerate(lines, start=1):
-        matches = DATE_PATTERN.findall(line)
-        for date_str in matches:
-            if not is_valid_xsd_date(date_str):
-                errors.append((i, date_str, line.strip()))
+    with open(ttl_file, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f, start=1):
+            matches = DATE_PATTERN.findall(line)
+            for date_str in matches:
+                if not is_valid_xsd_date(date_str):
+                    errors.append((i, date_str, line.strip()))
 
     if errors:
         print("❌ INVALID DATES FOUND:")
@@ -41,6 +43,10 @@ def main():
             print("-" * 50)
     else:
         print("✅ No invalid xsd:date literals found.")
+    return errors
+
+def main():
+    check_dates(TTL_FILE)
 
 if __name__ == "__main__":
     main()
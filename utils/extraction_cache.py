@@ -0,0 +1,277 @@
+"""
+LRU-Cache für Subgraph-Extraktionen (im Speicher und auf der Platte).
+
+Dieselben Nachbarschaften werden oft wiederholt angefragt, z. B. Berg,
+Schoenberg und Webern mit Tiefe 1 ohne rdf:type. Der Cache legt das Ergebnis
+jeder Extraktion unter einem Schlüssel aus
+
+    (Extraktor, Seed-Menge, Tiefe, Prädikat-/Modusfilter, Blank-Node-Regel)
+
+ab, und zwar im Verzeichnis `.mhg_cache/extractions/<datei>.<hash>/` neben
+der TTL-Datei. <hash> ist der SHA-256 des Dateiinhalts (Graph-Fingerabdruck,
+siehe graph_cache.file_digest). Ändert sich die Datei, gehören alle alten
+Einträge zu einem anderen Fingerabdruck; sie werden verworfen und ihr
+Verzeichnis gelöscht.
+
+Beide Ebenen sind begrenzt: im Speicher `max_memory` Einträge (LRU), auf
+der Platte `max_disk` Dateien (nach letztem Zugriff, über die mtime). Der
+Graph selbst wird erst beim ersten Cache-Fehlschlag geladen; ein Treffer
+kostet nur das Lesen des Eintrags.
+
+Verwendung:
+    from extraction_cache import ExtractionCache
+    cache = ExtractionCache.for_file("MusicHistoryGraph_TwelveToneMusic_Complete.ttl")
+    sub = cache.k_hop_subgraph([mhg.AlbanBerg, mhg.ArnoldSchoenberg, mhg.AntonWebern],
+                               depth=1, skip_predicates=[RDF.type])
+    sub = cache.extract_subgraph(["AlbanBerg", "AB_Lulu"], {"composer", "work"})
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from collections import OrderedDict
+from pathlib import Path
+
+from rdflib import Graph
+
+from graph_cache import CACHE_DIR_NAME, file_digest, load_graph, pack_term, unpack_term
+from graph_csr import CSRAdjacency, k_hop_subgraph
+from subgraph_extract import extract_subgraph, new_subgraph
+from triple_writer import TripleWriter, is_stream_path
+
+CACHE_VERSION = 1
+MAX_MEMORY_ENTRIES = 32
+MAX_DISK_ENTRIES = 512
+
+
+def cache_key(extractor, seeds, depth=None, filters=(), blank_nodes=False):
+    """Schlüssel einer Extraktion (unabhängig von der Reihenfolge der Seeds und Filter)."""
+    parts = [extractor, sorted({str(s) for s in seeds}), depth,
+             sorted({str(f) for f in filters}), bool(blank_nodes)]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()[:32]
+
+
+class _Recorder:
+    """
+    Leitet add/bind an das eigentliche Ziel weiter und merkt sich die Tripel.
+    Jedes Tripel wird nur beim ersten Mal weitergegeben, sodass ein Fehlschlag
+    genau die Folge ausgibt, die später ein Treffer wiedergibt.
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self.triples = {}
+        self.namespaces = []
+
+    def add(self, triple):
+        if triple not in self.triples:
+            self.triples[triple] = None
+            self.target.add(triple)
+
+    def addN(self, quads):
+        for s, p, o, _ in quads:
+            self.add((s, p, o))
+
+    def bind(self, prefix, namespace, *args, **kwargs):
+        self.target.bind(prefix, namespace, *args, **kwargs)
+        self.namespaces.append((prefix, str(namespace)))
+
+    def __len__(self):
+        return len(self.target)
+
+
+class ExtractionCache:
+    """Extraktionsergebnisse zu einer TTL-Datei, gebunden an deren Inhalts-Hash."""
+
+    _by_file = {}
+
+    def __init__(self, ttl_file, store="mmap", cache_dir=None,
+                 max_memory=MAX_MEMORY_ENTRIES, max_disk=MAX_DISK_ENTRIES):
+        self.ttl_file = Path(ttl_file)
+        self.store = store
+        self.root = (Path(cache_dir) if cache_dir else
+                     self.ttl_file.resolve().parent / CACHE_DIR_NAME) / "extractions"
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.hits = self.misses = 0
+        self._memory = OrderedDict()
+        self._graph = None
+        self._adjacency = None
+        self._stat = None
+        self.fingerprint = None
+        self.refresh()
+
+    @classmethod
+    def for_file(cls, ttl_file, **kwargs):
+        """Cache zu `ttl_file` und Optionen, innerhalb eines Prozesses wiederverwendet."""
+        key = (str(Path(ttl_file).resolve()), tuple(sorted(kwargs.items())))
+        cache = cls._by_file.get(key)
+        if cache is None:
+            cache = cls._by_file[key] = cls(ttl_file, **kwargs)
+        return cache
+
+    # --- Fingerabdruck -------------------------------------------------
+
+    @property
+    def directory(self):
+        return self.root / f"{self.ttl_file.name}.{self.fingerprint[:16]}"
+
+    def refresh(self):
+        """Prüft, ob sich die TTL-Datei geändert hat, und verwirft dann alle Einträge."""
+        st = os.stat(self.ttl_file)
+        stat = (st.st_size, st.st_mtime_ns)
+        if stat == self._stat:
+            return
+        self._stat = stat
+        digest = file_digest(self.ttl_file)
+        if digest == self.fingerprint:
+            return
+        self.fingerprint = digest
+        self._memory.clear()
+        self._graph = None
+        self._adjacency = None
+        for old in self.root.glob(f"{self.ttl_file.name}.*"):
+            if old != self.directory:
+                shutil.rmtree(old, ignore_errors=True)
+
+    @property
+    def graph(self):
+        """Der Graph zur aktuellen Datei (erst bei Bedarf geladen)."""
+        self.refresh()
+        if self._graph is None:
+            self._graph = load_graph(self.ttl_file, store=self.store)
+        return self._graph
+
+    @property
+    def adjacency(self):
+        """CSR-Adjazenz zum Graphen, einmal je Dateistand aufgebaut."""
+        graph = self.graph
+        if self._adjacency is None:
+            self._adjacency = CSRAdjacency.from_graph(graph)
+        return self._adjacency
+
+    # --- Einträge ------------------------------------------------------
+
+    def _path(self, key):
+        return self.directory / f"{key}.pickle"
+
+    def get(self, key):
+        """(Namespaces, Tripel) eines Eintrags oder None."""
+        self.refresh()
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.load(f)
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.misses += 1
+            return None
+        if payload.get("version") != CACHE_VERSION or payload.get("digest") != self.fingerprint:
+            self.misses += 1
+            return None
+        terms = [unpack_term(enc) for enc in payload["terms"]]
+        ids = payload["triples"]
+        triples = [(terms[ids[i]], terms[ids[i + 1]], terms[ids[i + 2]]) for i in range(0, len(ids), 3)]
+        entry = (payload["namespaces"], triples)
+        self._remember(key, entry)
+        self.hits += 1
+        return entry
+
+    def _remember(self, key, entry):
+        if not self.max_memory:
+            return
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def put(self, key, namespaces, triples):
+        """Legt einen Eintrag im Speicher und (atomar) auf der Platte ab."""
+        triples = list(dict.fromkeys(triples))
+        entry = (list(namespaces), triples)
+        self._remember(key, entry)
+        if not self.max_disk:
+            return
+        term_ids, terms, ids = {}, [], []
+        for triple in triples:
+            for term in triple:
+                tid = term_ids.get(term)
+                if tid is None:
+                    tid = term_ids[term] = len(terms)
+                    terms.append(pack_term(term))
+                ids.append(tid)
+        payload = {"version": CACHE_VERSION, "digest": self.fingerprint,
+                   "namespaces": entry[0], "terms": terms, "triples": ids}
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self._prune()
+        except OSError as e:
+            print(f"⚠️  Cache-Eintrag konnte nicht geschrieben werden ({path}): {e}")
+
+    def _prune(self):
+        """Löscht die am längsten nicht benutzten Dateien über `max_disk`."""
+        files = list(self.directory.glob("*.pickle"))
+        if len(files) <= self.max_disk:
+            return
+        files.sort(key=lambda p: p.stat().st_mtime_ns)
+        for old in files[:len(files) - self.max_disk]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def clear(self):
+        """Verwirft alle Einträge zur aktuellen Datei."""
+        self._memory.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _cached(self, key, new_target, extract, out):
+        """Liefert den Eintrag nach `out` bzw. in einen neuen Graphen; berechnet ihn bei Bedarf."""
+        entry = self.get(key)
+        target = new_target() if out is None else out
+        if entry is not None:
+            namespaces, triples = entry
+            for prefix, ns in namespaces:
+                target.bind(prefix, ns)
+            for triple in triples:
+                target.add(triple)
+            return target
+        recorder = _Recorder(target)
+        extract(recorder)
+        self.put(key, recorder.namespaces, recorder.triples)
+        return target
+
+    # --- Extraktoren ---------------------------------------------------
+
+    def k_hop_subgraph(self, starts, depth=1, skip_predicates=(), blank_nodes=False, out=None):
+        """Wie graph_csr.k_hop_subgraph, mit Cache."""
+        key = cache_key("k_hop", starts, depth, skip_predicates, blank_nodes)
+        return self._cached(key, Graph, lambda rec: k_hop_subgraph(
+            self.graph, starts, depth, skip_predicates, blank_nodes, self.adjacency, out=rec), out)
+
+    def extract_subgraph(self, ids, modes, out=None):
+        """Wie subgraph_extract.extract_subgraph, mit Cache (Modi als Filter)."""
+        key = cache_key("extract", ids, None, modes)
+        return self._cached(key, new_subgraph, lambda rec: extract_subgraph(
+            self.graph, ids, modes, out=rec), out)
+
+    def extract_to_file(self, ids, modes, out_file):
+        """Wie subgraph_extract.extract_to_file, mit Cache. Gibt die Tripelzahl zurück."""
+        if is_stream_path(out_file):
+            with TripleWriter(out_file) as out:
+                self.extract_subgraph(ids, modes, out=out)
+            return len(out)
+        subgraph = self.extract_subgraph(ids, modes)
+        subgraph.serialize(out_file, format="turtle")
+        return len(subgraph)
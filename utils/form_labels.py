@@ -0,0 +1,140 @@
+"""
+Form-Labels (P0 … RI11) und Transpositionsstufen von RowForms.
+
+Im Graphen stehen RowForms nur als Tonfolge (mhg:0_1_4_5_11_10_3_7_9_6_8_2).
+Welche Form einer RowClass sie ist, ergibt sich relativ zum kanonischen
+Intervallmuster der Klasse (siehe row_classes.py): P0 ist dieses Muster ab
+Ton 0, P_n/I_n beginnen auf Ton n, R_n/RI_n sind der Krebs von P_n/I_n und
+enden also auf n (Reihenfolge und Namen wie RowFormGenerator.py).
+
+Jede der 48 Formen ist eine feste Umordnung der Töne von P0 mit
+anschließender Tonabbildung; beides liegt als 48×12-Tabelle vor
+(PERMUTATIONS, PITCH_MAPS):
+
+    form[k] = PITCH_MAPS[k][P0[PERMUTATIONS[k]]]
+
+Für das Label einer Reihe kommen je Gruppe P, I, R, RI nur eine Stufe in
+Frage: der erste Ton (P, I) bzw. der letzte (R, RI). Es werden also nur
+diese vier Formen über die Tabellen gebildet und mit der Reihe verglichen,
+konstanter Aufwand je Reihe. Symmetrische Reihen haben mehrere Labels (z. B.
+P0 und RI11); das erste in der Reihenfolge P, I, R, RI gilt als Hauptlabel
+und bestimmt mhg:transpositionLevel.
+
+annotate_graph versieht alle mhg:rowForm eines Graphen in einem
+vektorisierten Durchlauf mit mhg:formLabel und mhg:transpositionLevel.
+
+Verwendung:
+    from form_labels import annotate_graph, form_labels
+    form_labels("1_8_7_4_0_6_9_5_11_10_2_3")            # ["RI3"]
+    annotate_graph(g)                                   # Anzahl annotierter RowForms
+
+    python utils/mhg.py annotate-forms rows_rowclasses7.ttl -o rowform_labels.ttl
+"""
+import numpy as np
+from rdflib import RDF, Literal
+from rdflib.namespace import XSD
+
+from packed_rows import INTERVAL_LENGTH, ROW_LENGTH, first, from_local_names, pack, rows_from_intervals, unpack
+from row_classes import canonical_key, canonical_keys, mhg
+from RowFormGenerator import FORM_GROUPS, FORM_LABELS
+
+_groups = np.repeat(np.arange(4), 12)
+_levels = np.tile(np.arange(12), 4)
+
+# Position in P0, aus der der j-te Ton der Form stammt (R, RI: rückwärts)
+PERMUTATIONS = np.where((_groups >= 2)[:, None], np.arange(11, -1, -1), np.arange(12)).astype(np.uint8)
+# Abbildung der Töne von P0: Transposition (P, R) bzw. Umkehrung und Transposition (I, RI)
+PITCH_MAPS = np.where((_groups % 2 == 1)[:, None], _levels[:, None] - np.arange(12),
+                      _levels[:, None] + np.arange(12)) % 12
+PITCH_MAPS = PITCH_MAPS.astype(np.uint8)
+
+# dieselben Tabellen als Listen für Einzelabfragen ohne NumPy
+_PERMUTATION_LISTS = PERMUTATIONS.tolist()
+_PITCH_MAP_LISTS = PITCH_MAPS.tolist()
+
+NO_LABEL = -1
+
+
+def realize(keys, labels):
+    """
+    Formen (gepackt) zu kanonischen Schlüsseln und Label-Indizes (0-47),
+    vektorisiert; `keys` und `labels` werden gegeneinander gebroadcastet.
+    """
+    labels = np.asarray(labels, dtype=np.intp)
+    p0 = unpack(rows_from_intervals(np.asarray(keys, dtype=np.uint64)), ROW_LENGTH).astype(np.intp)
+    shape = np.broadcast_shapes(p0.shape[:-1], labels.shape) + (ROW_LENGTH,)
+    positions = np.broadcast_to(PERMUTATIONS[labels], shape).astype(np.intp)
+    pitches = np.take_along_axis(np.broadcast_to(p0, shape), positions, axis=-1)
+    return pack(np.take_along_axis(np.broadcast_to(PITCH_MAPS[labels], shape), pitches, axis=-1))
+
+
+def label_codes(rows):
+    """
+    Label-Indizes gepackter Reihen: (N, 4)-Array, Spalte g = Index der Form
+    aus Gruppe P, I, R, RI (g * 12 + Stufe) oder NO_LABEL.
+    """
+    rows = np.atleast_1d(np.asarray(rows, dtype=np.uint64))
+    start = first(rows).astype(np.intp)
+    end = (rows & np.uint64(0xF)).astype(np.intp)
+    # je Gruppe die einzige mögliche Stufe: erster Ton (P, I) bzw. letzter Ton (R, RI)
+    candidates = np.stack((start, 12 + start, 24 + end, 36 + end), axis=1)
+    forms = realize(canonical_keys(rows)[:, None], candidates)
+    return np.where(forms == rows[:, None], candidates, NO_LABEL).astype(np.int16)
+
+
+def primary_codes(codes):
+    """Hauptlabel je Zeile (erstes in der Reihenfolge P, I, R, RI)."""
+    return np.where(codes < 0, len(FORM_LABELS), codes).min(axis=1)
+
+
+def form_labels(value):
+    """Labels einer Reihe (lokaler Name) relativ zu ihrer RowClass, Hauptlabel zuerst. Ohne NumPy."""
+    row = [int(x) for x in value.replace("mhg:", "").split("_")]
+    if len(row) != ROW_LENGTH:
+        raise ValueError(f"Keine Reihe: {value!r}")
+    key = canonical_key(value)
+    p0 = [0]
+    for shift in range(4 * (INTERVAL_LENGTH - 1), -1, -4):
+        p0.append((p0[-1] + ((key >> shift) & 0xF)) % 12)
+    labels = []
+    for g, level in enumerate((row[0], row[0], row[-1], row[-1])):
+        k = 12 * g + level
+        pitch_map = _PITCH_MAP_LISTS[k]
+        if [pitch_map[p0[i]] for i in _PERMUTATION_LISTS[k]] == row:
+            labels.append(FORM_LABELS[k])
+    return labels
+
+
+def transposition_level(label):
+    """Stufe eines Labels ("RI11" -> 11)."""
+    return int(label.lstrip("".join(FORM_GROUPS)))
+
+
+def annotate_graph(graph, out=None):
+    """
+    Versieht alle mhg:rowForm mit mhg:formLabel (alle Labels) und
+    mhg:transpositionLevel (Stufe des Hauptlabels). Die Tripel gehen in
+    `graph` oder, falls angegeben, nach `out` (Graph oder TripleWriter).
+    Gibt die Anzahl annotierter RowForms zurück.
+    """
+    forms, names = [], []
+    prefix = str(mhg)
+    for rf in graph.subjects(RDF.type, mhg.rowForm, unique=True):
+        local = str(rf)[len(prefix):] if str(rf).startswith(prefix) else ""
+        if local.count("_") == ROW_LENGTH - 1:
+            forms.append(rf)
+            names.append(local)
+    if not forms:
+        return 0
+    codes = label_codes(from_local_names(names))
+    primary = primary_codes(codes)
+    label_literals = [Literal(label) for label in FORM_LABELS]
+    level_literals = [Literal(n, datatype=XSD.integer) for n in range(12)]
+
+    target = graph if out is None else out
+    for rf, row, main in zip(forms, codes.tolist(), primary.tolist()):
+        for c in row:
+            if c >= 0:
+                target.add((rf, mhg.formLabel, label_literals[c]))
+        target.add((rf, mhg.transpositionLevel, level_literals[main % 12]))
+    return len(forms)
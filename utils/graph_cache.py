@@ -0,0 +1,349 @@
+"""
+Persistenter Binär-Cache für geparste TTL-Graphen.
+
+Beim ersten Laden wird die TTL-Datei mit rdflib geparst und als kompakter
+Snapshot (Termtabelle + Integer-Tripel) im Verzeichnis `.mhg_cache/` neben
+der Datei abgelegt. Der Snapshot ist an den SHA-256 des Dateiinhalts
+gebunden: Ändert sich die TTL-Datei, wird er beim nächsten Laden automatisch
+neu erzeugt.
+
+Bei Turtle-Dateien speichert der Snapshot zusätzlich einen Hash pro
+Subjekt-Block (siehe ttl_block_index.py). Wurden seit dem letzten Laden nur
+einzelne Blöcke geändert, wird der vorige Snapshot geladen und nur die
+betroffenen Blöcke werden neu geparst.
+
+Verwendung:
+    from graph_cache import load_graph
+    g = load_graph("MusicHistoryGraph_TwelveToneMusic_Complete.ttl")
+"""
+import hashlib
+import os
+import pickle
+from array import array
+from pathlib import Path
+
+from rdflib import BNode, Graph, Literal, URIRef
+
+CACHE_DIR_NAME = ".mhg_cache"
+SNAPSHOT_VERSION = 1
+# Ab diesem Anteil geänderter Blöcke wird komplett neu geparst
+INCREMENTAL_MAX_CHANGED = 0.25
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 des Dateiinhalts (hex), blockweise gelesen."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def graph_stamp(graph):
+    """
+    Marke für den aktuellen Stand eines geladenen Graphen: Objekt-Identität
+    und Änderungszähler des Stores (IntTripleStore.generation). Für Indizes,
+    die pro Graph zwischengespeichert werden; rdflib vergleicht Graphen nur
+    über ihren Identifier. None, wenn der Store keinen Änderungszähler hat:
+    Dann lässt sich ein veralteter Index nicht erkennen.
+    """
+    generation = getattr(graph.store, "generation", None)
+    return None if generation is None else (id(graph), generation)
+
+
+def snapshot_path_for(ttl_file, digest, cache_dir=None):
+    """Pfad des Snapshots für eine TTL-Datei mit gegebenem Inhalts-Hash."""
+    ttl_file = Path(ttl_file)
+    cache_dir = Path(cache_dir) if cache_dir else ttl_file.resolve().parent / CACHE_DIR_NAME
+    return cache_dir / f"{ttl_file.name}.{digest[:16]}.snapshot"
+
+
+def pack_term(term):
+    """Kodiert einen RDF-Term als picklebares Tupel."""
+    if isinstance(term, URIRef):
+        return ("U", str(term))
+    if isinstance(term, BNode):
+        return ("B", str(term))
+    if isinstance(term, Literal):
+        dt = str(term.datatype) if term.datatype is not None else None
+        return ("L", str(term), dt, term.language)
+    raise TypeError(f"Nicht unterstützter RDF-Term: {term!r}")
+
+
+def unpack_term(enc):
+    """Gegenstück zu pack_term."""
+    kind = enc[0]
+    if kind == "U":
+        return URIRef(enc[1])
+    if kind == "B":
+        return BNode(enc[1])
+    _, lexical, dt, lang = enc
+    return Literal(lexical, lang=lang, datatype=URIRef(dt) if dt else None)
+
+
+def pack_triples(triples):
+    """Kodiert Tripel als (Termtabelle, Bytes mit je drei uint32-IDs)."""
+    term_ids = {}
+    terms = []
+    ids = array("I")
+    for triple in triples:
+        for term in triple:
+            tid = term_ids.get(term)
+            if tid is None:
+                tid = term_ids[term] = len(terms)
+                terms.append(pack_term(term))
+            ids.append(tid)
+    return terms, ids.tobytes()
+
+
+def unpack_triples(terms, id_bytes):
+    """Gegenstück zu pack_triples; `terms` sind bereits entpackte RDF-Terme."""
+    ids = array("I")
+    ids.frombytes(id_bytes)
+    return (
+        (terms[ids[i]], terms[ids[i + 1]], terms[ids[i + 2]])
+        for i in range(0, len(ids), 3)
+    )
+
+
+def write_snapshot(graph, path, digest, block_index=None):
+    """
+    Schreibt den Graphen als Snapshot (atomar über eine temporäre Datei).
+    Mit `block_index` (ttl_block_index.BlockIndex) werden die Block-Hashes
+    für späteres inkrementelles Laden mitgespeichert.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    terms, id_bytes = pack_triples(graph)
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "digest": digest,
+        "namespaces": [(prefix, str(ns)) for prefix, ns in graph.namespaces()],
+        "terms": terms,
+        "triples": id_bytes,
+    }
+    if block_index is not None:
+        payload["blocks"] = {key: entry[0] for key, entry in block_index.blocks.items()}
+        payload["other_digest"] = block_index.other_digest
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _read_payload(path, digest=None):
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if payload.get("version") != SNAPSHOT_VERSION:
+        return None
+    if digest is not None and payload.get("digest") != digest:
+        return None
+    return payload
+
+
+def read_snapshot(path, digest=None, store="default"):
+    """
+    Liest einen Snapshot und gibt einen rdflib-Graphen zurück.
+    Gibt None zurück, wenn der Snapshot fehlt, veraltet oder unlesbar ist.
+    """
+    payload = _read_payload(path, digest)
+    if payload is None:
+        return None
+    return _graph_from_payload(payload, store)
+
+
+def _graph_from_payload(payload, store):
+    g = Graph(store=store)
+    for prefix, ns in payload["namespaces"]:
+        g.bind(prefix, ns, override=True)
+
+    terms = [unpack_term(enc) for enc in payload["terms"]]
+    g.addN((s, p, o, g) for s, p, o in unpack_triples(terms, payload["triples"]))
+    return g
+
+
+def _remove_stale_snapshots(ttl_file, keep):
+    keep = Path(keep)
+    for old in keep.parent.glob(f"{Path(ttl_file).name}.*.snapshot"):
+        if old != keep:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def _remove_description(g, subject):
+    """Entfernt alle Tripel eines Subjekts samt der daran hängenden Blank Nodes."""
+    todo = [subject]
+    while todo:
+        node = todo.pop()
+        todo.extend(o for o in g.objects(node, None) if isinstance(o, BNode))
+        g.remove((node, None, None))
+
+
+def _load_incremental(ttl_file, snap, store, cache_dir):
+    """
+    Aktualisiert den letzten Snapshot der Datei um die geänderten Blöcke.
+    Gibt (Graph, BlockIndex) zurück oder None, wenn komplett neu geparst
+    werden muss (kein voriger Snapshot, geänderte Direktiven oder Blöcke
+    ohne IRI-Subjekt, benannte Blank Nodes, zu viele Änderungen).
+    """
+    previous = sorted(
+        (p for p in Path(snap).parent.glob(f"{Path(ttl_file).name}.*.snapshot") if p != snap),
+        key=lambda p: p.stat().st_mtime,
+    )
+    payload = _read_payload(previous[-1]) if previous else None
+    if payload is None or "blocks" not in payload:
+        return None
+
+    from ttl_block_index import BlockIndex
+    index = BlockIndex.open(ttl_file, cache_dir)
+    if index.other_digest != payload["other_digest"]:
+        return None
+    old = payload["blocks"]
+    changed = [key for key in old.keys() | index.blocks.keys() if old.get(key) != index.digest(key)]
+    if len(changed) > INCREMENTAL_MAX_CHANGED * max(1, len(index)):
+        return None
+    if any(key.startswith("_:") for key in changed):
+        return None
+    texts = [index.read(key) for key in changed if key in index]
+    if any("_:" in text for text in texts):
+        return None
+
+    g = _graph_from_payload(payload, store)
+    for key in changed:
+        _remove_description(g, URIRef(key))
+    if texts:
+        g.parse(data="\n".join(index.directives + [""]) + "".join(texts), format="turtle",
+                publicID=Path(ttl_file).resolve().as_uri())
+    return g, index
+
+
+def index_path_for(ttl_file, digest, cache_dir=None):
+    """Pfad der memory-mapped Indexdatei (siehe triple_index_file.py)."""
+    return snapshot_path_for(ttl_file, digest, cache_dir).with_suffix(".mhgidx")
+
+
+def pin_index(idx):
+    """
+    Hält eine Indexdatei fest, solange dieser Prozess läuft: _load_mapped
+    löscht keine veralteten Indexe, zu denen eine Pin-Datei eines noch
+    laufenden Prozesses existiert. Gibt die Pin-Datei zurück (zum Lösen
+    einfach löschen).
+    """
+    idx = Path(idx)
+    idx.parent.mkdir(parents=True, exist_ok=True)
+    pin = idx.with_name(f"{idx.name}.{os.getpid()}.pin")
+    pin.touch()
+    return pin
+
+
+def _process_alive(pid):
+    if os.name != "posix":
+        # os.kill(pid, 0) würde den Prozess unter Windows beenden; im Zweifel gilt er als laufend
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _pinned(idx):
+    """True, wenn ein laufender Prozess `idx` festhält; Pins beendeter Prozesse werden entfernt."""
+    for pin in idx.parent.glob(f"{idx.name}.*.pin"):
+        pid = pin.name[len(idx.name) + 1:-len(".pin")]
+        if not pid.isdigit() or _process_alive(int(pid)):
+            return True
+        try:
+            pin.unlink()
+        except OSError:
+            pass
+    return False
+
+
+def _parse(ttl_file, format, store, parallel):
+    if parallel and format in ("turtle", "ttl"):
+        from parallel_parse import parse_parallel
+        return parse_parallel(ttl_file, workers=None if parallel is True else parallel,
+                              store=_make_store(store))
+    g = Graph(store=_make_store(store))
+    g.parse(ttl_file, format=format)
+    return g
+
+
+def _load_mapped(ttl_file, format, cache_dir, parallel, incremental):
+    from triple_index_file import open_index, read_header, write_index
+
+    digest = file_digest(ttl_file)
+    idx = index_path_for(ttl_file, digest, cache_dir)
+    header = read_header(idx) if idx.exists() else None
+    if header is None or header.get("digest") != digest:
+        g = load_graph(ttl_file, format=format, cache_dir=cache_dir, store="int",
+                       parallel=parallel, incremental=incremental)
+        write_index(g, idx, digest)
+        for old in idx.parent.glob(f"{Path(ttl_file).name}.*.mhgidx"):
+            if old != idx and not _pinned(old):
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+    return open_index(idx)
+
+
+def _make_store(store):
+    if store == "int":
+        from triple_store import IntTripleStore
+        return IntTripleStore()
+    return store
+
+
+def load_graph(ttl_file, format="turtle", cache_dir=None, use_cache=True, store="default",
+               parallel=False, incremental=True):
+    """
+    Lädt eine TTL-Datei als rdflib-Graph und nutzt dabei den Snapshot-Cache.
+
+    Existiert ein Snapshot zum aktuellen Inhalts-Hash, wird er geladen;
+    andernfalls wird die Datei geparst und der Snapshot neu geschrieben.
+    `store` wird an rdflib.Graph weitergereicht; "int" wählt den
+    speichersparenden IntTripleStore (siehe triple_store.py), "mmap" öffnet
+    eine per Inhalts-Hash gebundene Indexdatei (siehe triple_index_file.py),
+    die beim ersten Aufruf erzeugt wird.
+    `parallel=True` (oder eine Prozessanzahl) parst Turtle bei Bedarf
+    chunkweise über alle Kerne (siehe parallel_parse.py).
+    `incremental=True` parst nach kleinen Änderungen nur die geänderten
+    Subjekt-Blöcke neu und übernimmt den Rest aus dem vorigen Snapshot.
+    """
+    if store == "mmap":
+        return _load_mapped(ttl_file, format, cache_dir, parallel, incremental)
+    if not use_cache:
+        return _parse(ttl_file, format, store, parallel)
+
+    digest = file_digest(ttl_file)
+    snap = snapshot_path_for(ttl_file, digest, cache_dir)
+    g = read_snapshot(snap, digest, store=_make_store(store))
+    if g is not None:
+        return g
+
+    incremental = incremental and format in ("turtle", "ttl")
+    loaded = _load_incremental(ttl_file, snap, _make_store(store), cache_dir) if incremental else None
+    if loaded is not None:
+        g, block_index = loaded
+    else:
+        g = _parse(ttl_file, format, store, parallel)
+        block_index = None
+        if incremental:
+            from ttl_block_index import BlockIndex
+            block_index = BlockIndex.open(ttl_file, cache_dir)
+    try:
+        write_snapshot(g, snap, digest, block_index)
+        _remove_stale_snapshots(ttl_file, snap)
+    except OSError as e:
+        print(f"⚠️  Snapshot konnte nicht geschrieben werden ({snap}): {e}")
+    return g
@@ -0,0 +1,149 @@
+"""
+CSR-Adjazenz (compressed sparse row) für schnelle Nachbarschaftssuche.
+
+Aus den sortierten SPO- und OSP-Spalten eines IntTripleStore (siehe
+triple_store.py) entstehen zwei Adjazenzlisten über den Term-IDs:
+
+    ausgehend  out_ptr[s] .. out_ptr[s + 1]  ->  (out_pred, out_obj)
+    eingehend  in_ptr[o]  .. in_ptr[o + 1]   ->  (in_pred, in_subj)
+
+Die Kanten eines Knotens liegen damit zusammenhängend im Speicher. Die
+Breitensuche in `k_hop` erweitert pro Schritt die ganze Front auf einmal mit
+NumPy-Operationen statt Knoten für Knoten über g.triples.
+
+Verwendung:
+    from graph_cache import load_graph
+    from graph_csr import k_hop_subgraph
+    g = load_graph("MusicHistoryGraph_TwelveToneMusic_Complete.ttl", store="mmap")
+    sub = k_hop_subgraph(g, [mhg.AlbanBerg, mhg.AntonWebern], depth=2,
+                         skip_predicates=[RDF.type], blank_nodes=True)
+"""
+import numpy as np
+from rdflib import Graph
+
+from triple_store import ID_DTYPE, KIND_IRI, IntTripleStore, gather_ranges, row_pointers
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _drop(edges, skip):
+    """Entfernt Kanten, deren Prädikat in `skip` liegt."""
+    if skip is None or not len(edges[1]):
+        return edges
+    keep = ~np.isin(edges[1], skip)
+    return tuple(col[keep] for col in edges)
+
+
+def _unique_triples(s, p, o):
+    if not len(s):
+        return s, p, o
+    spo = np.unique(np.column_stack((s, p, o)), axis=0)
+    return spo[:, 0], spo[:, 1], spo[:, 2]
+
+
+class CSRAdjacency:
+    """Ein- und ausgehende Kanten je Term-ID mit Prädikat."""
+
+    def __init__(self, store):
+        self.store = store
+        s, p, o = store.id_index("spo")
+        o2, s2, p2 = store.id_index("osp")
+        self.kinds = store.terms.kinds()
+        n = len(self.kinds)
+        self.out_ptr = row_pointers(s, n)
+        self.out_pred, self.out_obj = p, o
+        self.in_ptr = row_pointers(o2, n)
+        self.in_pred, self.in_subj = p2, s2
+        self._subj = s
+        self._obj = o2
+
+    @classmethod
+    def from_graph(cls, g):
+        """CSR für einen Graphen; andere Stores werden in einen IntTripleStore kopiert."""
+        store = g.store
+        if not isinstance(store, IntTripleStore):
+            store = IntTripleStore()
+            for triple in g:
+                store.add(triple)
+        return cls(store)
+
+    def ids(self, terms):
+        """Term-IDs der bekannten Terme (unbekannte werden ausgelassen)."""
+        ids = [self.store.terms.id_of(t) for t in terms]
+        return np.array([i for i in ids if i is not None], dtype=np.int64)
+
+    def out_edges(self, nodes):
+        """(s, p, o)-ID-Spalten aller ausgehenden Kanten der Knoten."""
+        e = gather_ranges(self.out_ptr, nodes)
+        return self._subj[e], self.out_pred[e], self.out_obj[e]
+
+    def in_edges(self, nodes):
+        """(s, p, o)-ID-Spalten aller eingehenden Kanten der Knoten."""
+        e = gather_ranges(self.in_ptr, nodes)
+        return self.in_subj[e], self.in_pred[e], self._obj[e]
+
+    def bnode_closure(self, bnodes, skip=None):
+        """
+        Ausgehende Tripel der Blank Nodes `bnodes` und aller darin
+        verschachtelten Blank Nodes (Prädikate in `skip` ausgenommen).
+        Liest die vorberechneten CBDs des Stores (IntTripleStore.closure_ids).
+        """
+        nodes = np.unique(bnodes) if len(bnodes) else _EMPTY
+        return _drop(self.store.closure_ids(nodes), skip)
+
+    def k_hop(self, starts, depth=1, skip_predicates=(), blank_nodes=False):
+        """
+        Breitensuche von mehreren Startknoten bis Tiefe `depth`.
+
+        Gesammelt werden alle ein- und ausgehenden Tripel der Knoten mit
+        Abstand <= depth; weitergegangen wird nur über IRIs. Mit
+        `blank_nodes=True` werden an Kanten hängende Blank Nodes samt
+        verschachtelter Blank Nodes vollständig übernommen.
+        Gibt die (s, p, o)-ID-Spalten ohne Duplikate zurück.
+        """
+        skip = self.ids(skip_predicates) if len(skip_predicates) else None
+        front = np.unique(self.ids(starts))
+        visited = np.zeros(len(self.kinds), dtype=bool)
+        visited[front] = True
+        parts = []
+
+        for step in range(depth + 1):
+            out = _drop(self.out_edges(front), skip)
+            inc = _drop(self.in_edges(front), skip)
+            parts += [out, inc]
+            # Nachbarn: Objekte ausgehender und Subjekte eingehender Kanten
+            neighbours = np.concatenate((out[2], inc[0])).astype(np.int64)
+            if blank_nodes:
+                parts.append(self.bnode_closure(neighbours, skip))
+            if step == depth:
+                break
+            neighbours = neighbours[self.kinds[neighbours] == KIND_IRI]
+            front = np.unique(neighbours[~visited[neighbours]])
+            if not len(front):
+                break
+            visited[front] = True
+
+        s, p, o = (np.concatenate(cols).astype(ID_DTYPE) for cols in zip(*parts))
+        return _unique_triples(s, p, o)
+
+    def to_graph(self, s, p, o, namespaces=None, out=None):
+        """Baut aus ID-Spalten einen rdflib-Graphen (oder schreibt nach `out`, z. B. TripleWriter)."""
+        sub = Graph() if out is None else out
+        for prefix, ns in namespaces or ():
+            sub.bind(prefix, ns)
+        term = self.store.terms.term
+        for triple in zip(s.tolist(), p.tolist(), o.tolist()):
+            sub.add(tuple(term(i) for i in triple))
+        return sub
+
+
+def k_hop_subgraph(g, starts, depth=1, skip_predicates=(), blank_nodes=False, adjacency=None, out=None):
+    """
+    k-Hop-Nachbarschaft mehrerer Start-URIs als neuer Graph (mit den
+    Namespaces von `g`). Eine vorhandene CSRAdjacency kann über
+    `adjacency` wiederverwendet werden; mit `out` (z. B. ein TripleWriter)
+    werden die Tripel direkt dorthin geschrieben.
+    """
+    adjacency = adjacency or CSRAdjacency.from_graph(g)
+    s, p, o = adjacency.k_hop(starts, depth, skip_predicates, blank_nodes)
+    return adjacency.to_graph(s, p, o, g.namespaces(), out)
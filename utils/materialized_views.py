@@ -0,0 +1,179 @@
+"""
+Materialisierte Sichten auf die häufigsten Joins des Graphen.
+
+    composer_works     Komponist -> Werke        (frbr:creatorOf)
+    work_composers     Werk -> Komponisten       (frbr:creator)
+    work_rowclasses    Werk -> RowClasses        (mhg:actualizedIn, umgekehrt)
+    rowclass_rowforms  RowClass -> RowForms      (mhg:hasRowClass, umgekehrt)
+    rowform_works      RowForm -> Werke          (mhg:manifestedIn)
+
+mhg:actualizedIn und mhg:manifestedIn zeigen entweder direkt auf das Werk
+oder auf einen Blank Node mit Herkunftsangaben:
+
+    mhg:4_3_1_... mhg:manifestedIn [
+        mhg:accordingTo "SerialAnalyzer" ;
+        dcterms:source "FripertingerLackner2015" ;
+        mhg:manifestedIn mhg:Schoenberg_Suite_for_Piano_Op_25 ] .
+
+Die Sichten lösen den Blank Node auf und speichern je Zeile die Herkunft
+(Provenance, None bei direkten Kanten).
+
+Jede Zeile stammt von genau einem benannten Subjekt (dem Subjekt der
+Kante). Änderungen über `add`/`remove` markieren die betroffenen Subjekte;
+deren Zeilen werden beim nächsten Lesen neu abgeleitet, alle anderen
+bleiben unverändert. Änderungen direkt am Graphen vorbei meldet man mit
+`invalidate(subjekte)`.
+
+Verwendung:
+    from materialized_views import MaterializedViews
+    views = MaterializedViews.for_graph(g)
+    views.values("composer_works", mhg.AlbanBerg)     # {Werk: {Provenance, ...}}
+    views.add((mhg.AlbanBerg, frbr.creatorOf, mhg.Berg_Lulu))
+"""
+import weakref
+from collections import namedtuple
+
+from rdflib import BNode, Namespace
+
+mhg = Namespace("http://music-history-graph.ch/twelve-tone-onto#")
+frbr = Namespace("http://purl.org/vocab/frbr/core/")
+dcterms = Namespace("http://purl.org/dc/terms/")
+
+Provenance = namedtuple("Provenance", "according_to source")
+
+# Name -> (Prädikat, umgekehrt): umgekehrte Sichten sind nach dem Objekt geschlüsselt
+VIEWS = {
+    "composer_works": (frbr.creatorOf, False),
+    "work_composers": (frbr.creator, False),
+    "work_rowclasses": (mhg.actualizedIn, True),
+    "rowclass_rowforms": (mhg.hasRowClass, True),
+    "rowform_works": (mhg.manifestedIn, False),
+}
+
+
+def _description(g, node):
+    """Tripel eines Blank Nodes; mit IntTripleStore aus den vorberechneten CBDs (ein Zugriff)."""
+    cbd = getattr(g.store, "cbd", None)
+    return list(cbd(node)) if cbd is not None else list(g.triples((node, None, None)))
+
+
+def _resolve(g, node, predicate):
+    """Ziele und Provenance eines eingebetteten Blank Nodes."""
+    according_to = source = None
+    targets = []
+    for s, p, o in _description(g, node):
+        if s != node:
+            continue
+        if p == mhg.accordingTo:
+            according_to = o
+        elif p == dcterms.source:
+            source = o
+        elif p == predicate and not isinstance(o, BNode):
+            targets.append(o)
+    prov = Provenance(according_to, source)
+    return [(t, prov) for t in targets]
+
+
+def derive_rows(g, subject):
+    """Alle Sichtzeilen (Sicht, Schlüssel, Wert, Provenance), die von `subject` ausgehen."""
+    rows = []
+    for name, (predicate, inverse) in VIEWS.items():
+        for target in g.objects(subject, predicate):
+            if isinstance(target, BNode):
+                targets = _resolve(g, target, predicate)
+            else:
+                targets = [(target, None)]
+            for value, prov in targets:
+                key, value = (value, subject) if inverse else (subject, value)
+                rows.append((name, key, value, prov))
+    return list(dict.fromkeys(rows))
+
+
+class MaterializedViews:
+    """Sichten aus VIEWS über einem Graphen, inkrementell gepflegt."""
+
+    _by_graph = weakref.WeakKeyDictionary()
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._tables = {name: {} for name in VIEWS}
+        self._rows_of = {}
+        # geordnet, damit die Tabellen der Reihenfolge im Graphen folgen
+        self._dirty = {}
+        for predicate, _ in VIEWS.values():
+            for subject in graph.subjects(predicate, None, unique=True):
+                if not isinstance(subject, BNode):
+                    self._dirty[subject] = None
+        self.refresh()
+
+    @classmethod
+    def for_graph(cls, graph, rebuild=False):
+        """Sichten zu `graph`, beim ersten Aufruf aufgebaut und danach wiederverwendet."""
+        views = None if rebuild else cls._by_graph.get(graph)
+        if views is None:
+            views = cls._by_graph[graph] = cls(graph)
+        return views
+
+    # --- Pflege --------------------------------------------------------
+
+    def _roots(self, node):
+        """Benannte Subjekte, von denen aus `node` erreichbar ist (node selbst, falls benannt)."""
+        if not isinstance(node, BNode):
+            return {node}
+        return {s for s in self.graph.subjects(None, node) if not isinstance(s, BNode)}
+
+    def invalidate(self, subjects):
+        """Markiert Subjekte (oder Blank Nodes in deren Block) zur Neuableitung."""
+        for subject in subjects:
+            self._dirty.update(dict.fromkeys(self._roots(subject)))
+
+    def refresh(self):
+        """Leitet die Zeilen aller markierten Subjekte neu ab."""
+        dirty, self._dirty = self._dirty, {}
+        for subject in dirty:
+            for name, key, value, prov in self._rows_of.pop(subject, ()):
+                table = self._tables[name]
+                provs = table[key][value]
+                provs.discard(prov)
+                if not provs:
+                    del table[key][value]
+                    if not table[key]:
+                        del table[key]
+            rows = derive_rows(self.graph, subject)
+            if rows:
+                self._rows_of[subject] = rows
+            for name, key, value, prov in rows:
+                self._tables[name].setdefault(key, {}).setdefault(value, set()).add(prov)
+
+    def add(self, triple):
+        """Fügt ein Tripel zum Graphen hinzu und markiert das betroffene Subjekt."""
+        self.graph.add(triple)
+        self.invalidate([triple[0]])
+
+    def addN(self, triples):
+        for triple in triples:
+            self.add(triple)
+
+    def remove(self, pattern):
+        """Entfernt alle Tripel zum Muster und markiert die betroffenen Subjekte."""
+        # Vor dem Entfernen auflösen, solange die Verweise auf Blank Nodes noch bestehen
+        self.invalidate({s for s, _, _ in self.graph.triples(pattern)})
+        self.graph.remove(pattern)
+
+    # --- Lesen ---------------------------------------------------------
+
+    def table(self, name):
+        """Die ganze Sicht: {Schlüssel: {Wert: {Provenance, ...}}}."""
+        self.refresh()
+        return self._tables[name]
+
+    def values(self, name, key):
+        """{Wert: {Provenance, ...}} einer Sicht für einen Schlüssel (leer, falls unbekannt)."""
+        return self.table(name).get(key, {})
+
+    def rows(self, name):
+        """(Schlüssel, Wert, Provenance) aller Zeilen einer Sicht."""
+        for key, values in self.table(name).items():
+            for value, provs in values.items():
+                for prov in provs:
+                    yield key, value, prov
@@ -0,0 +1,275 @@
+"""
+Gemeinsame Kommandozeile für die Werkzeuge des Music History Graph.
+
+Jeder Unterbefehl importiert seine Abhängigkeiten (rdflib, requests, ...)
+erst beim Aufruf. Befehle ohne Graph-Laden wie `count-types` und
+`check-dates` starten daher ohne rdflib.
+
+Verwendung:
+    python utils/mhg.py count-types MusicHistoryGraph_TwelveToneMusic_Complete.ttl
+    python utils/mhg.py check-dates MusicHistoryGraph_TwelveToneMusic_Complete.ttl
+    python utils/mhg.py extract-subgraph MusicHistoryGraph_TwelveToneMusic_Complete.ttl \\
+        --ids AlbanBerg,AB_Lulu --modes composer,work
+    python utils/mhg.py extract-subgraph MusicHistoryGraph_TwelveToneMusic_Complete.ttl \\
+        --seeds seeds.txt --output-dir subgraphs
+    python utils/mhg.py export-graphml MusicHistoryGraph_TwelveToneMusic.ttl MHG_TwelveToneMusic_Yed.graphml
+    python utils/mhg.py enrich-wikidata --json output.json --composers Composers.ttl
+    python utils/mhg.py canonize MusicHistoryGraph_TwelveToneMusic_NEW.ttl
+    python utils/mhg.py serve MusicHistoryGraph_TwelveToneMusic_Complete.ttl --port 3030
+    python utils/mhg.py connect MusicHistoryGraph_TwelveToneMusic_Complete.ttl AlbanBerg AntonWebern -k 3
+    python utils/mhg.py row-catalogue --graph MusicHistoryGraph_TwelveToneMusic_Complete.ttl --unused -o unused.ttl
+    python utils/mhg.py annotate-forms MusicHistoryGraph_TwelveToneMusic_Complete.ttl -o rowform_labels.ttl
+"""
+import argparse
+import sys
+
+
+def _split(value):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def cmd_count_types(args):
+    from Count_types import count_entity_types
+    count_entity_types(args.ttl)
+
+
+def cmd_check_dates(args):
+    from date_checker import check_dates
+    return 1 if check_dates(args.ttl) else 0
+
+
+def cmd_extract_subgraph(args):
+    from graph_cache import load_graph
+    from subgraph_extract import (default_output_name, extract_batch, extract_to_file, parse_modes,
+                                  parse_seed_file)
+
+    try:
+        modes = parse_modes(args.modes)
+        seeds = parse_seed_file(args.seeds, modes) if args.seeds else None
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    if seeds is not None:
+        results = extract_batch(args.ttl, seeds, args.output_dir, args.combined, args.workers,
+                                suffix="." + args.format)
+        for local_id, out_file, n in results:
+            print(f"  {local_id}: {n} Triples -> {out_file}")
+        print(f"✅ {len(results)} Subgraphen extrahiert")
+        return
+
+    ids = _split(args.ids)
+    g = load_graph(args.ttl, store=args.store)
+    out_file = args.output or default_output_name(ids, "." + args.format)
+    n = extract_to_file(g, ids, modes, out_file)
+    print(f"✅ Subgraph gespeichert als: {out_file} ({n} Triples)")
+
+
+def cmd_export_graphml(args):
+    from TTLtoGraphmlYed import ttl_to_graphml
+    ttl_to_graphml(args.ttl, args.graphml)
+
+
+def cmd_enrich_wikidata(args):
+    from TTLtoTTL_UpdateWikidata import enrich_composers
+    enrich_composers(args.json, args.composers, args.output)
+
+
+def cmd_canonize(args):
+    from Unify_work_titles import canonize
+    canonize(args.ttl, args.output, args.log, args.review)
+
+
+def cmd_serve(args):
+    from sparql_server import serve
+    serve(args.ttl, args.host, args.port, args.socket, args.store, args.cache_entries)
+
+
+def _entity(g, value):
+    """Lokale ID (mhg:), Präfix-Name (frbr:creatorOf) oder volle IRI."""
+    from rdflib import URIRef
+    from subgraph_extract import mhg
+    if "://" in value:
+        return URIRef(value)
+    if ":" in value:
+        return g.namespace_manager.expand_curie(value)
+    return mhg[value]
+
+
+def cmd_connect(args):
+    from connection_paths import describe_path, find_connections
+    from graph_cache import load_graph
+    from triple_writer import TripleWriter, is_stream_path
+
+    g = load_graph(args.ttl, store=args.store)
+    try:
+        source, target = _entity(g, args.source), _entity(g, args.target)
+        predicates = [_entity(g, p) for p in _split(args.predicates)] if args.predicates else None
+        paths, sub = find_connections(g, source, target, k=args.k, predicates=predicates,
+                                      max_length=args.max_length)
+    except (KeyError, ValueError) as e:
+        raise SystemExit(e.args[0])
+    if not paths:
+        print(f"⚠️  Keine Verbindung mit höchstens {args.max_length} Schritten gefunden")
+        return 1
+    for i, path in enumerate(paths, start=1):
+        print(f"{i}. ({len(path) - 1} Schritte) {describe_path(sub, path)}")
+    if args.output:
+        if is_stream_path(args.output):
+            with TripleWriter(args.output) as out:
+                out.addN((s, p, o, sub) for s, p, o in sub)
+        else:
+            sub.serialize(args.output, format="turtle")
+        print(f"✅ Subgraph gespeichert als: {args.output} ({len(sub)} Triples)")
+
+
+def cmd_row_catalogue(args):
+    import numpy as np
+    from row_catalogue import RowClassCatalogue
+
+    catalogue = RowClassCatalogue.load(args.catalogue)
+    if catalogue is None:
+        print("⏳ Katalog wird aufgebaut (11! Reihen) ...")
+        catalogue = RowClassCatalogue.build(args.workers)
+        catalogue.save(args.catalogue)
+        print(f"✅ Katalog gespeichert als: {args.catalogue}")
+    print(f"RowClasses: {len(catalogue)}")
+    for size, count in sorted(catalogue.orbit_histogram().items()):
+        print(f"  Orbitgröße {size:2}: {count} Klassen")
+
+    keys = catalogue.keys
+    if args.graph:
+        from graph_cache import load_graph
+        from row_classes import RowClassIndex
+        index = RowClassIndex.for_graph(load_graph(args.graph, store=args.store))
+        print(f"Im Graphen: {len(index)} RowClasses")
+        if args.unused:
+            keys = catalogue.unused(index)
+    elif args.unused:
+        raise SystemExit("--unused braucht --graph")
+    if args.orbit:
+        keys = keys[np.isin(keys, catalogue.keys[catalogue.orbits == args.orbit])]
+    if args.limit is not None:
+        keys = keys[:args.limit]
+    if args.output:
+        n = catalogue.write_ttl(args.output, keys)
+        print(f"✅ {n} RowClasses gespeichert als: {args.output}")
+
+
+def cmd_annotate_forms(args):
+    from rdflib import Graph
+    from form_labels import annotate_graph
+    from graph_cache import load_graph
+    from row_classes import mhg
+    from triple_writer import TripleWriter, is_stream_path
+
+    g = load_graph(args.ttl, store=args.store)
+    if is_stream_path(args.output):
+        with TripleWriter(args.output) as out:
+            n = annotate_graph(g, out)
+            count = len(out)
+    else:
+        out = Graph()
+        out.bind("mhg", mhg)
+        n = annotate_graph(g, out)
+        count = len(out)
+        out.serialize(args.output, format="turtle")
+    print(f"✅ {n} RowForms annotiert, gespeichert als: {args.output} ({count} Triples)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mhg", description="Werkzeuge für den Music History Graph")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("count-types", help="RDF-Typen (mhg:composer, ...) zählen")
+    p.add_argument("ttl")
+    p.set_defaults(func=cmd_count_types)
+
+    p = sub.add_parser("check-dates", help="xsd:date-Literale prüfen")
+    p.add_argument("ttl")
+    p.set_defaults(func=cmd_check_dates)
+
+    p = sub.add_parser("extract-subgraph", help="Subgraph um Komponisten, Werke oder RowClasses")
+    p.add_argument("ttl")
+    seeds = p.add_mutually_exclusive_group(required=True)
+    seeds.add_argument("--ids", help="lokale IDs ohne Präfix, durch Komma getrennt")
+    seeds.add_argument("--seeds", help="Seed-Datei für den Batch-Modus (siehe subgraph_extract.py)")
+    p.add_argument("--modes", default="composer,work,rowClass",
+                   help="composer, work und/oder rowClass, durch Komma getrennt "
+                        "(im Batch-Modus für Zeilen ohne eigene Modi)")
+    p.add_argument("-o", "--output", help="Ausgabedatei (Standard: subgraph_<ids>.<format>); "
+                                            ".nt/.nq[.gz] wird gestreamt")
+    p.add_argument("--format", default="ttl", choices=("ttl", "nt", "nt.gz", "nq", "nq.gz"),
+                   help="Endung der Standard-Ausgabedateien")
+    p.add_argument("--store", default="mmap", choices=("default", "int", "mmap"))
+    p.add_argument("--output-dir", default=".", help="Batch: Verzeichnis für eine Datei pro Seed")
+    p.add_argument("--combined", help="Batch: alle Subgraphen in diese eine Datei schreiben")
+    p.add_argument("--workers", type=int, help="Batch: Anzahl Prozesse (Standard: alle Kerne)")
+    p.set_defaults(func=cmd_extract_subgraph)
+
+    p = sub.add_parser("export-graphml", help="GraphML für yEd erzeugen")
+    p.add_argument("ttl")
+    p.add_argument("graphml")
+    p.set_defaults(func=cmd_export_graphml)
+
+    p = sub.add_parser("enrich-wikidata", help="Komponistenblöcke mit Lebensdaten aus Wikidata erzeugen")
+    p.add_argument("--json", default="output.json")
+    p.add_argument("--composers", default="Composers.ttl")
+    p.add_argument("-o", "--output", default="Composers_updated_with_multiple_works.ttl")
+    p.set_defaults(func=cmd_enrich_wikidata)
+
+    p = sub.add_parser("canonize", help="Werk-URIs sicher kanonisieren")
+    p.add_argument("ttl")
+    p.add_argument("-o", "--output", default="MusicHistoryGraph_TwelveToneMusic_CANONIZED_SAFE.ttl")
+    p.add_argument("--log", default="Canonization_Log_safe.csv")
+    p.add_argument("--review", default="Canonization_Review.csv")
+    p.set_defaults(func=cmd_canonize)
+
+    p = sub.add_parser("serve", help="lokaler SPARQL-Endpunkt, der den Graphen geladen hält")
+    p.add_argument("ttl")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=3030)
+    p.add_argument("--socket", help="Unix-Socket statt TCP")
+    p.add_argument("--store", default="mmap", choices=("default", "int", "mmap"))
+    p.add_argument("--cache-entries", type=int, default=256, help="Größe des Ergebnis-Caches (0 = aus)")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("connect", help="kürzeste Verbindungen zwischen zwei Entitäten")
+    p.add_argument("ttl")
+    p.add_argument("source", help="lokale ID (ohne Präfix), Präfix-Name oder IRI")
+    p.add_argument("target")
+    p.add_argument("-k", type=int, default=3, help="Anzahl der kürzesten Verbindungen")
+    p.add_argument("--predicates", help="nur diese Prädikate begehen, durch Komma getrennt "
+                                        "(z. B. frbr:creatorOf,mhg:manifestedIn,owl:sameAs)")
+    p.add_argument("--max-length", type=int, default=10, help="höchstens so viele Schritte")
+    p.add_argument("-o", "--output", help="Subgraph der Verbindungen speichern (.ttl oder .nt/.nq[.gz])")
+    p.add_argument("--store", default="mmap", choices=("default", "int", "mmap"))
+    p.set_defaults(func=cmd_connect)
+
+    p = sub.add_parser("row-catalogue", help="Katalog aller RowClasses (12! Reihen) aufbauen und auswählen")
+    p.add_argument("--catalogue", default=".mhg_cache/rowclass_catalogue.npz", help="Katalogdatei (.npz)")
+    p.add_argument("--workers", type=int, help="Anzahl Prozesse beim Aufbau (Standard: alle Kerne)")
+    p.add_argument("--graph", help="TTL-Datei, deren RowClasses verglichen werden")
+    p.add_argument("--unused", action="store_true", help="nur Klassen, die im Graphen fehlen")
+    p.add_argument("--orbit", type=int, help="nur Klassen mit dieser Orbitgröße (z. B. 24 = symmetrisch)")
+    p.add_argument("--limit", type=int, help="höchstens so viele Klassen ausgeben")
+    p.add_argument("-o", "--output", help="ausgewählte Klassen als TTL speichern (wie RowFormGenerator.py)")
+    p.add_argument("--store", default="mmap", choices=("default", "int", "mmap"))
+    p.set_defaults(func=cmd_row_catalogue)
+
+    p = sub.add_parser("annotate-forms", help="RowForms mit Form-Label (P0 … RI11) und Transpositionsstufe versehen")
+    p.add_argument("ttl")
+    p.add_argument("-o", "--output", default="rowform_labels.ttl",
+                   help="Ausgabedatei für die Annotationen (.ttl oder .nt/.nq[.gz])")
+    p.add_argument("--store", default="mmap", choices=("default", "int", "mmap"))
+    p.set_defaults(func=cmd_annotate_forms)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
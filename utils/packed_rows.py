@@ -0,0 +1,148 @@
+"""
+Zwölftonreihen und Intervallmuster als gepackte uint64-Zahlen.
+
+Jeder Ton (bzw. jedes Intervall) belegt 4 Bit, der erste Ton die höchsten:
+
+    1_3_1_6_11_5_4_2_9_2_6      (Intervallmuster, 11 × 4 = 44 Bit)
+    0_1_4_5_11_10_3_7_9_6_8_2   (Reihe, 12 × 4 = 48 Bit)
+
+Weil alle Werte kleiner als 16 sind, entspricht der Zahlenvergleich dem
+lexikographischen Vergleich der Tonfolgen: Sortieren, Minimum und
+Gleichheit funktionieren direkt auf den Zahlen bzw. uint64-Arrays, ohne
+Strings oder Listen.
+
+Transposition, Inversion und Krebs arbeiten vektorisiert über
+Nachschlagetabellen für je 16 Bit (4 Töne); eine Reihe braucht also drei
+Tabellenzugriffe statt zwölf Einzelschritte.
+
+Verwendung:
+    from packed_rows import from_local_names, to_local_names, transpose, invert, retrograde
+    rows = from_local_names(["0_1_4_5_11_10_3_7_9_6_8_2"])
+    to_local_names(retrograde(transpose(rows, 3)))
+    pack_name("1_3_1_6_11_5_4_2_9_2_6")              # einzelner Schlüssel (int)
+"""
+import numpy as np
+
+ROW_LENGTH = 12
+INTERVAL_LENGTH = 11
+
+_CHUNK = np.arange(1 << 16, dtype=np.uint32)
+_NIBBLES = np.stack([(_CHUNK >> shift) & 0xF for shift in (12, 8, 4, 0)], axis=1)
+_TOKENS = np.array([str(n) for n in range(16)])
+
+
+def _from_nibbles(nibbles):
+    return ((nibbles[:, 0] << 12) | (nibbles[:, 1] << 8) | (nibbles[:, 2] << 4) | nibbles[:, 3]).astype(np.uint16)
+
+
+# Werte >= 12 sind keine Tonhöhenklassen und bleiben unverändert
+_TRANSPOSE = np.stack([_from_nibbles(np.where(_NIBBLES < 12, (_NIBBLES + t) % 12, _NIBBLES)) for t in range(12)])
+_INVERT = _from_nibbles(np.where(_NIBBLES < 12, (12 - _NIBBLES) % 12, _NIBBLES))
+_REVERSE = _from_nibbles(_NIBBLES[:, ::-1])
+
+
+def mask(length=ROW_LENGTH):
+    return np.uint64((1 << (4 * length)) - 1)
+
+
+def _chunks(packed):
+    packed = np.asarray(packed, dtype=np.uint64)
+    return (packed >> np.uint64(32)) & np.uint64(0xFFFF), (packed >> np.uint64(16)) & np.uint64(0xFFFF), \
+        packed & np.uint64(0xFFFF)
+
+
+def _join(high, mid, low):
+    return (high.astype(np.uint64) << np.uint64(32)) | (mid.astype(np.uint64) << np.uint64(16)) | low.astype(np.uint64)
+
+
+def _apply(table, packed):
+    return _join(*(table[c] for c in _chunks(packed)))
+
+
+# --- Umwandlung ---------------------------------------------------------------
+
+def pack(values):
+    """(..., L)-Array von Tönen/Intervallen -> (...)-uint64-Array."""
+    values = np.asarray(values, dtype=np.uint64)
+    length = values.shape[-1]
+    shifts = np.uint64(4) * np.arange(length - 1, -1, -1, dtype=np.uint64)
+    return np.bitwise_or.reduce(values << shifts, axis=-1)
+
+
+def unpack(packed, length=ROW_LENGTH):
+    """(...)-uint64-Array -> (..., L)-uint8-Array."""
+    packed = np.asarray(packed, dtype=np.uint64)
+    shifts = np.uint64(4) * np.arange(length - 1, -1, -1, dtype=np.uint64)
+    return ((packed[..., None] >> shifts) & np.uint64(0xF)).astype(np.uint8)
+
+
+def pack_name(name):
+    """Lokaler Name ("1_3_1_...", auch mit "mhg:") -> int; erhält die lexikographische Ordnung."""
+    value = 0
+    for part in name.replace("mhg:", "").split("_"):
+        value = (value << 4) | int(part)
+    return value
+
+
+def from_local_names(names):
+    """Lokale Namen -> uint64-Array."""
+    return np.fromiter((pack_name(n) for n in names), dtype=np.uint64, count=len(names))
+
+
+def to_local_names(packed, length=ROW_LENGTH):
+    """uint64-Array (oder eine Zahl) -> Liste lokaler Namen wie "0_1_4_5_..."."""
+    digits = _TOKENS[unpack(np.atleast_1d(packed), length)]
+    return ["_".join(row) for row in digits.tolist()]
+
+
+# --- Operationen (vektorisiert) -------------------------------------------------
+
+def transpose(rows, n):
+    """Transposition um `n` Halbtöne (n darf ein Array sein)."""
+    high, mid, low = _chunks(rows)
+    t = np.asarray(n, dtype=np.int64) % 12
+    return _join(_TRANSPOSE[t, high], _TRANSPOSE[t, mid], _TRANSPOSE[t, low])
+
+
+def invert(packed, length=ROW_LENGTH):
+    """Umkehrung jedes Tons bzw. Intervalls um 0 (v -> -v mod 12)."""
+    return _apply(_INVERT, packed) & mask(length)
+
+
+def retrograde(packed, length=ROW_LENGTH):
+    """Krebs: umgekehrte Reihenfolge der `length` Töne bzw. Intervalle."""
+    padded = np.asarray(packed, dtype=np.uint64) << np.uint64(4 * (ROW_LENGTH - length))
+    high, mid, low = _chunks(padded)
+    return _join(_REVERSE[low], _REVERSE[mid], _REVERSE[high])
+
+
+def first(rows):
+    """Anfangston jeder Reihe."""
+    return (np.asarray(rows, dtype=np.uint64) >> np.uint64(44)).astype(np.uint8)
+
+
+def intervals(rows):
+    """Intervallmuster (11 Intervalle, 44 Bit) jeder Reihe."""
+    pcs = unpack(rows).astype(np.int16)
+    return pack(np.diff(pcs, axis=-1) % 12)
+
+
+def rows_from_intervals(patterns, start=0):
+    """Reihen zu Intervallmustern mit Anfangston `start` (Skalar oder Array)."""
+    steps = unpack(patterns, INTERVAL_LENGTH).astype(np.int64)
+    offsets = np.concatenate((np.zeros(steps.shape[:-1] + (1,), dtype=np.int64), np.cumsum(steps, axis=-1)), axis=-1)
+    return pack((offsets + np.asarray(start, dtype=np.int64)[..., None]) % 12)
+
+
+def forms48(rows):
+    """
+    Alle 48 Formen jeder Reihe, (N,) -> (N, 48), in der Reihenfolge von
+    RowFormGenerator.generate_row_forms: P0-P11, I0-I11 (Index = Anfangston),
+    R0-R11, RI0-RI11 (Krebs von P_n bzw. I_n).
+    """
+    rows = np.atleast_1d(np.asarray(rows, dtype=np.uint64))
+    n = np.arange(12)
+    start = first(rows).astype(np.int64)[:, None]
+    prime = transpose(rows[:, None], n - start)
+    inversion = transpose(invert(rows)[:, None], n + start)
+    return np.concatenate((prime, inversion, retrograde(prime), retrograde(inversion)), axis=1)
@@ -0,0 +1,160 @@
+"""
+Paralleles Parsen großer Turtle-Dateien.
+
+Die Datei wird an sicheren Statement-Grenzen (ein "." auf oberster Ebene,
+außerhalb von Strings, IRIs und Kommentaren) in Chunks zerlegt. Jeder Chunk
+erhält alle vorher gültigen @prefix/@base-Direktiven als Kopf und wird in
+einem eigenen Prozess von rdflib geparst. Die Ergebnisse werden im
+Hauptprozess zu einem Graphen zusammengeführt; mit einem IntTripleStore
+werden dabei nur die Termtabellen interniert und die ID-Arrays gebündelt
+übernommen (IntTripleStore.add_ids), statt jedes Tripel einzeln einzufügen.
+
+Blank Nodes:
+- anonyme Knoten ([ ... ]) gehören immer zu genau einem Statement und
+  bleiben daher chunk-lokal;
+- benannte Knoten (_:b1) gelten in Turtle für das ganze Dokument. Sie werden
+  vor dem Parsen in Platzhalter-IRIs umgeschrieben und beim Zusammenführen
+  wieder auf genau einen BNode pro Label abgebildet.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from rdflib import BNode, Graph, URIRef
+
+from graph_cache import pack_triples, unpack_term, unpack_triples
+from triple_store import IntTripleStore
+
+BNODE_LABEL_NS = "urn:x-mhg-bnode-label:"
+MIN_CHUNK_SIZE = 256 * 1024
+
+_TOKEN = re.compile(r'''
+    (?P<lstring>"""(?:[^"\\]|\\.|"(?!""))*"""|\'\'\'(?:[^'\\]|\\.|'(?!''))*\'\'\')
+  | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<iri><[^<>"{}|^`\\\s]*>)
+  | (?P<comment>\#[^\n]*)
+  | (?P<bnode>_:[A-Za-z0-9_](?:[\w.-]*[\w-])?)
+  | (?P<open>[\[(])
+  | (?P<close>[\])])
+  | (?P<end>\.(?=\s|\#|$))
+''', re.X | re.S)
+
+_SKIP = re.compile(r"(?:\s+|#[^\n]*)*")
+_SPARQL_DIRECTIVE = re.compile(r"(?i:PREFIX|BASE)\s[^<\n]*<[^>]*>")
+
+
+def iter_statements(text):
+    """
+    Zerlegt Turtle-Text in Statements.
+    Liefert (start, end, is_directive) als Zeichenpositionen in `text`.
+    """
+    pos, n = 0, len(text)
+    while True:
+        pos = _SKIP.match(text, pos).end()
+        if pos >= n:
+            return
+        m = _SPARQL_DIRECTIVE.match(text, pos)
+        if m:
+            yield pos, m.end(), True
+            pos = m.end()
+            continue
+
+        end, depth = n, 0
+        for tok in _TOKEN.finditer(text, pos):
+            kind = tok.lastgroup
+            if kind == "open":
+                depth += 1
+            elif kind == "close":
+                depth -= 1
+            elif kind == "end" and depth == 0:
+                end = tok.end()
+                break
+        yield pos, end, text.startswith("@", pos)
+        pos = end
+
+
+def split_chunks(text, n_chunks):
+    """
+    Teilt den Text in höchstens etwa `n_chunks` parsebare Chunks.
+    Jeder Chunk ist ein eigenständiger Turtle-Text mit Direktiven-Kopf.
+    """
+    target = max(MIN_CHUNK_SIZE, len(text) // max(1, n_chunks))
+    directives = []
+    chunks = []
+    chunk_start, chunk_header = None, ""
+    for start, end, is_directive in iter_statements(text):
+        if chunk_start is None:
+            chunk_start, chunk_header = start, "\n".join(directives)
+        if is_directive:
+            directives.append(text[start:end])
+        if end - chunk_start >= target:
+            chunks.append(chunk_header + "\n" + text[chunk_start:end] + "\n")
+            chunk_start = None
+    if chunk_start is not None:
+        chunks.append(chunk_header + "\n" + text[chunk_start:] + "\n")
+    return chunks
+
+
+def _label_bnodes(chunk):
+    """Schreibt benannte Blank Nodes (_:x) in Platzhalter-IRIs um."""
+    if "_:" not in chunk:
+        return chunk
+
+    def repl(m):
+        if m.lastgroup == "bnode":
+            return f"<{BNODE_LABEL_NS}{m.group()[2:]}>"
+        return m.group()
+
+    return _TOKEN.sub(repl, chunk)
+
+
+def _parse_chunk(args):
+    chunk, public_id = args
+    g = Graph()
+    g.parse(data=_label_bnodes(chunk), format="turtle", publicID=public_id)
+    terms, id_bytes = pack_triples(g)
+    return [(prefix, str(ns)) for prefix, ns in g.namespaces()], terms, id_bytes
+
+
+def parse_parallel(ttl_file, workers=None, store="default"):
+    """
+    Parst eine Turtle-Datei mit einem Prozesspool und gibt einen
+    rdflib-Graphen zurück. Kleine Dateien werden direkt geparst.
+    Schnell ist vor allem store=IntTripleStore(): andere Stores erhalten die
+    Tripel einzeln über addN, was den Gewinn der Worker großteils aufzehrt.
+    """
+    workers = workers or os.cpu_count() or 1
+    text = Path(ttl_file).read_text(encoding="utf-8")
+    public_id = Path(ttl_file).resolve().as_uri()
+    g = Graph(store=store)
+
+    chunks = split_chunks(text, workers * 4) if workers > 1 else [text]
+    if len(chunks) <= 1:
+        g.parse(data=text, format="turtle", publicID=public_id)
+        return g
+    del text
+
+    labelled = {}
+
+    def resolve(term):
+        if isinstance(term, URIRef) and term.startswith(BNODE_LABEL_NS):
+            label = term[len(BNODE_LABEL_NS):]
+            node = labelled.get(label)
+            if node is None:
+                node = labelled[label] = BNode()
+            return node
+        return term
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_parse_chunk, ((c, public_id) for c in chunks))
+        for namespaces, packed, id_bytes in results:
+            for prefix, ns in namespaces:
+                g.bind(prefix, ns, override=True)
+            terms = [resolve(unpack_term(enc)) for enc in packed]
+            if isinstance(g.store, IntTripleStore):
+                g.store.add_ids(terms, np.frombuffer(id_bytes, dtype=np.uint32))
+            else:
+                g.addN((s, p, o, g) for s, p, o in unpack_triples(terms, id_bytes))
+    return g
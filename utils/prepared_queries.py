@@ -0,0 +1,182 @@
+"""
+Vorbereitete, parametrisierte SPARQL-Abfragen.
+
+Jede Abfrage wird einmal pro Prozess geparst und in die SPARQL-Algebra
+übersetzt (rdflib.plugins.sparql.prepareQuery). Parameter werden beim
+Aufruf übergeben statt in den Abfragetext eingesetzt:
+
+  - Einzelwerte (z. B. die Jahresgrenze ?cutoff in einem FILTER) als
+    rdflib-initBindings.
+  - Wertemengen für einen VALUES-Block. Der VALUES-Block im Text enthält
+    die Standardwerte; beim Aufruf werden nur seine Zeilen in einer Kopie
+    des betroffenen Algebra-Pfads ersetzt. Die zwischengespeicherte Algebra
+    bleibt unverändert und kann von mehreren Threads genutzt werden.
+
+Verwendung:
+    from prepared_queries import run_query
+    sub = run_query(g, "composer_works", composer=[mhg.AlbanBerg, mhg.AntonWebern]).graph
+    sub = run_query(g, "works_before", cutoff=1960).graph
+"""
+from rdflib import Namespace
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.sparql import Query
+from rdflib.term import Identifier, Literal
+
+import year_index
+
+# die Abfragen nutzen mhgfn:-Funktionen (siehe year_index.py)
+year_index.register()
+
+mhg = Namespace("http://music-history-graph.ch/twelve-tone-onto#")
+frbr = Namespace("http://purl.org/vocab/frbr/core/")
+schema = Namespace("https://schema.org/")
+
+NAMESPACES = {
+    "mhg": mhg,
+    "frbr": frbr,
+    "schema": schema,
+    "xsd": Namespace("http://www.w3.org/2001/XMLSchema#"),
+    "mhgfn": year_index.mhgfn,
+}
+
+
+def _term(value):
+    return value if isinstance(value, Identifier) else Literal(value)
+
+
+def _values_nodes(node, path=()):
+    """Pfade zu allen VALUES-Knoten der Algebra mit ihren Variablen."""
+    if isinstance(node, CompValue):
+        if node.name == "values":
+            yield path, frozenset(var for row in node.res for var in row)
+        for key, child in node.items():
+            yield from _values_nodes(child, path + (key,))
+    elif isinstance(node, list):
+        for i, child in enumerate(node):
+            yield from _values_nodes(child, path + (i,))
+
+
+def _replace(node, path, value):
+    """Kopiert die Knoten entlang `path` und setzt am Ende `value` ein."""
+    if not path:
+        return value
+    key = path[0]
+    copy = node.clone() if isinstance(node, CompValue) else list(node)
+    copy[key] = _replace(node[key], path[1:], value)
+    return copy
+
+
+class PreparedSparql:
+    """Eine einmal übersetzte Abfrage mit VALUES- und Einzelwert-Parametern."""
+
+    def __init__(self, name, text, defaults=None, namespaces=NAMESPACES):
+        self.name = name
+        self.text = text
+        self.defaults = dict(defaults or {})
+        self.query = prepareQuery(text, initNs=namespaces)
+        # VALUES-Blöcke mit genau einer Variablen sind als Mengen-Parameter nutzbar
+        self.value_params = {}
+        for path, variables in _values_nodes(self.query.algebra):
+            if len(variables) == 1:
+                (var,) = variables
+                self.value_params[str(var)] = (path, var)
+
+    def bind(self, **params):
+        """
+        Trennt die Parameter in (Query, initBindings): Listen, Tupel und Mengen
+        für VALUES-Variablen ersetzen deren Zeilen, alles andere wird gebunden.
+        """
+        algebra = self.query.algebra
+        bindings = {}
+        for name, value in {**self.defaults, **params}.items():
+            if isinstance(value, (list, tuple, set, frozenset)):
+                if name not in self.value_params:
+                    raise ValueError(f"{self.name}: ?{name} ist keine VALUES-Variable")
+                path, var = self.value_params[name]
+                target = algebra
+                for key in path:
+                    target = target[key]
+                target = target.clone()
+                target["res"] = [{var: _term(v)} for v in value]
+                algebra = _replace(algebra, path, target)
+            else:
+                bindings[name] = _term(value)
+        query = self.query if algebra is self.query.algebra else Query(self.query.prologue, algebra)
+        return query, bindings
+
+    def run(self, graph, **params):
+        """Führt die Abfrage auf `graph` aus (rdflib-Result)."""
+        query, bindings = self.bind(**params)
+        return graph.query(query, initBindings=bindings)
+
+
+# --- Registry -----------------------------------------------------------
+
+QUERY_TEXTS = {
+    # Werke und Werktypen ausgewählter Komponisten (queries_subgraphs/SPARQL_composerABASAW.py)
+    "composer_works": """
+CONSTRUCT {
+  ?composer frbr:creatorOf ?work .
+  ?work a ?workType .
+}
+WHERE {
+  VALUES ?composer {
+    mhg:AlbanBerg
+    mhg:ArnoldSchoenberg
+    mhg:AntonWebern
+  }
+  ?composer a mhg:composer .
+  OPTIONAL { ?composer frbr:creatorOf ?work . }
+  OPTIONAL { ?work a ?workType . }
+}
+""",
+    # Komponisten mit Werken vor ?cutoff (queries_subgraphs/SPARQLviaPython.py)
+    "works_before": """
+CONSTRUCT {
+  ?composer a mhg:composer ;
+            frbr:creatorOf ?work .
+  ?work a ?workType ;
+        frbr:hasCreationDate ?date .
+}
+WHERE {
+  ?composer a mhg:composer .
+  ?composer frbr:creatorOf ?work .
+  OPTIONAL { ?work a ?workType . }
+  OPTIONAL { ?work frbr:hasCreationDate ?date . }
+  FILTER (
+    bound(?date) &&
+    mhgfn:year(?date) < ?cutoff
+  )
+}
+""",
+}
+
+# Standardwerte der Einzelparameter
+QUERY_DEFAULTS = {
+    "works_before": {"cutoff": 1960},
+}
+
+_prepared = {}
+
+
+def register(name, text, defaults=None):
+    """Registriert eine weitere Abfrage; sie wird beim ersten Aufruf übersetzt."""
+    QUERY_TEXTS[name] = text
+    QUERY_DEFAULTS[name] = dict(defaults or {})
+    _prepared.pop(name, None)
+
+
+def prepared(name):
+    """Die übersetzte Abfrage `name` (einmal pro Prozess)."""
+    query = _prepared.get(name)
+    if query is None:
+        if name not in QUERY_TEXTS:
+            raise KeyError(f"Unbekannte Abfrage: {name!r} (bekannt: {', '.join(sorted(QUERY_TEXTS))})")
+        query = _prepared[name] = PreparedSparql(name, QUERY_TEXTS[name], QUERY_DEFAULTS.get(name))
+    return query
+
+
+def run_query(graph, name, **params):
+    """Führt die registrierte Abfrage `name` mit Parametern aus."""
+    return prepared(name).run(graph, **params)
@@ -0,0 +1,154 @@
+"""
+Vollständiger Katalog aller RowClasses des Zwölftonraums.
+
+Alle 12! Reihen, reduziert auf ihre Klassen unter Transposition, Inversion
+und Krebs (siehe row_classes.py). Jede Klasse wird durch ihren kanonischen
+Schlüssel (kleinstes Intervallmuster, gepackt wie in packed_rows.py)
+vertreten; dazu kommt die Orbitgröße, d. h. die Anzahl verschiedener
+Reihenformen (48 oder weniger bei symmetrischen Reihen). Das sind knapp 10
+Millionen Klassen.
+
+Aufbau: Transponiert auf Anfangston 0 entspricht jede Reihe genau einem
+Intervallmuster; es genügt also, die 11! Reihen mit Anfangston 0 zu
+durchlaufen. Die Arbeit wird nach dem zweiten und dritten Ton auf 110 Aufträge
+zu je 9! Reihen verteilt und über einen Prozesspool berechnet. Jeder Auftrag
+behält nur die Muster, die selbst kanonisch sind (P ist das kleinste der vier
+Muster), sodass jede Klasse genau einmal vorkommt und nichts zusammengeführt
+werden muss. Die Orbitgröße ist das Zwölffache der Anzahl verschiedener
+Muster unter P, I, R und RI.
+
+Der Katalog (sortierte Schlüssel und Orbitgrößen) wird als .npz-Datei
+gespeichert, standardmäßig unter .mhg_cache/rowclass_catalogue.npz.
+
+Verwendung:
+    python utils/mhg.py row-catalogue                                  # aufbauen bzw. laden, Übersicht
+    python utils/mhg.py row-catalogue --graph MusicHistoryGraph_TwelveToneMusic_Complete.ttl \\
+        --unused -o unused_rowclasses.ttl
+
+    from row_catalogue import RowClassCatalogue
+    catalogue = RowClassCatalogue.open()
+    catalogue.write_ttl("symmetric.ttl", catalogue.keys[catalogue.orbits < 48])
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+from pathlib import Path
+
+import numpy as np
+
+from graph_cache import CACHE_DIR_NAME
+from packed_rows import INTERVAL_LENGTH, intervals, invert, pack, retrograde, to_local_names, unpack
+
+CATALOGUE_VERSION = 1
+DEFAULT_PATH = Path(CACHE_DIR_NAME) / "rowclass_catalogue.npz"
+
+_permutations = None
+
+
+def _tail_permutations():
+    """Alle 9! Anordnungen von 9 Positionen (einmal pro Prozess)."""
+    global _permutations
+    if _permutations is None:
+        _permutations = np.array(list(permutations(range(9))), dtype=np.uint8)
+    return _permutations
+
+
+def _canonical_in_prefix(prefix):
+    """Kanonische Schlüssel mit Orbitgröße aller Klassen, deren P-Form mit `prefix` (0, a, b) beginnt."""
+    rest = np.array(sorted(set(range(12)) - set(prefix)), dtype=np.uint8)
+    perms = _tail_permutations()
+    rows = np.empty((len(perms), 12), dtype=np.uint8)
+    rows[:, :3] = prefix
+    rows[:, 3:] = rest[perms]
+    p = intervals(pack(rows))
+    i = invert(p, INTERVAL_LENGTH)
+    r = retrograde(p, INTERVAL_LENGTH)
+    ri = retrograde(i, INTERVAL_LENGTH)
+    keep = (p <= i) & (p <= r) & (p <= ri)
+    p, i, r, ri = p[keep], i[keep], r[keep], ri[keep]
+    distinct = 1 + (i != p) + ((r != p) & (r != i)) + ((ri != p) & (ri != i) & (ri != r))
+    return p, (12 * distinct).astype(np.uint8)
+
+
+def build_catalogue(workers=None):
+    """(Schlüssel, Orbitgrößen) aller RowClasses, parallel berechnet und nach Schlüssel sortiert."""
+    prefixes = [(0, a, b) for a in range(1, 12) for b in range(1, 12) if a != b]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        parts = [_canonical_in_prefix(p) for p in prefixes]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_canonical_in_prefix, prefixes))
+    keys = np.concatenate([k for k, _ in parts])
+    orbits = np.concatenate([o for _, o in parts])
+    order = np.argsort(keys, kind="stable")
+    return keys[order], orbits[order]
+
+
+class RowClassCatalogue:
+    """Sortierte kanonische Schlüssel aller RowClasses mit Orbitgrößen."""
+
+    def __init__(self, keys, orbits):
+        self.keys = np.asarray(keys, dtype=np.uint64)
+        self.orbits = np.asarray(orbits, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, workers=None):
+        return cls(*build_catalogue(workers))
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        """Gespeicherter Katalog oder None, wenn er fehlt oder veraltet ist."""
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != CATALOGUE_VERSION:
+                    return None
+                return cls(data["keys"], data["orbits"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, path=DEFAULT_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, version=CATALOGUE_VERSION, keys=self.keys, orbits=self.orbits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def open(cls, path=DEFAULT_PATH, workers=None):
+        """Lädt den Katalog; fehlt er, wird er aufgebaut und gespeichert."""
+        catalogue = cls.load(path)
+        if catalogue is None:
+            catalogue = cls.build(workers)
+            catalogue.save(path)
+        return catalogue
+
+    def orbit_size(self, key):
+        """Orbitgröße zu einem kanonischen Schlüssel (None, falls keiner)."""
+        pos = np.searchsorted(self.keys, np.uint64(key))
+        if pos < len(self.keys) and self.keys[pos] == key:
+            return int(self.orbits[pos])
+        return None
+
+    def orbit_histogram(self):
+        """{Orbitgröße: Anzahl Klassen}."""
+        sizes, counts = np.unique(self.orbits, return_counts=True)
+        return dict(zip(sizes.tolist(), counts.tolist()))
+
+    def unused(self, index):
+        """Schlüssel aller Klassen, die im Graphen (row_classes.RowClassIndex) nicht vorkommen."""
+        return self.keys[~np.isin(self.keys, index.keys)]
+
+    def names(self, keys=None):
+        """Lokale Namen (Intervallmuster) der Klassen."""
+        return to_local_names(self.keys if keys is None else keys, INTERVAL_LENGTH)
+
+    def write_ttl(self, path, keys=None):
+        """Schreibt die gewählten Klassen wie RowFormGenerator.py (RowClass mit ihren RowForms)."""
+        from RowFormGenerator import write_ttl_batch
+        keys = self.keys if keys is None else np.asarray(keys, dtype=np.uint64)
+        return write_ttl_batch(unpack(keys, INTERVAL_LENGTH), path)
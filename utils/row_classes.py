@@ -0,0 +1,136 @@
+"""
+Kanonische RowClass zu beliebigen Reihen oder Intervallmustern in O(1).
+
+Eine RowClass ist nach dem lexikographisch kleinsten ihrer vier
+Intervallmuster benannt (P, I, R, RI; siehe JSONtoTTL_RowClassesForms.py):
+
+    mhg:1_4_11_6_8_3_6_8_9_11_7 a mhg:rowClass .
+
+Mit gepackten Mustern (siehe packed_rows.py) ist das Minimum ein
+Zahlenvergleich, und Inversion und Krebs sind je drei Tabellenzugriffe
+(vektorisiert über ganze Arrays).
+Der kanonische Schlüssel einer Reihe entsteht damit in konstanter Zeit und
+ohne die 48 Formen zu erzeugen. Eine vollständige Tabelle aller 12!/12
+Intervallmuster (rund 40 Millionen) wäre hunderte MB groß und nicht
+schneller.
+
+RowClassIndex legt zusätzlich die im Graphen vorhandenen RowClasses als
+Hashtabelle (Einzelabfrage) und als sortiertes Array (Massenabfrage per
+binärer Suche) ab und beantwortet "zu welcher mhg:rowClass gehört diese
+Reihe?".
+
+Verwendung:
+    from row_classes import RowClassIndex, canonical_name
+    canonical_name("0_1_4_5_11_10_3_7_9_6_8_2")        # "1_3_1_6_11_5_4_2_9_2_6"
+    index = RowClassIndex.for_graph(g)
+    index.lookup("1_8_7_4_0_6_9_5_11_10_2_3")           # mhg:1_4_11_6_8_3_6_8_9_11_7
+    keys, known = index.classify(rows)                  # Millionen gepackter Reihen
+"""
+import weakref
+
+import numpy as np
+from rdflib import RDF, Namespace
+
+from graph_cache import graph_stamp
+from packed_rows import INTERVAL_LENGTH, ROW_LENGTH, intervals, invert, retrograde, to_local_names
+
+mhg = Namespace("http://music-history-graph.ch/twelve-tone-onto#")
+
+
+def canonical_patterns(patterns):
+    """Kanonischer Schlüssel (kleinstes von P, I, R, RI) gepackter Intervallmuster (vektorisiert)."""
+    p = np.asarray(patterns, dtype=np.uint64)
+    i = invert(p, INTERVAL_LENGTH)
+    r = retrograde(p, INTERVAL_LENGTH)
+    ri = retrograde(i, INTERVAL_LENGTH)
+    return np.minimum(np.minimum(p, i), np.minimum(r, ri))
+
+
+def canonical_keys(rows):
+    """Kanonischer Schlüssel gepackter Reihen (vektorisiert)."""
+    return canonical_patterns(intervals(rows))
+
+
+def _pack_ints(values):
+    key = 0
+    for v in values:
+        key = (key << 4) | v
+    return key
+
+
+def canonical_key(value):
+    """
+    Kanonischer Schlüssel einer Reihe oder eines Intervallmusters (lokaler
+    Name). Für Einzelwerte ohne NumPy-Overhead; Massen über canonical_keys.
+    """
+    values = [int(x) for x in value.replace("mhg:", "").split("_")]
+    if len(values) == ROW_LENGTH:
+        values = [(b - a) % 12 for a, b in zip(values, values[1:])]
+    elif len(values) != INTERVAL_LENGTH:
+        raise ValueError(f"Weder Reihe noch Intervallmuster: {value!r}")
+    inverted = [(-v) % 12 for v in values]
+    return min(_pack_ints(values), _pack_ints(inverted), _pack_ints(values[::-1]), _pack_ints(inverted[::-1]))
+
+
+def canonical_name(value):
+    """Lokaler Name der RowClass einer Reihe oder eines Intervallmusters."""
+    return to_local_names(canonical_key(value), INTERVAL_LENGTH)[0]
+
+
+class RowClassIndex:
+    """Die RowClasses eines Graphen, nach kanonischem Schlüssel abfragbar."""
+
+    _by_graph = weakref.WeakKeyDictionary()
+
+    def __init__(self, classes):
+        # classes: {kanonischer Schlüssel: RowClass-IRI}
+        self.classes = dict(classes)
+        self.keys = np.array(sorted(self.classes), dtype=np.uint64)
+
+    @classmethod
+    def from_graph(cls, graph):
+        classes = {}
+        for rc in graph.subjects(RDF.type, mhg.rowClass, unique=True):
+            local = str(rc)[len(mhg):] if str(rc).startswith(str(mhg)) else None
+            if local is None or local.count("_") != INTERVAL_LENGTH - 1:
+                continue
+            classes.setdefault(canonical_key(local), rc)
+        return cls(classes)
+
+    @classmethod
+    def for_graph(cls, graph, rebuild=False):
+        """
+        Index zu `graph`, beim ersten Aufruf aufgebaut und wiederverwendet,
+        solange sich der Graph nicht ändert (siehe graph_cache.graph_stamp).
+        Stores ohne Änderungszähler (z. B. rdflibs Memory) bekommen jedes Mal
+        einen neuen Index; für wiederholte Abfragen store="int" verwenden.
+        """
+        stamp = graph_stamp(graph)
+        if stamp is None:
+            return cls.from_graph(graph)
+        entry = None if rebuild else cls._by_graph.get(graph)
+        if entry is None or entry[0] != stamp:
+            entry = cls._by_graph[graph] = (stamp, cls.from_graph(graph))
+        return entry[1]
+
+    def __len__(self):
+        return len(self.classes)
+
+    def lookup(self, value):
+        """RowClass-IRI einer Reihe oder eines Intervallmusters (lokaler Name) oder None."""
+        return self.classes.get(canonical_key(value))
+
+    def classify(self, rows, patterns=False):
+        """
+        Kanonische Schlüssel vieler gepackter Reihen (bzw. Intervallmuster mit
+        `patterns=True`) und Maske, welche davon als RowClass im Graphen stehen.
+        """
+        keys = canonical_patterns(rows) if patterns else canonical_keys(rows)
+        if not len(self.keys):
+            return keys, np.zeros(keys.shape, dtype=bool)
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return keys, self.keys[pos] == keys
+
+    def class_of(self, keys):
+        """RowClass-IRIs zu kanonischen Schlüsseln (None für unbekannte)."""
+        return [self.classes.get(int(k)) for k in np.atleast_1d(keys)]
@@ -0,0 +1,295 @@
+"""
+Lokaler SPARQL-1.1-Endpunkt (Query-Protokoll), der den Graphen zwischen
+Abfragen geladen hält.
+
+Der Graph wird einmal geladen (siehe graph_cache.load_graph); jede Anfrage
+läuft in einem eigenen Thread. Ergebnisse werden in einem LRU-Cache
+abgelegt, dessen Schlüssel aus normalisiertem Abfragetext (Kommentare und
+Leerraum außerhalb von Strings/IRIs entfernt), Graph-Version (SHA-256 der
+TTL-Datei) und Accept-Header besteht; Treffer kommen ohne erneutes Parsen
+aus. Ändert sich die TTL-Datei, wird sie bei der nächsten Anfrage neu
+geladen; alte Cache-Einträge werden damit ungültig.
+
+Unterstützt werden GET /sparql?query=... sowie POST mit
+application/x-www-form-urlencoded oder application/sparql-query. SELECT und
+ASK liefern application/sparql-results+json (alternativ +xml oder text/csv
+über den Accept-Header), CONSTRUCT und DESCRIBE liefern text/turtle
+(alternativ application/n-triples oder application/rdf+xml).
+Die Erweiterungsfunktionen mhgfn:year, mhgfn:creationYear,
+mhgfn:createdBetween und mhgfn:aliveIn (siehe year_index.py) sind verfügbar.
+
+Verwendung:
+    python utils/mhg.py serve MusicHistoryGraph_TwelveToneMusic_Complete.ttl --port 3030
+    curl http://127.0.0.1:3030/sparql --data-urlencode "query@query.rq"
+
+    python utils/mhg.py serve MusicHistoryGraph_TwelveToneMusic_Complete.ttl --socket /tmp/mhg.sock
+    curl --unix-socket /tmp/mhg.sock http://localhost/sparql --data-urlencode "query@query.rq"
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import parse_qs, urlsplit
+
+from rdflib.plugins.sparql import prepareQuery
+
+from graph_cache import file_digest, load_graph
+import year_index
+
+DEFAULT_PORT = 3030
+CACHE_ENTRIES = 256
+
+# Antwortformate: Medientyp -> rdflib-Serialisierungsformat
+RESULT_FORMATS = {
+    "application/sparql-results+json": "json",
+    "application/json": "json",
+    "application/sparql-results+xml": "xml",
+    "application/xml": "xml",
+    "text/csv": "csv",
+}
+GRAPH_FORMATS = {
+    "text/turtle": "turtle",
+    "application/n-triples": "nt",
+    "application/rdf+xml": "xml",
+}
+
+# Strings, IRIs, Kommentare und Leerraum einer SPARQL-Abfrage
+_TOKEN = re.compile(
+    r'("""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\''
+    r'|<[^<>"{}|^`\\\s]*>)'
+    r"|#[^\n]*|\s+"
+)
+
+
+def normalize_query(query):
+    """Entfernt Kommentare und fasst Leerraum zusammen (Strings und IRIs bleiben unverändert)."""
+    parts, pos = [], 0
+    for m in _TOKEN.finditer(query):
+        if m.start() > pos:
+            parts.append(query[pos:m.start()])
+        if m.group(1):
+            parts.append(m.group(1))
+        elif parts and parts[-1] != " ":
+            parts.append(" ")
+        pos = m.end()
+    parts.append(query[pos:])
+    return "".join(parts).strip()
+
+
+def _negotiate(accept, formats):
+    """Erstes unterstütztes Format aus dem Accept-Header (sonst das erste aus `formats`)."""
+    for item in (accept or "").split(","):
+        media_type = item.split(";", 1)[0].strip().lower()
+        if media_type in formats:
+            return media_type, formats[media_type]
+    media_type = next(iter(formats))
+    return media_type, formats[media_type]
+
+
+class ResultCache:
+    """Thread-sicherer LRU-Cache für serialisierte Abfrageergebnisse."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SparqlService:
+    """
+    Hält einen geladenen Graphen samt Version und beantwortet Abfragen.
+    Unabhängig vom HTTP-Teil nutzbar.
+    """
+
+    def __init__(self, ttl_file, store="mmap", cache_entries=CACHE_ENTRIES):
+        self.ttl_file = ttl_file
+        self.store = store
+        self.cache = ResultCache(cache_entries)
+        self._load_lock = threading.Lock()
+        # pyparsing ist nicht thread-sicher; nur das Parsen wird serialisiert
+        self._parse_lock = threading.Lock()
+        self._stat = None
+        self._state = (None, None)
+        # mhgfn:-Funktionen (Jahresindex) für alle Abfragen
+        year_index.register()
+        self.refresh()
+
+    @property
+    def graph(self):
+        return self._state[0]
+
+    @property
+    def version(self):
+        return self._state[1]
+
+    def _file_stat(self):
+        st = os.stat(self.ttl_file)
+        return st.st_size, st.st_mtime_ns
+
+    def refresh(self):
+        """Lädt den Graphen neu, falls sich die TTL-Datei geändert hat. Gibt (Graph, Version) zurück."""
+        stat = self._file_stat()
+        if stat == self._stat:
+            return self._state
+        with self._load_lock:
+            if stat != self._stat:
+                digest = file_digest(self.ttl_file)
+                if digest != self.version:
+                    self._state = (load_graph(self.ttl_file, store=self.store), digest)
+                self._stat = stat
+        return self._state
+
+    def query(self, query, accept=None):
+        """
+        Führt eine Abfrage aus und gibt (Medientyp, Bytes, aus_cache) zurück.
+        Syntaxfehler werden als ValueError gemeldet.
+        """
+        graph, version = self.refresh()
+        key = (normalize_query(query), version, accept or "")
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached + (True,)
+
+        with self._parse_lock:
+            try:
+                prepared = prepareQuery(query, initNs=dict(graph.namespaces()))
+            except Exception as e:
+                raise ValueError(f"Ungültige Abfrage: {e}") from e
+        form = prepared.algebra.name
+        formats = GRAPH_FORMATS if form in ("ConstructQuery", "DescribeQuery") else RESULT_FORMATS
+        media_type, fmt = _negotiate(accept, formats)
+        result = graph.query(prepared)
+        if result.type in ("CONSTRUCT", "DESCRIBE"):
+            body = result.graph.serialize(format=fmt, encoding="utf-8")
+        else:
+            body = result.serialize(format=fmt, encoding="utf-8")
+        self.cache.put(key, (media_type, body))
+        return media_type, body, False
+
+
+class SparqlHandler(BaseHTTPRequestHandler):
+    """SPARQL-Protokoll für GET und POST auf /sparql (bzw. /)."""
+
+    server_version = "mhg-sparql/1"
+    paths = ("/sparql", "/")
+
+    def address_string(self):
+        # Unix-Sockets liefern keine (host, port)-Adresse
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send(self, status, media_type, body, extra_headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", f"{media_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, "text/plain", message.encode("utf-8"))
+
+    def _answer(self, params):
+        queries = params.get("query")
+        if not queries:
+            return self._error(400, "Parameter 'query' fehlt")
+        started = time.perf_counter()
+        try:
+            media_type, body, cached = self.server.service.query(queries[0], self.headers.get("Accept"))
+        except ValueError as e:
+            return self._error(400, str(e))
+        except Exception as e:
+            return self._error(500, f"Fehler bei der Auswertung: {e}")
+        elapsed = f"{(time.perf_counter() - started) * 1000:.1f}ms"
+        self._send(200, media_type, body, [("X-Cache", "HIT" if cached else "MISS"),
+                                           ("X-Graph-Version", self.server.service.version),
+                                           ("X-Elapsed", elapsed)])
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path not in self.paths:
+            return self._error(404, f"Unbekannter Pfad: {url.path}")
+        self._answer(parse_qs(url.query))
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path not in self.paths:
+            return self._error(404, f"Unbekannter Pfad: {url.path}")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8")
+        content_type = (self.headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+        if content_type == "application/sparql-query":
+            params = {"query": [body]}
+        elif content_type == "application/x-www-form-urlencoded":
+            params = parse_qs(body)
+        else:
+            return self._error(415, f"Nicht unterstützter Content-Type: {content_type or '-'}")
+        self._answer(params)
+
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT, socket_path=None):
+    """HTTP-Server über TCP oder, mit `socket_path`, über einen Unix-Socket."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, SparqlHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), SparqlHandler)
+    server.service = service
+    return server
+
+
+def serve(ttl_file, host="127.0.0.1", port=DEFAULT_PORT, socket_path=None, store="mmap",
+          cache_entries=CACHE_ENTRIES):
+    """Lädt den Graphen und beantwortet Abfragen bis Strg+C."""
+    service = SparqlService(ttl_file, store=store, cache_entries=cache_entries)
+    print(f"✅ {len(service.graph)} Triples geladen (Version {service.version[:12]})")
+    server = make_server(service, host, port, socket_path)
+    where = socket_path or f"http://{host}:{server.server_address[1]}/sparql"
+    print(f"SPARQL-Endpunkt: {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else "MusicHistoryGraph_TwelveToneMusic_Complete.ttl")
@@ -0,0 +1,224 @@
+"""
+Extraktion von Subgraphen um Komponisten, Werke und RowClasses.
+
+Gemeinsame Logik für queries_subgraphs/extraxt_flexible_subgraph.py und
+den Unterbefehl `mhg extract-subgraph`.
+
+Der Batch-Modus liest eine Seed-Datei mit einer ID pro Zeile, optional mit
+Auswahlmodi davor:
+
+    # Modi  ID
+    composer        AlbanBerg
+    composer,work   ArnoldSchoenberg
+    rowClass        1_4_9_4_9_1_4_11_3_11_2
+    AB_Lulu
+
+und extrahiert alle Subgraphen aus einem einzigen geladenen Graphen. Die
+Arbeit wird auf einen Prozesspool verteilt; jeder Prozess öffnet den
+memory-mapped Index (siehe triple_index_file.py) und teilt sich dessen
+Seiten mit den anderen.
+
+Ausgabedateien mit der Endung .nt, .nq (optional .gz) werden beim
+Extrahieren zeilenweise geschrieben (siehe triple_writer.py), alle anderen
+als Turtle.
+
+Verwendung:
+    from graph_cache import load_graph
+    from subgraph_extract import extract_subgraph
+    g = load_graph("MusicHistoryGraph_TwelveToneMusic_Complete.ttl", store="mmap")
+    sub = extract_subgraph(g, ["AlbanBerg", "AB_Lulu"], {"composer", "work"})
+
+    from subgraph_extract import extract_batch, parse_seed_file
+    extract_batch("MusicHistoryGraph_TwelveToneMusic_Complete.ttl",
+                  parse_seed_file("seeds.txt"), output_dir="subgraphs")
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from rdflib import Graph, Namespace
+
+from graph_cache import load_graph, pack_triples, unpack_term, unpack_triples
+from triple_writer import TripleWriter, is_stream_path
+
+mhg = Namespace("http://music-history-graph.ch/twelve-tone-onto#")
+frbr = Namespace("http://purl.org/vocab/frbr/core/")
+schema = Namespace("https://schema.org/")
+
+MODES = ("composer", "work", "rowClass")
+# Auswahlnummern der interaktiven Skripte
+MODE_NUMBERS = {"1": "composer", "2": "work", "3": "rowClass"}
+
+
+def new_subgraph():
+    """Leerer Graph mit den üblichen Präfixen."""
+    subgraph = Graph()
+    subgraph.bind("mhg", mhg)
+    subgraph.bind("frbr", frbr)
+    subgraph.bind("schema", schema)
+    return subgraph
+
+
+def add_all_triples_about(g, subgraph, entity):
+    """Fügt alle Tripel hinzu, in denen entity Subjekt oder Objekt ist."""
+    for s, p, o in g.triples((entity, None, None)):
+        subgraph.add((s, p, o))
+    for s, p, o in g.triples((None, None, entity)):
+        subgraph.add((s, p, o))
+
+
+def extract_into(g, subgraph, local_id, modes):
+    """Ergänzt `subgraph` um die Umgebung einer lokalen ID (ohne Präfix)."""
+    entity = mhg[local_id]
+
+    # --- Komponist ---
+    if "composer" in modes:
+        add_all_triples_about(g, subgraph, entity)
+
+        # verbundene Werke ergänzen
+        for work in g.objects(entity, frbr.creatorOf):
+            add_all_triples_about(g, subgraph, work)
+
+    # --- Werk ---
+    if "work" in modes:
+        add_all_triples_about(g, subgraph, entity)
+
+        # evtl. Komponisten ergänzen
+        for composer in g.objects(entity, frbr.created):
+            add_all_triples_about(g, subgraph, composer)
+
+    # --- RowClass ---
+    if "rowClass" in modes:
+        # Eigenschaften der RowClass selbst
+        add_all_triples_about(g, subgraph, entity)
+
+        # alle RowForms, die zu dieser Klasse gehören
+        for rowform in g.subjects(mhg.hasRowClass, entity):
+            add_all_triples_about(g, subgraph, rowform)
+
+
+def extract_subgraph(g, ids, modes, out=None):
+    """
+    Subgraph für mehrere lokale IDs und Auswahlmodi (siehe MODES). Mit
+    `out` (z. B. ein TripleWriter) werden die Tripel dorthin geschrieben.
+    """
+    subgraph = new_subgraph() if out is None else out
+    for local_id in ids:
+        extract_into(g, subgraph, local_id, modes)
+    return subgraph
+
+
+def extract_to_file(g, ids, modes, out_file):
+    """Extrahiert in eine Datei (gestreamt bei .nt/.nq[.gz], sonst Turtle). Gibt die Tripelzahl zurück."""
+    if is_stream_path(out_file):
+        with TripleWriter(out_file) as out:
+            extract_subgraph(g, ids, modes, out=out)
+        return len(out)
+    subgraph = extract_subgraph(g, ids, modes)
+    subgraph.serialize(out_file, format="turtle")
+    return len(subgraph)
+
+
+def default_output_name(ids, suffix=".ttl"):
+    return f"subgraph_{'_'.join(ids)}{suffix}"
+
+
+def parse_modes(value):
+    """Modi aus "composer,work" bzw. "1,2" (Nummern wie im interaktiven Skript)."""
+    modes = set()
+    for mode in value.split(","):
+        mode = MODE_NUMBERS.get(mode.strip(), mode.strip())
+        if mode not in MODES:
+            raise ValueError(f"Unbekannter Modus: {mode!r} (erlaubt: {', '.join(MODES)})")
+        modes.add(mode)
+    return modes
+
+
+def parse_seed_file(path, default_modes=MODES):
+    """
+    Liest eine Seed-Datei (siehe Moduldokumentation).
+    Gibt {lokale_id: {modi}} zurück; mehrfach genannte IDs werden vereinigt.
+    """
+    seeds = {}
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            parts = line.split("#", 1)[0].split()
+            if not parts:
+                continue
+            if len(parts) == 1:
+                modes, local_id = set(default_modes), parts[0]
+            elif len(parts) == 2:
+                modes, local_id = parse_modes(parts[0]), parts[1]
+            else:
+                raise ValueError(f"{path}:{lineno}: erwartet '<modi> <id>' oder '<id>'")
+            seeds.setdefault(local_id, set()).update(modes)
+    return seeds
+
+
+# --- Batch-Extraktion ------------------------------------------------------
+
+_worker_graph = None
+
+
+def _init_worker(ttl_file):
+    global _worker_graph
+    _worker_graph = load_graph(ttl_file, store="mmap")
+
+
+def _extract_to_file(job):
+    local_id, modes, out_file = job
+    return local_id, out_file, extract_to_file(_worker_graph, [local_id], modes, out_file)
+
+
+def _extract_packed(job):
+    local_id, modes = job
+    terms, id_bytes = pack_triples(extract_subgraph(_worker_graph, [local_id], modes))
+    return terms, id_bytes
+
+
+def _run(ttl_file, func, jobs, workers):
+    global _worker_graph
+    workers = workers or os.cpu_count() or 1
+    # Index einmal im Hauptprozess anlegen, bevor die Worker ihn öffnen
+    g = load_graph(ttl_file, store="mmap")
+    if workers == 1 or len(jobs) <= 1:
+        _worker_graph = g
+        return [func(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(ttl_file,)) as pool:
+        return list(pool.map(func, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def extract_batch(ttl_file, seeds, output_dir=".", combined=None, workers=None, suffix=".ttl"):
+    """
+    Extrahiert die Subgraphen aller Seeds ({lokale_id: {modi}}) aus einem
+    geladenen Graphen.
+
+    Ohne `combined` wird je Seed eine Datei subgraph_<id><suffix> in
+    `output_dir` geschrieben; mit `combined` landen alle Subgraphen
+    vereinigt in dieser einen Datei. Gibt [(id, datei, anzahl_tripel)] zurück.
+    """
+    if combined is None:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        jobs = [
+            (local_id, modes, str(Path(output_dir) / default_output_name([local_id], suffix)))
+            for local_id, modes in seeds.items()
+        ]
+        return _run(ttl_file, _extract_to_file, jobs, workers)
+
+    packed = _run(ttl_file, _extract_packed, list(seeds.items()), workers)
+    stream = is_stream_path(combined)
+    subgraph = TripleWriter(combined) if stream else new_subgraph()
+    results = []
+    for local_id, (terms, id_bytes) in zip(seeds, packed):
+        terms = [unpack_term(enc) for enc in terms]
+        n = 0
+        for triple in unpack_triples(terms, id_bytes):
+            subgraph.add(triple)
+            n += 1
+        results.append((local_id, combined, n))
+    if stream:
+        subgraph.close()
+    else:
+        subgraph.serialize(combined, format="turtle")
+    return results
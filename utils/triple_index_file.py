@@ -0,0 +1,256 @@
+"""
+Memory-mapped Dateiformat für Termwörterbuch und Tripel-Indizes.
+
+Aufbau einer .mhgidx-Datei:
+    8 Byte   Magic b"MHGIDX01"
+    8 Byte   Länge des JSON-Headers (uint64, little endian)
+    n Byte   JSON-Header (Version, Inhalts-Hash, Namespaces, Sektionen)
+    Sektionen, jeweils auf 8 Byte ausgerichtet:
+        term_offsets  uint64[n_terms + 1]   Start der Terme im Blob
+        term_blob     uint8[...]            kodierte Terme, lexikographisch sortiert
+        spo_0..2, pos_0..2, osp_0..2        uint32[n_triples], sortierte ID-Spalten
+        cbd_ptr       int64[n_terms + 1]    CBD-Bereich je Blank Node (siehe
+        cbd_0..2      uint32[...]           triple_store.blank_node_closures)
+
+Die Term-IDs entsprechen der Sortierreihenfolge der kodierten Terme, daher
+findet das Wörterbuch einen Term per binärer Suche direkt im Blob. Beim
+Öffnen wird nichts kopiert: alle Arrays sind Sichten auf das mmap, mehrere
+Prozesse teilen sich dieselben Seiten im Page Cache.
+"""
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+from rdflib import BNode, Graph, Literal, URIRef
+
+from triple_store import (ID_DTYPE, INDEX_ORDERS, IntTripleStore, blank_node_closures, sorted_columns,
+                          term_kind)
+
+MAGIC = b"MHGIDX01"
+FORMAT_VERSION = 3
+_ALIGN = 8
+
+
+def encode_term(term):
+    """
+    Kodiert einen RDF-Term als Bytes (Typkennung + Inhalt). Literale:
+    Längen von Datentyp und Sprache (je uint32), beide, dann die lexikalische
+    Form; so bleibt jedes Zeichen im Literal erlaubt, auch NUL.
+    """
+    if isinstance(term, URIRef):
+        return b"U" + str(term).encode("utf-8")
+    if isinstance(term, BNode):
+        return b"B" + str(term).encode("utf-8")
+    if isinstance(term, Literal):
+        dt = str(term.datatype).encode("utf-8") if term.datatype is not None else b""
+        lang = (term.language or "").encode("utf-8")
+        return b"L" + struct.pack("<II", len(dt), len(lang)) + dt + lang + str(term).encode("utf-8")
+    raise TypeError(f"Nicht unterstützter RDF-Term: {term!r}")
+
+
+def decode_term(data):
+    """Gegenstück zu encode_term."""
+    kind, body = data[:1], bytes(data[1:])
+    if kind == b"U":
+        return URIRef(body.decode("utf-8"))
+    if kind == b"B":
+        return BNode(body.decode("utf-8"))
+    n_dt, n_lang = struct.unpack_from("<II", body)
+    dt = body[8:8 + n_dt].decode("utf-8")
+    lang = body[8 + n_dt:8 + n_dt + n_lang].decode("utf-8")
+    lexical = body[8 + n_dt + n_lang:].decode("utf-8")
+    return Literal(lexical, lang=lang or None, datatype=URIRef(dt) if dt else None)
+
+
+class MappedTermDictionary:
+    """
+    Termwörterbuch über einem mmap-Puffer (gleiche Schnittstelle wie
+    triple_store.TermDictionary). Neu hinzukommende Terme landen in einem
+    In-Memory-Overlay mit IDs ab n_terms.
+    """
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+        self._n = len(offsets) - 1
+        self._decoded = {}
+        self._ids = {}
+        self._overlay = []
+
+    def __len__(self):
+        return self._n + len(self._overlay)
+
+    def _key(self, i):
+        return self._blob[int(self._offsets[i]):int(self._offsets[i + 1])].tobytes()
+
+    def id_of(self, term):
+        tid = self._ids.get(term)
+        if tid is not None:
+            return tid
+        key = encode_term(term)
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n and self._key(lo) == key:
+            self._ids[term] = lo
+            return lo
+        return None
+
+    def intern(self, term):
+        tid = self.id_of(term)
+        if tid is None:
+            tid = self._ids[term] = self._n + len(self._overlay)
+            self._overlay.append(term)
+        return tid
+
+    def term(self, tid):
+        if tid >= self._n:
+            return self._overlay[tid - self._n]
+        t = self._decoded.get(tid)
+        if t is None:
+            t = self._decoded[tid] = decode_term(self._key(tid))
+        return t
+
+    def terms(self, ids):
+        return [self.term(i) for i in ids]
+
+    def kinds(self):
+        """Termart je ID (siehe TermDictionary.kinds), direkt aus dem Blob gelesen."""
+        kinds = self._blob[self._offsets[:-1].astype(np.int64)] if self._n else np.empty(0, np.uint8)
+        if self._overlay:
+            extra = np.array([term_kind(t) for t in self._overlay], dtype=np.uint8)
+            kinds = np.concatenate([kinds, extra])
+        return kinds
+
+
+def _store_for(graph):
+    """Liefert einen IntTripleStore mit dem Inhalt des Graphen."""
+    if isinstance(graph.store, IntTripleStore):
+        return graph.store
+    store = IntTripleStore()
+    for triple in graph:
+        store.add(triple)
+    for prefix, ns in graph.namespaces():
+        store.bind(prefix, ns)
+    return store
+
+
+def write_index(graph, path, digest=""):
+    """Schreibt einen rdflib-Graphen als .mhgidx-Datei (atomar)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    store = _store_for(graph)
+    s, p, o = store.id_triples()
+
+    # IDs nach Sortierreihenfolge der kodierten Terme neu vergeben
+    n_terms = len(store.terms)
+    encoded = [encode_term(store.terms.term(i)) for i in range(n_terms)]
+    order = sorted(range(n_terms), key=encoded.__getitem__)
+    new_id = np.empty(n_terms, dtype=ID_DTYPE)
+    new_id[np.asarray(order, dtype=np.int64)] = np.arange(n_terms, dtype=ID_DTYPE)
+    spo = np.column_stack((new_id[s], new_id[p], new_id[o])) if len(s) else np.empty((0, 3), ID_DTYPE)
+
+    offsets = np.zeros(n_terms + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(encoded[i]) for i in order], dtype=np.uint64)
+    blob = b"".join(encoded[i] for i in order)
+
+    sections = [("term_offsets", offsets), ("term_blob", np.frombuffer(blob, dtype=np.uint8))]
+    columns = {name: sorted_columns(spo, cols) for name, cols in INDEX_ORDERS.items()}
+    for name, cols in columns.items():
+        for k, col in enumerate(cols):
+            sections.append((f"{name}_{k}", col.astype(ID_DTYPE)))
+
+    # CBDs der Blank Nodes einmal beim Schreiben berechnen
+    kinds = np.array([encoded[i][0] for i in order], dtype=np.uint8)
+    ptr, *cbd = blank_node_closures(columns["spo"], kinds)
+    sections.append(("cbd_ptr", ptr))
+    for k, col in enumerate(cbd):
+        sections.append((f"cbd_{k}", col.astype(ID_DTYPE)))
+
+    header = {
+        "version": FORMAT_VERSION,
+        "digest": digest,
+        "n_terms": n_terms,
+        "n_triples": len(spo),
+        "namespaces": [[prefix, str(ns)] for prefix, ns in store.namespaces()],
+        "sections": {},
+    }
+    # Die Sektions-Offsets hängen von der Headerlänge ab und umgekehrt
+    def layout(header_len):
+        pos = _aligned(len(MAGIC) + 8 + header_len)
+        for name, arr in sections:
+            header["sections"][name] = [pos, len(arr), arr.dtype.str]
+            pos = _aligned(pos + arr.nbytes)
+
+    header_len = 0
+    while True:
+        layout(header_len)
+        raw_header = json.dumps(header).encode("utf-8")
+        if len(raw_header) <= header_len:
+            break
+        header_len = len(raw_header) + 64
+    raw_header = raw_header.ljust(header_len)
+
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", header_len))
+        f.write(raw_header)
+        for name, arr in sections:
+            f.seek(header["sections"][name][0])
+            f.write(arr.tobytes())
+        f.write(b"\x00" * _ALIGN)
+    os.replace(tmp, path)
+
+
+def _aligned(pos):
+    return (pos + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def read_header(path):
+    """Liest nur den JSON-Header einer .mhgidx-Datei (None bei fremdem Format)."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None
+    if header.get("version") != FORMAT_VERSION:
+        return None
+    return header
+
+
+def open_index(path):
+    """
+    Öffnet eine .mhgidx-Datei per mmap und gibt einen rdflib-Graphen auf
+    einem IntTripleStore zurück, dessen Arrays direkt auf die Datei zeigen.
+    """
+    header = read_header(path)
+    if header is None:
+        raise ValueError(f"Keine gültige Indexdatei: {path}")
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def section(name):
+        offset, count, dtype = header["sections"][name]
+        return np.frombuffer(mm, dtype=np.dtype(dtype), count=count, offset=offset)
+
+    terms = MappedTermDictionary(section("term_offsets"), section("term_blob"))
+    index = {
+        name: tuple(section(f"{name}_{k}") for k in range(3))
+        for name in INDEX_ORDERS
+    }
+    closures = (section("cbd_ptr"),) + tuple(section(f"cbd_{k}") for k in range(3))
+    store = IntTripleStore(terms=terms, index=index, closures=closures)
+    for prefix, ns in header["namespaces"]:
+        store.bind(prefix, URIRef(ns))
+    return Graph(store=store)
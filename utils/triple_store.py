@@ -0,0 +1,477 @@
+"""
+Speichersparender rdflib-Store mit Dictionary-Encoding.
+
+IRIs, Blank Nodes und Literale werden einmalig in Integer-IDs übersetzt
+(TermDictionary). Die Tripel selbst liegen als sortierte NumPy-Spalten in
+drei Permutationen vor (SPO, POS, OSP), sodass jedes Tripelmuster per
+binärer Suche beantwortet wird.
+
+Weil IntTripleStore die rdflib-Store-Schnittstelle implementiert, bleibt die
+gewohnte Graph-API (triples, subjects, objects, value, query, ...) erhalten:
+
+    from rdflib import Graph
+    from triple_store import IntTripleStore
+
+    g = Graph(store=IntTripleStore())
+    g.parse("MusicHistoryGraph_TwelveToneMusic_Complete.ttl", format="turtle")
+"""
+from array import array
+
+import numpy as np
+from rdflib import BNode, Literal, URIRef
+from rdflib.store import Store
+
+ID_DTYPE = np.uint32
+
+# Termarten, wie sie auch als erstes Byte im .mhgidx-Termblob stehen
+KIND_IRI, KIND_BNODE, KIND_LITERAL = ord("U"), ord("B"), ord("L")
+
+# Spaltenreihenfolge der drei Indizes, jeweils als Positionen in (s, p, o)
+INDEX_ORDERS = {
+    "spo": (0, 1, 2),
+    "pos": (1, 2, 0),
+    "osp": (2, 0, 1),
+}
+
+# Gebundene Positionen (s, p, o) -> (Index, Anzahl gebundener Schlüsselspalten)
+_INDEX_FOR_PATTERN = {
+    (True, True, True): ("spo", 3),
+    (True, True, False): ("spo", 2),
+    (True, False, True): ("osp", 2),
+    (True, False, False): ("spo", 1),
+    (False, True, True): ("pos", 2),
+    (False, True, False): ("pos", 1),
+    (False, False, True): ("osp", 1),
+    (False, False, False): ("spo", 0),
+}
+
+
+def term_kind(term):
+    """Termart (KIND_IRI, KIND_BNODE oder KIND_LITERAL) eines RDF-Terms."""
+    if isinstance(term, URIRef):
+        return KIND_IRI
+    if isinstance(term, BNode):
+        return KIND_BNODE
+    if isinstance(term, Literal):
+        return KIND_LITERAL
+    raise TypeError(f"Nicht unterstützter RDF-Term: {term!r}")
+
+
+class TermDictionary:
+    """Interniert RDF-Terme als fortlaufende Integer-IDs."""
+
+    def __init__(self):
+        self._ids = {}
+        self._terms = []
+
+    def __len__(self):
+        return len(self._terms)
+
+    def intern(self, term):
+        """Gibt die ID eines Terms zurück und legt ihn bei Bedarf an."""
+        tid = self._ids.get(term)
+        if tid is None:
+            tid = self._ids[term] = len(self._terms)
+            self._terms.append(term)
+        return tid
+
+    def id_of(self, term):
+        """ID eines bekannten Terms oder None."""
+        return self._ids.get(term)
+
+    def term(self, tid):
+        return self._terms[tid]
+
+    def terms(self, ids):
+        """Übersetzt eine Folge von IDs zurück in RDF-Terme."""
+        t = self._terms
+        return [t[i] for i in ids]
+
+    def kinds(self):
+        """Termart je ID als uint8-Array: ord("U") IRI, ord("B") Blank Node, ord("L") Literal."""
+        return np.array([term_kind(t) for t in self._terms], dtype=np.uint8)
+
+
+def sorted_columns(spo, order):
+    """Sortiert ein (N, 3)-ID-Array nach der gegebenen Spaltenreihenfolge."""
+    a, b, c = (spo[:, i] for i in order)
+    perm = np.lexsort((c, b, a))
+    return tuple(np.ascontiguousarray(col[perm]) for col in (a, b, c))
+
+
+def _key_range(columns, keys):
+    """Bereich [lo, hi) der Zeilen, deren führende Spalten den Schlüsseln entsprechen."""
+    lo, hi = 0, len(columns[0])
+    for col, key in zip(columns, keys):
+        seg = col[lo:hi]
+        start = int(np.searchsorted(seg, key, "left"))
+        stop = int(np.searchsorted(seg, key, "right"))
+        lo, hi = lo + start, lo + stop
+        if lo == hi:
+            break
+    return lo, hi
+
+
+def row_pointers(keys, n_nodes):
+    """Zeilenzeiger (CSR) einer nach `keys` sortierten Spalte: Zeilen von k liegen in ptr[k]:ptr[k + 1]."""
+    ptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    if len(keys):
+        np.cumsum(np.bincount(keys, minlength=n_nodes), out=ptr[1:])
+    return ptr
+
+
+def insert_positions(columns, rows):
+    """
+    Positionen der sortierten Zeilen `rows` in den sortierten Spalten
+    `columns` (beide drei Spalten in derselben Indexreihenfolge): vorhandene
+    Zeilen liefern ihre eigene Position, neue ihre Einfügeposition.
+    """
+    a, b, c = (np.asarray(col, dtype=np.uint64) for col in columns)
+    ra, rb, rc = (np.asarray(col, dtype=np.uint64) for col in rows)
+    n = len(a)
+    ab = (a << np.uint64(32)) | b
+    rab = (ra << np.uint64(32)) | rb
+    pos = np.searchsorted(ab, rab, "left")
+    if not n or not len(pos):
+        return pos
+    # Startzeile jedes (a, b)-Laufs; innerhalb eines Laufs ist c sortiert
+    change = np.ones(n, dtype=bool)
+    change[1:] = ab[1:] != ab[:-1]
+    run_start = np.maximum.accumulate(np.where(change, np.arange(n), 0)).astype(np.uint64)
+    key = (run_start << np.uint64(32)) | c
+    found = pos < n
+    found[found] = ab[pos[found]] == rab[found]
+    pos[found] = np.searchsorted(key, (pos[found].astype(np.uint64) << np.uint64(32)) | rc[found], "left")
+    return pos
+
+
+def gather_ranges(ptr, nodes):
+    """Zeilenpositionen aller Bereiche ptr[k]:ptr[k + 1] für die Knoten `nodes` (vektorisiert)."""
+    nodes = np.asarray(nodes, dtype=np.int64)
+    if not len(nodes):
+        return np.empty(0, dtype=np.int64)
+    starts = ptr[nodes].astype(np.int64)
+    lengths = ptr[nodes + 1].astype(np.int64) - starts
+    total = int(lengths.sum())
+    # Startposition je Zeile minus laufender Offset innerhalb des Ergebnisses
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(total, dtype=np.int64)
+
+
+def blank_node_closures(spo, kinds, roots=None):
+    """
+    Concise Bounded Description (CBD) aller Blank Nodes (bzw. der Blank
+    Nodes `roots`): die ausgehenden Tripel eines Blank Nodes und, rekursiv,
+    aller darin verschachtelten Blank Nodes.
+
+    `spo` sind die nach Subjekt sortierten ID-Spalten, `kinds` die Termarten
+    je ID. Gibt (ptr, s, p, o) zurück; die CBD des Blank Nodes b liegt
+    zusammenhängend in s/p/o[ptr[b]:ptr[b + 1]].
+    """
+    s, p, o = spo
+    n = len(kinds)
+    out_ptr = row_pointers(s, n)
+    if roots is None:
+        roots = np.flatnonzero(kinds == KIND_BNODE).astype(np.int64)
+    else:
+        roots = np.asarray(roots, dtype=np.int64)
+    pair_root, pair_node = roots, roots
+    seen = roots * n + roots
+    found_root, found_row = [], []
+    while len(pair_node):
+        rows = gather_ranges(out_ptr, pair_node)
+        rows_root = np.repeat(pair_root, out_ptr[pair_node + 1] - out_ptr[pair_node])
+        found_root.append(rows_root)
+        found_row.append(rows)
+        # verschachtelte Blank Nodes, die für diese Wurzel noch nicht besucht sind
+        nested = o[rows].astype(np.int64)
+        is_bnode = kinds[nested] == KIND_BNODE
+        keys = np.unique(rows_root[is_bnode] * n + nested[is_bnode])
+        keys = keys[~np.isin(keys, seen)]
+        seen = np.concatenate((seen, keys))
+        pair_root, pair_node = keys // n, keys % n
+
+    root = np.concatenate(found_root) if found_root else np.empty(0, dtype=np.int64)
+    row = np.concatenate(found_row) if found_row else np.empty(0, dtype=np.int64)
+    order = np.argsort(root, kind="stable")
+    root, row = root[order], row[order]
+    return row_pointers(root, n), s[row], p[row], o[row]
+
+
+def replace_closures(closures, fresh, roots):
+    """
+    Ersetzt in `closures` die CBDs der Blank Nodes `roots` durch die aus
+    `fresh` (beide (ptr, s, p, o) wie blank_node_closures; `fresh` darf
+    mehr IDs umfassen).
+    """
+    ptr, s, p, o = closures
+    fresh_ptr, *fresh_cols = fresh
+    n = len(fresh_ptr) - 1
+    lengths = np.zeros(n, dtype=np.int64)
+    lengths[:len(ptr) - 1] = np.diff(ptr)
+    replaced = np.zeros(n, dtype=bool)
+    replaced[np.asarray(roots, dtype=np.int64)] = True
+    row_root = np.repeat(np.arange(len(ptr) - 1), np.diff(ptr))
+    keep = ~replaced[row_root]
+    fresh_lengths = np.diff(fresh_ptr)
+    # Wurzeln sind disjunkt: neue Zeilen vor die erste beibehaltene Zeile einer größeren Wurzel
+    at = np.searchsorted(row_root[keep], np.repeat(np.arange(n), fresh_lengths), "left")
+    new_ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.where(replaced, fresh_lengths, lengths), out=new_ptr[1:])
+    return (new_ptr,) + tuple(np.insert(col[keep], at, new) for col, new in zip((s, p, o), fresh_cols))
+
+
+class IntTripleStore(Store):
+    """
+    rdflib-Store, der Tripel als sortierte Integer-Arrays hält.
+
+    Einfügungen und Löschungen werden gepuffert und beim nächsten Lesezugriff
+    in die Indizes übernommen: die sortierten Änderungen werden per binärer
+    Suche in die bestehenden Spalten eingefügt bzw. daraus gelöscht, ohne
+    die Indizes neu zu sortieren. Von den CBDs werden nur die der berührten
+    Blank Nodes neu berechnet. Der Store ist damit für "einmal laden, oft
+    abfragen" optimiert, bleibt aber vollständig beschreibbar.
+    """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None, terms=None, index=None,
+                 closures=None):
+        super().__init__(configuration, identifier)
+        self.identifier = identifier
+        self.terms = terms if terms is not None else TermDictionary()
+        self._pending_add = array("I")
+        self._pending_remove = set()
+        if index is None:
+            index = {
+                name: tuple(np.empty(0, dtype=ID_DTYPE) for _ in range(3))
+                for name in INDEX_ORDERS
+            }
+        self._index = index
+        self._closures = closures
+        self._kinds = None
+        self._touched = []
+        # zählt Änderungen (für Caches, die an einen Graphstand gebunden sind)
+        self.generation = 0
+        self.__namespace = {}
+        self.__prefix = {}
+
+    # --- Indexpflege ---------------------------------------------------
+
+    def _flush(self):
+        """Übernimmt gepufferte Einfügungen und Löschungen in die Indizes."""
+        if not self._pending_add and not self._pending_remove:
+            return
+        if self._pending_remove:
+            # vorgemerkte Löschungen stehen alle im Index (siehe remove)
+            removed = np.array(sorted(self._pending_remove), dtype=ID_DTYPE).reshape(-1, 3)
+            self._pending_remove.clear()
+            for name, order in INDEX_ORDERS.items():
+                columns = self._index[name]
+                pos = insert_positions(columns, sorted_columns(removed, order))
+                self._index[name] = tuple(np.delete(col, pos) for col in columns)
+            self._touched.append(removed[:, 0])
+        if self._pending_add:
+            added = np.frombuffer(self._pending_add, dtype=np.uint32).astype(ID_DTYPE).reshape(-1, 3)
+            self._pending_add = array("I")
+            s, p, o = sorted_columns(added, INDEX_ORDERS["spo"])
+            # doppelte und bereits vorhandene Tripel verwerfen
+            new = np.ones(len(s), dtype=bool)
+            new[1:] = (s[1:] != s[:-1]) | (p[1:] != p[:-1]) | (o[1:] != o[:-1])
+            columns = self._index["spo"]
+            pos = insert_positions(columns, (s, p, o))
+            inside = pos < len(columns[0])
+            at = pos[inside]
+            new[inside] &= ~((columns[0][at] == s[inside]) & (columns[1][at] == p[inside])
+                             & (columns[2][at] == o[inside]))
+            added = np.column_stack((s[new], p[new], o[new]))
+            if len(added):
+                for name, order in INDEX_ORDERS.items():
+                    columns = self._index[name]
+                    delta = sorted_columns(added, order)
+                    pos = insert_positions(columns, delta)
+                    self._index[name] = tuple(np.insert(col, pos, d) for col, d in zip(columns, delta))
+                self._touched.append(added[:, 0])
+        if self._closures is None:
+            self._touched.clear()
+
+    def _term_kinds(self):
+        """Termarten je ID, zwischengespeichert und nur um neue Terme ergänzt."""
+        if self._kinds is None:
+            self._kinds = self.terms.kinds()
+        elif len(self._kinds) < len(self.terms):
+            extra = [term_kind(self.terms.term(i)) for i in range(len(self._kinds), len(self.terms))]
+            self._kinds = np.concatenate([self._kinds, np.array(extra, dtype=np.uint8)])
+        return self._kinds
+
+    def _lookup(self, triple_pattern):
+        """
+        Liefert die (s, p, o)-ID-Spalten aller indizierten Tripel, die dem
+        Muster entsprechen. Vorgemerkte Löschungen sind noch enthalten.
+        """
+        if self._pending_add:
+            self._flush()
+        ids = []
+        for term in triple_pattern:
+            if term is None:
+                ids.append(None)
+                continue
+            tid = self.terms.id_of(term)
+            if tid is None:
+                return None
+            ids.append(tid)
+
+        name, n_keys = _INDEX_FOR_PATTERN[tuple(i is not None for i in ids)]
+        order = INDEX_ORDERS[name]
+        columns = self._index[name]
+        keys = [ids[pos] for pos in order[:n_keys]]
+        lo, hi = _key_range(columns, keys)
+        if lo == hi:
+            return None
+        by_pos = {pos: col[lo:hi] for pos, col in zip(order, columns)}
+        return by_pos[0], by_pos[1], by_pos[2]
+
+    # --- rdflib-Store-Schnittstelle ------------------------------------
+
+    def add(self, triple, context=None, quoted=False):
+        Store.add(self, triple, context, quoted=quoted)
+        ids = tuple(self.terms.intern(t) for t in triple)
+        self.generation += 1
+        if self._pending_remove and ids in self._pending_remove:
+            self._pending_remove.discard(ids)
+        else:
+            self._pending_add.extend(ids)
+
+    def addN(self, quads):
+        for s, p, o, c in quads:
+            self.add((s, p, o), c)
+
+    def add_ids(self, terms, ids):
+        """
+        Fügt viele Tripel in einem Zug hinzu: `ids` ist ein uint32-Array mit
+        je drei Positionen in der Termliste `terms` (wie graph_cache.pack_triples).
+        Jeder Term wird nur einmal interniert, die IDs werden per NumPy
+        umgeschlüsselt. Einzelne TripleAddedEvents werden dabei nicht verschickt.
+        """
+        ids = np.asarray(ids, dtype=np.uint32)
+        if not len(ids):
+            return
+        if self._pending_remove:
+            # vorgemerkte Löschungen zuerst anwenden, damit die Reihenfolge gilt
+            self._flush()
+        table = np.fromiter((self.terms.intern(t) for t in terms), dtype=np.uint32, count=len(terms))
+        self._pending_add.frombytes(table[ids].tobytes())
+        self.generation += 1
+
+    def remove(self, triple_pattern, context=None):
+        Store.remove(self, triple_pattern, context)
+        found = self._lookup(triple_pattern)
+        if found is not None:
+            self.generation += 1
+            self._pending_remove.update(zip(*(col.tolist() for col in found)))
+
+    def triples(self, triple_pattern, context=None):
+        found = self._lookup(triple_pattern)
+        if found is None:
+            return
+        if self._pending_remove:
+            rows = [r for r in zip(*(col.tolist() for col in found)) if r not in self._pending_remove]
+        else:
+            rows = zip(*(col.tolist() for col in found))
+        term = self.terms.term
+        for s, p, o in rows:
+            yield (term(s), term(p), term(o)), iter(())
+
+    def __len__(self, context=None):
+        self._flush()
+        return len(self._index["spo"][0])
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def bind(self, prefix, namespace, override=True):
+        bound_namespace = self.__namespace.get(prefix)
+        bound_prefix = self.__prefix.get(namespace)
+        if bound_prefix is None and bound_namespace is not None:
+            bound_prefix = self.__prefix.get(bound_namespace)
+        if override:
+            if bound_prefix is not None:
+                del self.__namespace[bound_prefix]
+            if bound_namespace is not None:
+                del self.__prefix[bound_namespace]
+            self.__prefix[namespace] = prefix
+            self.__namespace[prefix] = namespace
+        else:
+            ns = bound_namespace if bound_namespace is not None else namespace
+            pf = bound_prefix if bound_prefix is not None else prefix
+            self.__prefix[ns] = pf
+            self.__namespace[pf] = ns
+
+    def namespace(self, prefix):
+        return self.__namespace.get(prefix)
+
+    def prefix(self, namespace):
+        return self.__prefix.get(namespace)
+
+    def namespaces(self):
+        yield from self.__namespace.items()
+
+    # --- Zusatzfunktionen ----------------------------------------------
+
+    def id_triples(self):
+        """Die drei sortierten SPO-Spalten (NumPy-Arrays von Term-IDs)."""
+        self._flush()
+        return self._index["spo"]
+
+    def id_index(self, name):
+        """Spalten des Index `name` ("spo", "pos" oder "osp")."""
+        self._flush()
+        return self._index[name]
+
+    def blank_node_closures(self):
+        """
+        (ptr, s, p, o) der CBDs aller Blank Nodes (siehe blank_node_closures),
+        zwischengespeichert. Nach Änderungen werden nur die CBDs neu
+        berechnet, die einen berührten Blank Node enthalten.
+        """
+        self._flush()
+        if self._closures is None:
+            self._closures = blank_node_closures(self._index["spo"], self._term_kinds())
+        elif self._touched:
+            kinds = self._term_kinds()
+            touched = np.unique(np.concatenate(self._touched)).astype(np.int64)
+            self._touched.clear()
+            touched = touched[kinds[touched] == KIND_BNODE]
+            ptr, s, _, o = self._closures
+            # Wurzeln, deren CBD einen berührten Blank Node enthält (als Subjekt oder verschachteltes Objekt)
+            rows = np.flatnonzero(np.isin(s, touched) | np.isin(o, touched))
+            containing = np.searchsorted(ptr, rows, "right") - 1
+            roots = np.union1d(touched, containing)
+            fresh = blank_node_closures(self._index["spo"], kinds, roots)
+            self._closures = replace_closures(self._closures, fresh, roots)
+        return self._closures
+
+    def closure_ids(self, node_ids):
+        """(s, p, o)-ID-Spalten der CBDs mehrerer Blank Nodes in einem Zugriff."""
+        ptr, s, p, o = self.blank_node_closures()
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        rows = gather_ranges(ptr, node_ids[node_ids < len(ptr) - 1])
+        return s[rows], p[rows], o[rows]
+
+    def cbd(self, node):
+        """Tripel der CBD eines Blank Nodes (leer für unbekannte Knoten und IRIs)."""
+        tid = self.terms.id_of(node)
+        if tid is None:
+            return
+        term = self.terms.term
+        for triple in zip(*(col.tolist() for col in self.closure_ids([tid]))):
+            yield tuple(term(i) for i in triple)
+
+    def nbytes(self):
+        """Speicherbedarf der Tripel-Indizes in Bytes (ohne Termtabelle)."""
+        self._flush()
+        return sum(col.nbytes for cols in self._index.values() for col in cols)
+
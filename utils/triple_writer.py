@@ -0,0 +1,142 @@
+"""
+Streamende Ausgabe als N-Triples bzw. N-Quads, optional gzip-komprimiert.
+
+Der Turtle-Serializer von rdflib sortiert und gruppiert den ganzen Graphen
+im Speicher. TripleWriter schreibt dagegen jedes Tripel sofort als eine
+Zeile, sobald es gefunden wird. Er hat dieselbe `add`-Schnittstelle wie ein
+rdflib-Graph und kann daher überall dort übergeben werden, wo die
+Extraktoren einen Subgraphen befüllen.
+
+Das Format ergibt sich aus der Dateiendung:
+
+    .nt  .nt.gz    N-Triples
+    .nq  .nq.gz    N-Quads (mit `graph_name` als viertem Term)
+
+Doppelte Tripel werden über die ganze Ausgabe unterdrückt (`dedupe=True`),
+sodass die Datei dieselbe Tripelmenge enthält wie ein befüllter Graph und
+len() deren Größe ist. Dafür bekommt jeder Term eine fortlaufende ID (die
+Tabelle hält ohnehin seine N-Triples-Schreibweise), und gemerkt wird pro
+Tripel nur eine aus den drei IDs gebildete Zahl, nicht das Tripel selbst.
+
+Verwendung:
+    from triple_writer import TripleWriter
+    with TripleWriter("subgraph_AlbanBerg.nt.gz") as out:
+        extract_subgraph(g, ["AlbanBerg"], {"composer"}, out=out)
+
+    with TripleWriter("subgraph.nq", graph_name=URIRef("urn:mhg:sub")) as out:
+        out.addN((s, p, o, sub) for s, p, o in sub)
+"""
+import gzip
+import os
+from pathlib import Path
+
+from rdflib import BNode, Literal, URIRef
+
+# Dateiendung -> Format
+FORMATS = {".nt": "nt", ".nq": "nquads"}
+
+_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+
+
+def stream_format(path):
+    """(Format, gzip) für einen Ausgabepfad, oder None, wenn er nicht gestreamt wird."""
+    suffixes = Path(path).suffixes
+    compressed = bool(suffixes) and suffixes[-1] == ".gz"
+    if compressed:
+        suffixes = suffixes[:-1]
+    fmt = FORMATS.get(suffixes[-1]) if suffixes else None
+    return (fmt, compressed) if fmt else None
+
+
+def is_stream_path(path):
+    return stream_format(path) is not None
+
+
+def term_nt(term):
+    """Ein RDF-Term in N-Triples-Schreibweise."""
+    if isinstance(term, URIRef):
+        return f"<{term}>"
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    if isinstance(term, Literal):
+        lexical = f'"{str(term).translate(_ESCAPES)}"'
+        if term.language:
+            return f"{lexical}@{term.language}"
+        if term.datatype is not None:
+            return f"{lexical}^^<{term.datatype}>"
+        return lexical
+    raise TypeError(f"Nicht unterstützter RDF-Term: {term!r}")
+
+
+class TripleWriter:
+    """Schreibt Tripel zeilenweise in eine .nt/.nq(.gz)-Datei (atomar beim Schließen)."""
+
+    def __init__(self, path, graph_name=None, dedupe=True, compresslevel=6):
+        fmt = stream_format(path)
+        if fmt is None:
+            raise ValueError(f"Unbekanntes Streaming-Format: {path} (erwartet .nt, .nq, optional .gz)")
+        self.path = Path(path)
+        self.format, compressed = fmt
+        self._suffix = f" {term_nt(graph_name)} .\n" if graph_name and self.format == "nquads" else " .\n"
+        self._seen = set() if dedupe else None
+        self._terms = {}
+        self._count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        if compressed:
+            self._fh = gzip.open(self._tmp, "wt", encoding="utf-8", compresslevel=compresslevel)
+        else:
+            self._fh = open(self._tmp, "w", encoding="utf-8")
+
+    def _term(self, term):
+        """(ID, N-Triples-Text) eines Terms."""
+        entry = self._terms.get(term)
+        if entry is None:
+            entry = self._terms[term] = (len(self._terms), term_nt(term))
+        return entry
+
+    def add(self, triple):
+        (s, s_nt), (p, p_nt), (o, o_nt) = (self._term(t) for t in triple)
+        if self._seen is not None:
+            key = (s << 64) | (p << 32) | o
+            if key in self._seen:
+                return
+            self._seen.add(key)
+        self._fh.write(f"{s_nt} {p_nt} {o_nt}{self._suffix}")
+        self._count += 1
+
+    def addN(self, quads):
+        """
+        Schreibt Quads (s, p, o, Kontext) wie rdflib.Graph.addN. Der Kontext
+        wird verworfen; bei .nq steht stets `graph_name` als vierter Term.
+        """
+        for s, p, o, _ in quads:
+            self.add((s, p, o))
+
+    def bind(self, prefix, namespace, *args, **kwargs):
+        """Präfixe gibt es in N-Triples nicht; vorhanden für die Graph-Schnittstelle."""
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+            os.replace(self._tmp, self.path)
+
+    def abort(self):
+        """Verwirft die unvollständige Ausgabe."""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+            self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
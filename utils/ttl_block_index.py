@@ -0,0 +1,328 @@
+"""
+Byte-Offset-Index für Subjekt-Blöcke einer TTL-Datei und Patch-API.
+
+Der Index ordnet jedem Subjekt (z. B. mhg:TheodorWiesengrundAdorno) die
+Byte-Bereiche seiner Blöcke und einen Hash ihres Inhalts zu. Er liegt als
+JSON-Sidecar in `.mhg_cache/` neben der TTL-Datei und ist an Größe und
+Änderungszeit der Datei gebunden; ist er veraltet, wird er mit einem
+Durchgang über die Datei neu aufgebaut (siehe ttl_blocks.py).
+
+Mit `patch` werden nur geänderte Blöcke geschrieben:
+- passt der neue Text in den alten Bereich, wird er an Ort und Stelle
+  geschrieben und der Rest mit Leerzeichen aufgefüllt;
+- sonst wird der alte Bereich ausgeleert (Zeilenumbrüche bleiben erhalten,
+  die Zeilennummern der übrigen Blöcke ändern sich nicht) und der Block am
+  Dateiende angehängt.
+Der Aufwand hängt damit von der Größe der Änderung ab, nicht von der
+Dateigröße. `compact` entfernt den angesammelten Leerraum wieder.
+
+Verwendung:
+    from ttl_block_index import BlockIndex
+    index = BlockIndex.open("composers_updated.ttl")
+    text = index.read("mhg:TheodorWiesengrundAdorno")
+    index.patch({"mhg:TheodorWiesengrundAdorno": text.replace(" .\n", " ;\n    schema:deathPlace mhg:Visp .\n")})
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+
+from graph_cache import CACHE_DIR_NAME
+from ttl_blocks import iter_blocks
+
+INDEX_VERSION = 2
+
+_PREFIX = re.compile(r"\s*@?prefix\s+([A-Za-z][\w.-]*)?:\s*<([^>]*)>", re.I)
+# Alle Bytes außer dem Zeilenumbruch werden beim Ausleeren zu Leerzeichen
+_BLANK = bytes(10 if i == 10 else 32 for i in range(256))
+
+
+def index_path_for(ttl_file, cache_dir=None):
+    """Pfad des Block-Index einer TTL-Datei."""
+    ttl_file = Path(ttl_file)
+    cache_dir = Path(cache_dir) if cache_dir else ttl_file.resolve().parent / CACHE_DIR_NAME
+    return cache_dir / f"{ttl_file.name}.blockidx"
+
+
+def _normalized(text):
+    return text if text.endswith("\n") else text + "\n"
+
+
+def block_digest(text):
+    """Kurzer Inhalts-Hash eines Block-Texts."""
+    return hashlib.blake2b(_normalized(text).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _file_stat(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class BlockIndex:
+    """
+    Subjekt -> Byte-Bereiche und Inhalts-Hash der Blöcke einer TTL-Datei.
+
+    Schlüssel sind vollständige IRIs bzw. Blank-Node-Labels (_:b1);
+    Methoden akzeptieren auch Präfixnamen ("mhg:...") und rdflib-Terme.
+    Hat ein Subjekt mehrere Blöcke, gelten diese zusammen als seine
+    Beschreibung: `read` liefert alle, `patch` ersetzt alle.
+    """
+
+    def __init__(self, ttl_file, cache_dir=None):
+        self.path = Path(ttl_file)
+        self.index_path = index_path_for(ttl_file, cache_dir)
+        self.prefixes = {}
+        self.directives = []
+        self.blocks = {}    # Schlüssel -> [Hash, [[start, end], ...]]
+        self.other_digest = None  # Hash über Direktiven und Blöcke ohne Schlüssel
+        self.slack = 0      # durch Patches entstandener Leerraum in Bytes
+        self.size = self.mtime_ns = None
+
+    # --- Laden und Speichern -------------------------------------------
+
+    @classmethod
+    def open(cls, ttl_file, cache_dir=None):
+        """Lädt den Index oder baut ihn neu auf, wenn er fehlt oder veraltet ist."""
+        index = cls(ttl_file, cache_dir)
+        if not index._load():
+            index.rebuild()
+        return index
+
+    def _load(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != INDEX_VERSION:
+            return False
+        if [data.get("size"), data.get("mtime_ns")] != list(_file_stat(self.path)):
+            return False
+        self.prefixes = data["prefixes"]
+        self.directives = data["directives"]
+        self.blocks = data["blocks"]
+        self.other_digest = data["other_digest"]
+        self.slack = data["slack"]
+        self.size, self.mtime_ns = data["size"], data["mtime_ns"]
+        return True
+
+    def save(self):
+        """Schreibt den Index atomar neben die TTL-Datei."""
+        self.size, self.mtime_ns = _file_stat(self.path)
+        data = {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "slack": self.slack,
+            "prefixes": self.prefixes,
+            "directives": self.directives,
+            "other_digest": self.other_digest,
+            "blocks": self.blocks,
+        }
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(self.index_path.name + f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.index_path)
+
+    def _scan(self, blocks):
+        """Baut den Index aus (TurtleBlock, start, end)-Tupeln auf."""
+        self.prefixes = {}
+        self.directives = []
+        self.blocks = {}
+        hashes = {}
+        other = hashlib.blake2b(digest_size=8)
+        for block, start, end in blocks:
+            if block.kind == "directive":
+                m = _PREFIX.match(block.text)
+                if m:
+                    self.prefixes[m.group(1) or ""] = m.group(2)
+                self.directives.append(block.text.strip())
+                other.update(_normalized(block.text).encode("utf-8"))
+                continue
+            if block.kind != "statement" or block.subject[0] in "[(":
+                other.update(_normalized(block.text).encode("utf-8"))
+                continue
+            key = self.key(block.subject)
+            entry = self.blocks.get(key)
+            if entry is None:
+                entry = self.blocks[key] = [None, []]
+                hashes[key] = hashlib.blake2b(digest_size=8)
+            entry[1].append([start, end])
+            hashes[key].update(_normalized(block.text).encode("utf-8"))
+        for key, h in hashes.items():
+            self.blocks[key][0] = h.hexdigest()
+        self.other_digest = other.hexdigest()
+
+    def rebuild(self):
+        """Liest die TTL-Datei einmal vollständig und schreibt den Index neu."""
+        with open(self.path, "rb") as f:
+            self._scan((b, b.start, b.end) for b in iter_blocks(f))
+        self.slack = 0
+        self.save()
+
+    # --- Abfragen ------------------------------------------------------
+
+    def key(self, subject):
+        """Normalisiert ein Subjekt (Präfixname, <IRI>, rdflib-Term) zum Indexschlüssel."""
+        subject = str(subject)
+        if subject.startswith("<") and subject.endswith(">"):
+            return subject[1:-1]
+        if subject.startswith("_:"):
+            return subject
+        prefix, sep, local = subject.partition(":")
+        if sep and prefix in self.prefixes and not local.startswith("//"):
+            return self.prefixes[prefix] + local
+        return subject
+
+    def __contains__(self, subject):
+        return self.key(subject) in self.blocks
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    def digest(self, subject):
+        """Inhalts-Hash der Blöcke eines Subjekts oder None."""
+        entry = self.blocks.get(self.key(subject))
+        return entry[0] if entry else None
+
+    def ranges(self, subject):
+        """Byte-Bereiche [(start, end), ...] der Blöcke eines Subjekts."""
+        entry = self.blocks.get(self.key(subject))
+        return [tuple(r) for r in entry[1]] if entry else []
+
+    def read(self, subject, replace=None):
+        """
+        Text aller Blöcke eines Subjekts (None, wenn unbekannt).
+        `replace` ersetzt einzelne Blöcke, angegeben über ihren Start-Offset.
+        """
+        ranges = self.ranges(subject)
+        if not ranges:
+            return None
+        replace = replace or {}
+        parts = []
+        with open(self.path, "rb") as f:
+            for start, end in ranges:
+                text = replace.get(start)
+                if text is None:
+                    f.seek(start)
+                    text = f.read(end - start).decode("utf-8")
+                parts.append(_normalized(text))
+        return "".join(parts)
+
+    # --- Patchen -------------------------------------------------------
+
+    def patch(self, changes):
+        """
+        Ersetzt die Blöcke der Subjekte in `changes` (Subjekt -> neuer Text,
+        None löscht) direkt in der Datei. Gibt die Anzahl geschriebener
+        Bytes zurück.
+        """
+        written = 0
+        appends = []
+        with open(self.path, "r+b") as f:
+            for subject, text in changes.items():
+                key = self.key(subject)
+                data = None if text is None else _normalized(text).encode("utf-8")
+                entry = self.blocks.pop(key, None)
+                ranges = entry[1] if entry else []
+                for i, (start, end) in enumerate(ranges):
+                    f.seek(start)
+                    old = f.read(end - start)
+                    f.seek(start)
+                    if i == 0 and data is not None and len(data) <= len(old):
+                        f.write(data + old[len(data):].translate(_BLANK))
+                        self.blocks[key] = [block_digest(text), [[start, start + len(data)]]]
+                        self.slack += len(old) - len(data)
+                        data = None
+                    else:
+                        f.write(old.translate(_BLANK))
+                        self.slack += len(old)
+                    written += len(old)
+                if data is not None:
+                    appends.append((key, data))
+
+            if appends:
+                pos = f.seek(0, os.SEEK_END)
+                if pos:
+                    f.seek(pos - 1)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                        pos += 1
+                for key, data in appends:
+                    f.write(data)
+                    self.blocks[key] = [
+                        hashlib.blake2b(data, digest_size=8).hexdigest(),
+                        [[pos, pos + len(data)]],
+                    ]
+                    pos += len(data)
+                    written += len(data)
+        self.save()
+        return written
+
+    def compact(self):
+        """Schreibt die Datei ohne den durch Patches entstandenen Leerraum neu."""
+        tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        scanned = []
+        pos = 0
+        with open(self.path, "rb") as src, open(tmp, "wb") as out:
+            for block in iter_blocks(src):
+                # Padding besteht aus Zeilen nur mit Leerzeichen; echte Leerzeilen bleiben
+                leading = "".join(
+                    line for line in block.leading.splitlines(keepends=True)
+                    if line.strip() or line in ("\n", "\r\n")
+                ).encode("utf-8")
+                text = block.text.encode("utf-8")
+                out.write(leading)
+                out.write(text)
+                start = pos + len(leading)
+                pos = start + len(text)
+                scanned.append((block, start, pos))
+        os.replace(tmp, self.path)
+        self._scan(scanned)
+        self.slack = 0
+        self.save()
+
+
+def sync_derived(src, dst, changes, cache_dir=None):
+    """
+    Hält `dst` auf dem Stand "`src` mit den Subjekt-Blöcken aus `changes`".
+
+    Fehlt `dst` oder ist `src` neuer, wird `src` kopiert. Danach werden nur
+    die Subjekte geschrieben, deren Hash in `dst` vom Sollzustand abweicht:
+    geänderte Blöcke aus `changes` und Blöcke, die ein früherer Lauf
+    geändert hat und die jetzt wieder dem Original entsprechen sollen.
+    Besteht `dst` danach zu mehr als der Hälfte aus Leerraum, wird die
+    Datei kompaktiert. Gibt (Anzahl Subjekte, geschriebene Bytes) zurück.
+    """
+    src_index = BlockIndex.open(src, cache_dir)
+    if not Path(dst).exists() or os.path.getmtime(src) > os.path.getmtime(dst):
+        shutil.copyfile(src, dst)
+    dst_index = BlockIndex.open(dst, cache_dir)
+
+    wanted = {src_index.key(s): text for s, text in changes.items()}
+    patches = {}
+    for key, (digest, _) in src_index.blocks.items():
+        if key in wanted:
+            text = wanted[key]
+            if text is None:
+                if key in dst_index:
+                    patches[key] = None
+            elif dst_index.digest(key) != block_digest(text):
+                patches[key] = text
+        elif dst_index.digest(key) != digest:
+            patches[key] = src_index.read(key)
+    for key, text in wanted.items():
+        if key not in src_index.blocks and text is not None and dst_index.digest(key) != block_digest(text):
+            patches[key] = text
+    if not patches:
+        return 0, 0
+    written = dst_index.patch(patches)
+    if dst_index.slack > dst_index.size // 2:
+        dst_index.compact()
+    return len(patches), written
@@ -0,0 +1,338 @@
+"""
+Streaming-Tokenizer für Turtle-Dateien auf Block-Ebene.
+
+Liest eine TTL-Datei zeilenweise in einem Durchgang und liefert für jedes
+Statement einen TurtleBlock mit Subjekt, Prädikat-/Objektlisten, Rohtext
+und Byte-Offsets. Der Speicherbedarf hängt nur von der Größe des größten
+Blocks ab, nicht von der Dateigröße.
+
+Die Blöcke sind verlustfrei: leading + text aller Blöcke ergibt wieder
+exakt den Dateiinhalt. Skripte können Blöcke daher unverändert oder
+bearbeitet direkt in eine Ausgabedatei schreiben.
+
+Verwendung:
+    with open("composers_interim.ttl", "rb") as f:
+        for block in iter_blocks(f):
+            if block.kind == "statement":
+                print(block.subject, block.first("schema:name"))
+"""
+import re
+
+_TOKEN = re.compile(r'''
+    (?P<skip>\s+|\#[^\n]*)
+  | (?P<literal>(?:"""(?:[^"\\]|\\.|"(?!""))*"""|\'\'\'(?:[^'\\]|\\.|'(?!''))*\'\'\'
+                 |"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+                (?:@[A-Za-z]+(?:-[A-Za-z0-9]+)*|\^\^(?:<[^<>\s]*>|[\w-]*:(?:[\w.-]*[\w-])?))?)
+  | (?P<iri><[^<>"{}|^`\\\s]*>)
+  | (?P<punct>[;,\[\]()])
+  | (?P<end>\.(?=\s|\#|$))
+  | (?P<word>[^\s;,\[\]()"'<\#]+?(?=[\s;,\[\]()"'<\#]|\.(?:\s|\#|$)|$))
+''', re.X | re.S)
+
+_SPARQL_DIRECTIVE = re.compile(r"\s*(?:PREFIX|BASE)\s", re.I)
+_UNESCAPE = re.compile(r"\\(.)", re.S)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+
+class TurtleBlock:
+    """
+    Ein Statement (oder eine Direktive) einer Turtle-Datei.
+
+    kind        "statement", "directive" oder "trailer" (Rest am Dateiende)
+    subject     Subjekt-Token, z. B. "mhg:TheodorWiesengrundAdorno"
+    predicates  Liste von (Prädikat, [Objekte]) als Quelltext-Tokens;
+                verschachtelte [ ... ]-Objekte bleiben als Rohtext erhalten
+    leading     Leerzeilen und Kommentare vor dem Statement
+    text        Quelltext des Statements bis einschließlich Zeilenende
+    start, end  Byte-Offsets von `text` in der Datei
+    line        Zeilennummer (1-basiert), in der das Statement beginnt
+    """
+
+    __slots__ = ("kind", "subject", "predicates", "leading", "text", "start", "end", "line")
+
+    def __init__(self, kind, subject, predicates, leading, text, start, end, line):
+        self.kind = kind
+        self.subject = subject
+        self.predicates = predicates
+        self.leading = leading
+        self.text = text
+        self.start = start
+        self.end = end
+        self.line = line
+
+    def __repr__(self):
+        return f"TurtleBlock({self.kind!r}, {self.subject!r}, line={self.line})"
+
+    def objects(self, predicate):
+        """Alle Objekt-Tokens eines Prädikats (über alle Vorkommen)."""
+        return [o for p, objs in self.predicates if p == predicate for o in objs]
+
+    def first(self, predicate):
+        """Erstes Objekt-Token eines Prädikats oder None."""
+        for p, objs in self.predicates:
+            if p == predicate and objs:
+                return objs[0]
+        return None
+
+    def types(self):
+        """Objekte von `a` bzw. rdf:type."""
+        return self.objects("a") + self.objects("rdf:type")
+
+
+def _tokenize(text, pos=0):
+    """
+    Zerlegt `text` ab `pos` in (Art, Start, Ende)-Tokens ohne Leerraum und
+    Kommentare. Gibt zusätzlich die Position zurück, an der nicht weiter
+    tokenisiert werden konnte (len(text), wenn alles erkannt wurde).
+    """
+    tokens = []
+    n = len(text)
+    while pos < n:
+        m = _TOKEN.match(text, pos)
+        if m is None:
+            break
+        if m.lastgroup != "skip":
+            tokens.append((m.lastgroup, m.start(), m.end()))
+        pos = m.end()
+    return tokens, pos
+
+
+class _StatementScanner:
+    """
+    Sucht Statement-Enden, während eine Datei zeilenweise eingelesen wird.
+    Jede Zeile wird nur einmal tokenisiert: Klammertiefe und ein
+    unvollständiges Token am Zeilenende (mehrzeiliges Literal, noch offene
+    PREFIX-/BASE-Direktive) bleiben zwischen den Zeilen erhalten.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.depth = 0
+        self.started = False
+        self.pending = ""
+
+    def scan(self, text, lineno):
+        """
+        Tokenisiert die neue Zeile (bzw. den Zeilenrest) `text`. Gibt den Index
+        in `text` direkt hinter dem Ende des laufenden Statements zurück oder
+        None, wenn es noch nicht abgeschlossen ist. Nicht erkennbarer Text
+        (z. B. ein nicht geschlossenes Anführungszeichen) löst ValueError aus.
+        """
+        carry = len(self.pending)
+        chunk = self.pending + text if carry else text
+        self.pending = ""
+        pos, n = 0, len(chunk)
+        while pos < n:
+            if not self.started and _SPARQL_DIRECTIVE.match(chunk, pos):
+                close = chunk.find(">", pos)
+                if close < 0:
+                    self.pending = chunk[pos:]
+                    return None
+                self._reset()
+                return close + 1 - carry
+            m = _TOKEN.match(chunk, pos)
+            if chunk.startswith(('"""', "'''"), pos) and (m is None or m.end() - pos < 6):
+                # mehrzeiliges Literal (ohne Abschluss träfe nur "" zu): mit den nächsten Zeilen weiter
+                self.pending = chunk[pos:]
+                return None
+            if m is None:
+                raise ValueError(f"Zeile {lineno}: ungültiges Turtle-Token bei {chunk[pos:pos + 40]!r}")
+            kind = m.lastgroup
+            if kind != "skip":
+                self.started = True
+            if kind == "punct":
+                c = chunk[m.start()]
+                if c in "[(":
+                    self.depth += 1
+                elif c in "])":
+                    self.depth -= 1
+            elif kind == "end" and self.depth == 0:
+                self._reset()
+                return m.end() - carry
+            pos = m.end()
+        return None
+
+
+def _group_end(text, tokens, i):
+    """Index des Tokens hinter der bei tokens[i] beginnenden Klammergruppe."""
+    depth = 0
+    while i < len(tokens):
+        kind, s, _ = tokens[i]
+        if kind == "punct":
+            c = text[s]
+            if c in "[(":
+                depth += 1
+            elif c in "])":
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+        i += 1
+    return i
+
+
+def _term(text, tokens, i):
+    """Liest einen Term (Token oder Klammergruppe) ab tokens[i]."""
+    kind, s, e = tokens[i]
+    if kind == "punct" and text[s] in "[(":
+        j = _group_end(text, tokens, i)
+        return text[s:tokens[j - 1][2]], j
+    return text[s:e], i + 1
+
+
+def _parse_predicates(text, tokens, i):
+    """Liest eine Prädikat-Objekt-Liste bis '.', ']' oder Tokenende."""
+    predicates = []
+    n = len(tokens)
+    while i < n:
+        kind, s, _ = tokens[i]
+        if kind == "end" or (kind == "punct" and text[s] == "]"):
+            break
+        if kind == "punct" and text[s] == ";":
+            i += 1
+            continue
+        predicate, i = _term(text, tokens, i)
+        objects = []
+        while i < n:
+            obj, i = _term(text, tokens, i)
+            objects.append(obj)
+            if i < n and tokens[i][0] == "punct" and text[tokens[i][1]] == ",":
+                i += 1
+                continue
+            break
+        predicates.append((predicate, objects))
+    return predicates, i
+
+
+def parse_statement(text):
+    """
+    Zerlegt den Quelltext eines Statements.
+    Gibt (kind, subject, predicates) zurück.
+    """
+    tokens, _ = _tokenize(text)
+    if not tokens:
+        return "trailer", None, []
+    first = text[tokens[0][1]:tokens[0][2]]
+    if first.startswith("@") or first.upper() in ("PREFIX", "BASE"):
+        return "directive", None, []
+    subject, i = _term(text, tokens, 0)
+    predicates, _ = _parse_predicates(text, tokens, i)
+    return "statement", subject, predicates
+
+
+def parse_blank_node(text):
+    """Prädikat-Objekt-Liste eines [ ... ]-Objekts."""
+    tokens, _ = _tokenize(text)
+    start = 1 if tokens and text[tokens[0][1]] == "[" else 0
+    predicates, _ = _parse_predicates(text, tokens, start)
+    return predicates
+
+
+def literal_lexical(token):
+    """Lexikalische Form eines Literal-Tokens ohne Anführungszeichen, Sprache und Datentyp."""
+    if not token or token[0] not in "\"'":
+        return token
+    quote = token[:3] if token[:3] in ('"""', "'''") else token[0]
+    body = token[len(quote):token.rindex(quote)]
+    return _UNESCAPE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def iri_value(token):
+    """IRI ohne spitze Klammern (Präfixnamen bleiben unverändert)."""
+    if token and token.startswith("<") and token.endswith(">"):
+        return token[1:-1]
+    return token
+
+
+def replace_names(text, mapping):
+    """
+    Ersetzt Namens-Tokens (z. B. "mhg:Alt" -> "mhg:Neu") in einem Block.
+    Strings, IRIs in spitzen Klammern und Kommentare bleiben unberührt.
+    Gibt (neuer_text, anzahl_ersetzungen) zurück.
+    """
+    tokens, _ = _tokenize(text)
+    out, last, count = [], 0, 0
+    for kind, s, e in tokens:
+        if kind == "word":
+            new = mapping.get(text[s:e])
+            if new is not None:
+                out.append(text[last:s])
+                out.append(new)
+                last = e
+                count += 1
+    out.append(text[last:])
+    return "".join(out), count
+
+
+def _make_block(leading, text, start, line):
+    kind, subject, predicates = parse_statement(text)
+    return TurtleBlock(kind, subject, predicates, leading, text, start,
+                       start + len(text.encode("utf-8")), line)
+
+
+def iter_blocks(fh):
+    """
+    Liefert die TurtleBlocks einer geöffneten Datei (binär oder Text) in
+    Dateireihenfolge. Für korrekte Byte-Offsets die Datei binär öffnen.
+    Nicht tokenisierbarer Text löst ValueError mit der Zeilennummer aus,
+    statt den Rest der Datei in einen Block zu sammeln.
+    """
+    leading = []
+    buf = []
+    offset = 0
+    start = line_start = 0
+    lineno = 0
+    scanner = _StatementScanner()
+
+    for raw in fh:
+        lineno += 1
+        if isinstance(raw, bytes):
+            size, line = len(raw), raw.decode("utf-8")
+        else:
+            line = raw
+            size = len(line.encode("utf-8"))
+
+        if not buf:
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                leading.append(line)
+                offset += size
+                continue
+            start, line_start = offset, lineno
+        buf.append(line)
+        offset += size
+
+        while True:
+            end = scanner.scan(buf[-1], lineno)
+            if end is None:
+                break
+            tail = buf[-1]
+            rest = tail[end:]
+            rest_stripped = rest.strip()
+            if not rest_stripped or rest_stripped.startswith("#"):
+                end = len(tail)
+            else:
+                while end < len(tail) and tail[end] in " \t":
+                    end += 1
+            buf[-1], rest = tail[:end], tail[end:]
+            block = _make_block("".join(leading), "".join(buf), start, line_start)
+            yield block
+            leading = []
+            start, line_start = block.end, lineno
+            buf = [rest] if rest else []
+            if not rest:
+                break
+
+    if buf:
+        yield _make_block("".join(leading), "".join(buf), start, line_start)
+        leading = []
+    if leading:
+        text = "".join(leading)
+        yield TurtleBlock("trailer", None, [], text, "", offset, offset, lineno)
+
+
+def iter_file_blocks(path):
+    """Wie iter_blocks, öffnet die Datei aber selbst (binär)."""
+    with open(path, "rb") as fh:
+        yield from iter_blocks(fh)
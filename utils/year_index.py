@@ -0,0 +1,261 @@
+"""
+Sortierter Jahresindex für Entstehungs-, Geburts- und Sterbedaten.
+
+Die Datumsangaben im Graphen sind uneinheitlich ("1947", "1935-36",
+"1919/8/25-29", "1950s?", "1874-09-13"^^xsd:date, ...). Beim Aufbau wird
+jede Angabe einmal auf eine Jahresspanne (erstes, letztes Jahr) abgebildet
+und nach Anfangsjahr sortiert in NumPy-Arrays abgelegt. Bereichsabfragen
+brauchen danach nur noch eine binäre Suche statt STR/SUBSTR/xsd:integer
+pro Lösung.
+
+Für SPARQL stehen nach register() Erweiterungsfunktionen im Namensraum
+mhgfn: bereit, die denselben Index nutzen (er wird pro Graph beim ersten
+Aufruf aufgebaut):
+
+    PREFIX mhgfn: <http://music-history-graph.ch/functions#>
+    FILTER (mhgfn:year(?date) < 1960)            # erstes Jahr einer Angabe
+    FILTER (mhgfn:creationYear(?work) < 1960)
+    FILTER (mhgfn:createdBetween(?work, 1920, 1930))
+    FILTER (mhgfn:aliveIn(?composer, 1945))
+
+Verwendung:
+    from year_index import YearIndex
+    years = YearIndex.for_graph(g)
+    years.created_between(1920, 1930)     # Werke mit Anfangsjahr 1920..1930
+    years.alive_in(1945)                  # Komponisten, die 1945 lebten
+
+    import year_index
+    year_index.register()                 # mhgfn:-Funktionen für g.query(...)
+"""
+import re
+import weakref
+from functools import lru_cache
+
+import numpy as np
+from rdflib import Literal, Namespace, URIRef
+from rdflib.plugins.sparql.operators import register_custom_function
+from rdflib.plugins.sparql.sparql import SPARQLError
+from rdflib.term import BNode
+
+from graph_cache import graph_stamp
+
+mhgfn = Namespace("http://music-history-graph.ch/functions#")
+frbr = Namespace("http://purl.org/vocab/frbr/core/")
+schema = Namespace("https://schema.org/")
+
+DATE_PREDICATES = {
+    "creation": frbr.hasCreationDate,
+    "birth": schema.birthDate,
+    "death": schema.deathDate,
+}
+
+_ISO_DATE = re.compile(r"(\d{4})-\d{2}-\d{2}")
+_DECADE = re.compile(r"\b(\d{3})0s")
+# "1935-36", "1946,49": zweistellige Jahre nach einem vierstelligen
+# (01-12 dahinter ist ein Monat wie in "1874-09", siehe _short_range_end)
+_SHORT_RANGE = re.compile(r"\b(\d{2})(\d{2})\s*[-,]\s*(\d{2})\b(?![-/.]?\d)")
+_YEAR = re.compile(r"(?<!\d)(\d{4})(?!\d)")
+
+
+def _short_range_end(m):
+    """Zweites Jahr einer Kurzspanne oder None (Monat oder kein späteres Jahr)."""
+    first, tail = int(m.group(1) + m.group(2)), int(m.group(3))
+    end = int(m.group(1) + m.group(3))
+    if 1 <= tail <= 12 or end < first:
+        return None
+    return end
+
+
+def year_span(text):
+    """Jahresspanne (erstes, letztes Jahr) einer Datumsangabe oder None."""
+    text = str(text).strip()
+    m = _ISO_DATE.fullmatch(text)
+    if m:
+        year = int(m.group(1))
+        return year, year
+    years = [int(y) for y in _YEAR.findall(text)]
+    for m in _DECADE.finditer(text):
+        years.append(int(m.group(1)) * 10 + 9)
+    for m in _SHORT_RANGE.finditer(text):
+        end = _short_range_end(m)
+        if end is not None:
+            years.append(end)
+    if not years:
+        return None
+    return min(years), max(years)
+
+
+def first_year(text):
+    """
+    Erste Jahreszahl einer Datumsangabe (wie SUBSTR(?date, 1, 4) bei
+    "2001/1977") oder, wenn keine vierstellige vorkommt, der Anfang von
+    year_span; None ohne Jahreszahl.
+    """
+    text = str(text).strip()
+    m = _YEAR.search(text)
+    if m:
+        return int(m.group(1))
+    span = year_span(text)
+    return None if span is None else span[0]
+
+
+class _Spans:
+    """Jahresspannen einer Datumsart, nach Anfangsjahr sortiert."""
+
+    def __init__(self, entries):
+        entries.sort(key=lambda e: e[1])
+        self.entities = [e[0] for e in entries]
+        self.start = np.array([e[1] for e in entries], dtype=np.int32)
+        self.end = np.array([e[2] for e in entries], dtype=np.int32)
+        self.by_entity = {}
+        for entity, first, last in entries:
+            lo, hi = self.by_entity.get(entity, (first, last))
+            self.by_entity[entity] = (min(lo, first), max(hi, last))
+
+    def __len__(self):
+        return len(self.entities)
+
+    def starting_between(self, lo, hi):
+        """Positionen mit Anfangsjahr in [lo, hi] (binäre Suche)."""
+        return range(np.searchsorted(self.start, lo, "left"), np.searchsorted(self.start, hi, "right"))
+
+
+class YearIndex:
+    """Sortierte Jahresspannen für Entstehungs-, Geburts- und Sterbedaten eines Graphen."""
+
+    _by_graph = weakref.WeakKeyDictionary()
+
+    def __init__(self, graph):
+        self.spans = {}
+        self.unparsed = []
+        for kind, predicate in DATE_PREDICATES.items():
+            entries = []
+            for entity, _, value in graph.triples((None, predicate, None)):
+                span = year_span(value)
+                if span is None:
+                    self.unparsed.append((entity, kind, value))
+                else:
+                    entries.append((entity, *span))
+            self.spans[kind] = _Spans(entries)
+
+    @classmethod
+    def for_graph(cls, graph, rebuild=False):
+        """
+        Index zu `graph`, beim ersten Aufruf aufgebaut und wiederverwendet,
+        solange sich der Graph nicht ändert (siehe graph_cache.graph_stamp).
+        Stores ohne Änderungszähler (z. B. rdflibs Memory) bekommen jedes Mal
+        einen neuen Index; für wiederholte Abfragen store="int" verwenden.
+        """
+        stamp = graph_stamp(graph)
+        if stamp is None:
+            return cls(graph)
+        entry = None if rebuild else cls._by_graph.get(graph)
+        if entry is None or entry[0] != stamp:
+            entry = cls._by_graph[graph] = (stamp, cls(graph))
+        return entry[1]
+
+    def span(self, kind, entity):
+        """(erstes, letztes Jahr) aller Angaben der Art `kind` zu `entity` oder None."""
+        return self.spans[kind].by_entity.get(entity)
+
+    def created_between(self, lo, hi, overlap=False):
+        """
+        Werke mit Anfangsjahr in [lo, hi], sortiert nach Jahr. Mit
+        `overlap=True` zählt jede Spanne, die [lo, hi] berührt
+        (z. B. "1927-35" für 1930).
+        """
+        spans = self.spans["creation"]
+        if not overlap:
+            positions = spans.starting_between(lo, hi)
+        else:
+            # Anfang <= hi per binärer Suche, Ende >= lo vektorisiert
+            n = np.searchsorted(spans.start, hi, "right")
+            positions = np.flatnonzero(spans.end[:n] >= lo)
+        return list(dict.fromkeys(spans.entities[i] for i in positions))
+
+    def alive_in(self, year):
+        """Personen mit Geburtsjahr <= year und Sterbejahr >= year (oder ohne Sterbedatum)."""
+        births = self.spans["birth"]
+        deaths = self.spans["death"].by_entity
+        n = np.searchsorted(births.start, year, "right")
+        found = []
+        for person in dict.fromkeys(births.entities[:n]):
+            death = deaths.get(person)
+            if death is None or death[1] >= year:
+                found.append(person)
+        return found
+
+
+# --- SPARQL-Erweiterungsfunktionen -------------------------------------
+
+# (bnodes, schwacher Verweis auf den Graphen, YearIndex) der zuletzt ausgewerteten Abfrage, damit Graphen
+# ohne Änderungszähler den Index nicht für jede Lösung neu aufbauen
+_last_query = None
+
+
+def _index(ctx):
+    global _last_query
+    query = ctx.ctx
+    # Alle Klone eines QueryContext teilen sich `bnodes`; daran ist eine Auswertung erkennbar
+    last = _last_query
+    if last is None or last[0] is not query.bnodes or last[1]() is not query.graph:
+        last = _last_query = (query.bnodes, weakref.ref(query.graph), YearIndex.for_graph(query.graph))
+    return last[2]
+
+
+@lru_cache(maxsize=4096)
+def _cached_first_year(text):
+    return first_year(text)
+
+
+def _year(value):
+    year = _cached_first_year(str(value))
+    if year is None:
+        raise SPARQLError(f"keine Jahreszahl: {value!r}")
+    return Literal(year)
+
+
+def _year_arg(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise SPARQLError(f"Jahreszahl erwartet: {value!r}")
+
+
+def _node_arg(value):
+    if not isinstance(value, (URIRef, BNode)):
+        raise SPARQLError(f"Ressource erwartet: {value!r}")
+    return value
+
+
+def _creation_year(e, ctx):
+    span = _index(ctx).span("creation", _node_arg(e.expr[0]))
+    if span is None:
+        raise SPARQLError("kein Entstehungsdatum")
+    return Literal(span[0])
+
+
+def _created_between(e, ctx):
+    span = _index(ctx).span("creation", _node_arg(e.expr[0]))
+    lo, hi = _year_arg(e.expr[1]), _year_arg(e.expr[2])
+    return Literal(span is not None and lo <= span[0] <= hi)
+
+
+def _alive_in(e, ctx):
+    index = _index(ctx)
+    person, year = _node_arg(e.expr[0]), _year_arg(e.expr[1])
+    birth, death = index.span("birth", person), index.span("death", person)
+    return Literal(birth is not None and birth[0] <= year and (death is None or death[1] >= year))
+
+
+SPARQL_FUNCTIONS = {
+    mhgfn.creationYear: _creation_year,
+    mhgfn.createdBetween: _created_between,
+    mhgfn.aliveIn: _alive_in,
+}
+
+def register():
+    """Registriert die mhgfn:-Funktionen bei rdflib (mehrfacher Aufruf unschädlich)."""
+    for uri, func in SPARQL_FUNCTIONS.items():
+        register_custom_function(uri, func, override=True, raw=True)
+    register_custom_function(mhgfn.year, _year, override=True)